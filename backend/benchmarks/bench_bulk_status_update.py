@@ -0,0 +1,199 @@
+"""
+Benchmark bulk schedule approval: the old per-row loop against the set-based update.
+
+    python backend/benchmarks/bench_bulk_status_update.py             # event loop only
+    python backend/benchmarks/bench_bulk_status_update.py --mysql     # also time the SQL paths
+
+The default mode runs concurrent approval handlers on one asyncio loop to show what
+the old time.sleep(0.5) did to every other request on the worker. The --mysql mode
+creates a throwaway semester with --schedules rows in labclass_db, approves it with
+both strategies (optionally from several threads at once) and deletes what it created.
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+
+DB_HOST = "localhost"
+DB_USER = "root"
+DB_PASSWORD = ""
+DB_NAME = "labclass_db"
+
+
+async def legacy_handler():
+    # The previous handler slept synchronously inside async def
+    time.sleep(0.5)
+
+
+async def set_based_handler():
+    await asyncio.sleep(0)
+
+
+async def probe_latency(stop, samples):
+    # A cheap request sharing the loop with the approvals
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        samples.append(time.perf_counter() - started - 0.01)
+
+
+async def run_handlers(handler, count):
+    stop = asyncio.Event()
+    samples = []
+    probe = asyncio.create_task(probe_latency(stop, samples))
+    await asyncio.sleep(0.02)
+    started = time.perf_counter()
+    await asyncio.gather(*(handler() for _ in range(count)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    return elapsed, max(samples) if samples else 0.0
+
+
+def run_event_loop(args):
+    for label, handler in [("legacy (time.sleep)", legacy_handler), ("set-based", set_based_handler)]:
+        elapsed, worst_lag = asyncio.run(run_handlers(handler, args.requests))
+        print(f"{label:<22} {args.requests} concurrent approvals in {elapsed * 1000:9.1f} ms, "
+              f"worst loop lag {worst_lag * 1000:8.1f} ms")
+
+
+def connect():
+    import pymysql
+
+    return pymysql.connect(
+        host=DB_HOST,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME,
+        cursorclass=pymysql.cursors.DictCursor
+    )
+
+
+def legacy_approve(conn, schedule_ids, sleep):
+    with conn.cursor() as cursor:
+        for schedule_id in schedule_ids:
+            cursor.execute("UPDATE schedules SET status = %s WHERE id = %s", ('approved', schedule_id))
+            cursor.execute(
+                "INSERT INTO audit_log (user_id, action, details, ip_address) VALUES (%s, %s, %s, %s)",
+                (None, "UPDATE_SCHEDULE_STATUS", f"Schedule {schedule_id} status changed to approved", None)
+            )
+    conn.commit()
+    if sleep:
+        time.sleep(0.5)
+    conn.commit()
+
+
+def set_based_approve(conn, schedule_ids, sleep):
+    placeholders = ", ".join(["%s"] * len(schedule_ids))
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE schedules SET status = %s WHERE id IN ({placeholders})",
+            ['approved'] + schedule_ids
+        )
+        cursor.execute(
+            "INSERT INTO audit_log (user_id, action, details, ip_address) VALUES (%s, %s, %s, %s)",
+            (None, "BULK_UPDATE_SCHEDULE_STATUS",
+             f"Schedules {', '.join(str(schedule_id) for schedule_id in schedule_ids)} status changed to approved",
+             None)
+        )
+    conn.commit()
+
+
+def reset_status(conn, semester_id):
+    with conn.cursor() as cursor:
+        cursor.execute("UPDATE schedules SET status = 'draft' WHERE semester_id = %s", (semester_id,))
+    conn.commit()
+
+
+def time_concurrent(approve, schedule_ids, threads, sleep):
+    """Split the ids between threads, one connection each, and time until all finish"""
+    chunks = [schedule_ids[index::threads] for index in range(threads)]
+    connections = [connect() for _ in chunks]
+    workers = [
+        threading.Thread(target=approve, args=(connection, chunk, sleep))
+        for connection, chunk in zip(connections, chunks)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    for connection in connections:
+        connection.close()
+    return elapsed
+
+
+def run_mysql(args):
+    conn = connect()
+    semester_id = None
+    audit_watermark = None
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT COALESCE(MAX(id), 0) as max_id FROM audit_log")
+            audit_watermark = cursor.fetchone()['max_id']
+            cursor.execute("SELECT id FROM lab_rooms ORDER BY id LIMIT 1")
+            room = cursor.fetchone()
+            if not room:
+                print("No lab rooms found; cannot run the MySQL benchmark")
+                return
+
+            cursor.execute(
+                "INSERT INTO semesters (name, created_at) VALUES (%s, NOW())",
+                (f"Benchmark {int(time.time())}",)
+            )
+            semester_id = cursor.lastrowid
+            cursor.executemany(
+                """
+                INSERT INTO schedules (
+                    semester_id, section, course_code, course_name, day, lab_room_id,
+                    instructor_name, start_time, end_time, schedule_types, class_type, status
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """,
+                [
+                    (semester_id, f"S{index}", f"BENCH{index:03d}", 'Benchmark', 'Monday', room['id'],
+                     'Benchmark', '07:30 AM', '08:30 AM', json.dumps(['lab']), 'lab', 'draft')
+                    for index in range(args.schedules)
+                ]
+            )
+            cursor.execute("SELECT id FROM schedules WHERE semester_id = %s ORDER BY id", (semester_id,))
+            schedule_ids = [row['id'] for row in cursor.fetchall()]
+        conn.commit()
+        print(f"Inserted {len(schedule_ids)} schedules into benchmark semester {semester_id}")
+
+        for label, approve, sleep in [
+            ("legacy loop + sleep", legacy_approve, True),
+            ("legacy loop", legacy_approve, False),
+            ("set-based", set_based_approve, False),
+        ]:
+            reset_status(conn, semester_id)
+            elapsed = time_concurrent(approve, schedule_ids, args.threads, sleep)
+            print(f"{label:<22} {len(schedule_ids)} schedules, {args.threads} thread(s): "
+                  f"{elapsed * 1000:9.1f} ms ({len(schedule_ids) / elapsed:10.0f} schedules/s)")
+    finally:
+        if semester_id is not None:
+            with conn.cursor() as cursor:
+                cursor.execute("DELETE FROM schedules WHERE semester_id = %s", (semester_id,))
+                cursor.execute("DELETE FROM semesters WHERE id = %s", (semester_id,))
+                # Only the audit rows written by this run
+                cursor.execute(
+                    "DELETE FROM audit_log WHERE id > %s AND user_id IS NULL "
+                    "AND action IN ('UPDATE_SCHEDULE_STATUS', 'BULK_UPDATE_SCHEDULE_STATUS')",
+                    (audit_watermark,)
+                )
+            conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--schedules", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=8, help="concurrent approvals on one event loop")
+    parser.add_argument("--threads", type=int, default=1, help="concurrent connections in --mysql mode")
+    parser.add_argument("--mysql", action="store_true", help="also benchmark the SQL paths against labclass_db")
+    args = parser.parse_args()
+
+    run_event_loop(args)
+    if args.mysql:
+        run_mysql(args)
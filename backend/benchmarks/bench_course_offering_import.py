@@ -0,0 +1,146 @@
+"""
+Benchmark course offering imports: the old lookup-then-insert loop against the batched upsert.
+
+    python backend/benchmarks/bench_course_offering_import.py --rows 10000
+
+Needs labclass_db with the uq_course_offerings_key index (applied by
+schema_migrations.py). A throwaway semester is created and every phase imports
+--rows offerings into it:
+
+- legacy: SELECT + INSERT per course, as the old import endpoint did;
+- upsert (new): course_offering_import.upsert_course_offerings on an empty semester;
+- upsert (unchanged): the same payload again;
+- upsert (renamed half): the payload with every other name changed.
+
+Everything created is deleted at the end.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import pymysql
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from course_offering_import import upsert_course_offerings
+
+DB_HOST = "localhost"
+DB_USER = "root"
+DB_PASSWORD = ""
+DB_NAME = "labclass_db"
+
+
+def connect():
+    return pymysql.connect(
+        host=DB_HOST,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME,
+        cursorclass=pymysql.cursors.DictCursor
+    )
+
+
+def synthetic_courses(count, semester_id, suffix=""):
+    return [
+        {
+            "code": f"BENCH{index // 8:05d}",
+            "name": f"Benchmark course {index // 8}{suffix if index % 2 else ''}",
+            "year_and_section": f"{index % 4 + 1}{'ABCDEFGH'[index % 8]}",
+            "semester_id": semester_id
+        }
+        for index in range(count)
+    ]
+
+
+def legacy_import(conn, courses):
+    imported = 0
+    with conn.cursor() as cursor:
+        for course in courses:
+            cursor.execute(
+                """
+                SELECT id FROM course_offerings
+                WHERE code = %s AND year_and_section = %s AND semester_id = %s
+                """,
+                (course["code"], course["year_and_section"], course["semester_id"])
+            )
+            if not cursor.fetchone():
+                cursor.execute(
+                    """
+                    INSERT INTO course_offerings
+                    (code, name, year_and_section, semester_id, created_at)
+                    VALUES (%s, %s, %s, %s, %s)
+                    """,
+                    (course["code"], course["name"], course["year_and_section"], course["semester_id"], datetime.now())
+                )
+                imported += 1
+    conn.commit()
+    return {"inserted": imported}
+
+
+def upsert_import(conn, courses):
+    with conn.cursor() as cursor:
+        counts = upsert_course_offerings(cursor, courses)
+    conn.commit()
+    return counts
+
+
+def clear_semester(conn, semester_id):
+    with conn.cursor() as cursor:
+        cursor.execute("DELETE FROM course_offerings WHERE semester_id = %s", (semester_id,))
+    conn.commit()
+
+
+def timed(label, rows, run):
+    started = time.perf_counter()
+    counts = run()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<22} {rows} rows in {elapsed * 1000:9.1f} ms ({rows / elapsed:10.0f} rows/s)  {counts}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--skip-legacy", action="store_true", help="only time the upsert")
+    args = parser.parse_args()
+
+    conn = connect()
+    semester_id = None
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT COUNT(*) as count FROM information_schema.statistics
+                WHERE table_schema = DATABASE() AND table_name = 'course_offerings'
+                  AND index_name = 'uq_course_offerings_key'
+                """
+            )
+            if cursor.fetchone()["count"] == 0:
+                print("uq_course_offerings_key is missing; run schema_migrations.py first")
+                return
+            cursor.execute(
+                "INSERT INTO semesters (name, created_at) VALUES (%s, NOW())",
+                (f"Benchmark {int(time.time())}",)
+            )
+            semester_id = cursor.lastrowid
+        conn.commit()
+
+        courses = synthetic_courses(args.rows, semester_id)
+        if not args.skip_legacy:
+            timed("legacy", args.rows, lambda: legacy_import(conn, courses))
+            clear_semester(conn, semester_id)
+        timed("upsert (new)", args.rows, lambda: upsert_import(conn, courses))
+        timed("upsert (unchanged)", args.rows, lambda: upsert_import(conn, courses))
+        renamed = synthetic_courses(args.rows, semester_id, suffix=" (renamed)")
+        timed("upsert (renamed half)", args.rows, lambda: upsert_import(conn, renamed))
+    finally:
+        if semester_id is not None:
+            clear_semester(conn, semester_id)
+            with conn.cursor() as cursor:
+                cursor.execute("DELETE FROM semesters WHERE id = %s", (semester_id,))
+            conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
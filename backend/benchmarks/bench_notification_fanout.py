@@ -0,0 +1,142 @@
+"""
+Benchmark notification fan-out through routes.notifications.create_notification.
+
+    python backend/benchmarks/bench_notification_fanout.py                       # 10k and 100k users
+    python backend/benchmarks/bench_notification_fanout.py --users 10000 --legacy-max 10000
+
+Synthetic approved users (ids prefixed 'bench-fanout-') are inserted into labclass_db
+and one notification is posted to them in each of these ways:
+
+- per-user INSERT: the old global fan-out loop, kept as the baseline;
+- global: create_notification(is_global=True), stored once and merged on read;
+- targeted: create_notification(target_users=...), chunked INSERT ... SELECT plus
+  the unread counter updates.
+
+Everything the run created is deleted afterwards. The per-user loop is skipped
+above --legacy-max users. Needs the backend's dependencies (create_notification
+is imported from the API's routes).
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The routes import get_db_connection from main, so main has to be loaded first
+import main  # noqa: F401
+from routes.notifications import create_notification
+
+DB_HOST = "localhost"
+DB_USER = "root"
+DB_PASSWORD = ""
+DB_NAME = "labclass_db"
+
+USER_PREFIX = "bench-fanout-"
+
+
+def connect():
+    import pymysql
+
+    return pymysql.connect(
+        host=DB_HOST,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME,
+        cursorclass=pymysql.cursors.DictCursor
+    )
+
+
+def create_users(conn, count):
+    with conn.cursor() as cursor:
+        rows = [
+            (f"{USER_PREFIX}{index}", f"Benchmark User {index}", f"{USER_PREFIX}{index}@example.com",
+             "x", "Student", True, False)
+            for index in range(count)
+        ]
+        for chunk_start in range(0, len(rows), 5000):
+            cursor.executemany(
+                """
+                INSERT INTO users (id, full_name, email, password, role, is_approved, requires_approval)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """,
+                rows[chunk_start:chunk_start + 5000]
+            )
+    conn.commit()
+
+
+def create_notification_row(cursor, label):
+    cursor.execute(
+        """
+        INSERT INTO notifications (title, message, type, is_global, created_at)
+        VALUES (%s, %s, 'info', TRUE, NOW())
+        """,
+        ("Benchmark", f"Fan-out benchmark ({label})")
+    )
+    return cursor.lastrowid
+
+
+def legacy_fanout(conn, user_ids):
+    with conn.cursor() as cursor:
+        notification_id = create_notification_row(cursor, "per-user insert")
+        cursor.execute(f"SELECT id FROM users WHERE id LIKE '{USER_PREFIX}%%'")
+        for user in cursor.fetchall():
+            cursor.execute(
+                "INSERT INTO user_notifications (user_id, notification_id, is_read) VALUES (%s, %s, FALSE)",
+                (user['id'], notification_id)
+            )
+    conn.commit()
+    return notification_id
+
+
+def global_fanout(conn, user_ids):
+    return create_notification(conn, "Benchmark", "Fan-out benchmark (global)", is_global=True)
+
+
+def targeted_fanout(conn, user_ids):
+    return create_notification(conn, "Benchmark", "Fan-out benchmark (targeted)", target_users=user_ids)
+
+
+def cleanup(conn, notification_ids):
+    with conn.cursor() as cursor:
+        for notification_id in notification_ids:
+            cursor.execute("DELETE FROM user_notifications WHERE notification_id = %s", (notification_id,))
+            cursor.execute("DELETE FROM notifications WHERE id = %s", (notification_id,))
+        cursor.execute(f"DELETE FROM notification_read_state WHERE user_id LIKE '{USER_PREFIX}%%'")
+        cursor.execute(f"DELETE FROM users WHERE id LIKE '{USER_PREFIX}%%'")
+    conn.commit()
+
+
+def run(args):
+    conn = connect()
+    notification_ids = []
+    try:
+        for user_count in args.users:
+            cleanup(conn, notification_ids)
+            notification_ids = []
+            create_users(conn, user_count)
+            user_ids = [f"{USER_PREFIX}{index}" for index in range(user_count)]
+            print(f"{user_count} synthetic users")
+
+            strategies = [("global", global_fanout), ("targeted", targeted_fanout)]
+            if user_count <= args.legacy_max:
+                strategies.insert(0, ("per-user INSERT", legacy_fanout))
+            for label, fanout in strategies:
+                started = time.perf_counter()
+                notification_id = fanout(conn, user_ids)
+                elapsed = time.perf_counter() - started
+                if notification_id is None:
+                    raise RuntimeError(f"{label} fan-out failed; see the log above")
+                notification_ids.append(notification_id)
+                print(f"  {label:<20} {elapsed * 1000:10.1f} ms ({user_count / elapsed:12.0f} rows/s)")
+    finally:
+        cleanup(conn, notification_ids)
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--legacy-max", type=int, default=100000, help="skip the per-user loop above this size")
+    args = parser.parse_args()
+
+    run(args)
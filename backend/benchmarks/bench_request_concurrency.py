@@ -0,0 +1,99 @@
+"""
+Measure GET /api/schedules latency while logins and approvals run against a live API.
+
+    cd backend && uvicorn main:app --port 8000
+    python backend/benchmarks/bench_request_concurrency.py --username admin@example.com --password secret
+    python backend/benchmarks/bench_request_concurrency.py ... --schedule-ids 12,13,14   # also approve
+
+Two phases are timed: readers alone, then readers alongside logins (bcrypt) and, when
+--schedule-ids is given, bulk approvals of those schedules. With blocking work kept off
+the event loop the reader p99 should stay close to the baseline.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def reader(client, headers, semester_id, deadline, latencies):
+    params = {"semester_id": semester_id} if semester_id else None
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.get("/api/schedules", params=params, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+
+
+async def logger_in(client, username, password, deadline, counter):
+    while time.perf_counter() < deadline:
+        response = await client.post("/api/token", data={"username": username, "password": password})
+        response.raise_for_status()
+        counter[0] += 1
+
+
+async def approver(client, headers, schedule_ids, deadline, counter):
+    while time.perf_counter() < deadline:
+        response = await client.patch(
+            "/api/schedules/bulk-status-update",
+            json={"schedule_ids": schedule_ids, "status": "approved"},
+            headers=headers
+        )
+        response.raise_for_status()
+        counter[0] += 1
+
+
+def report(label, latencies, duration):
+    print(f"{label:<22} {len(latencies) / duration:8.1f} req/s  "
+          f"p50 {percentile(latencies, 0.50) * 1000:8.1f} ms  "
+          f"p95 {percentile(latencies, 0.95) * 1000:8.1f} ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:8.1f} ms")
+
+
+async def run(args):
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        response = await client.post("/api/token", data={"username": args.username, "password": args.password})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        schedule_ids = [int(value) for value in args.schedule_ids.split(",")] if args.schedule_ids else []
+
+        latencies = []
+        deadline = time.perf_counter() + args.duration
+        await asyncio.gather(*(
+            reader(client, headers, args.semester_id, deadline, latencies) for _ in range(args.readers)
+        ))
+        report("readers only", latencies, args.duration)
+
+        latencies = []
+        logins = [0]
+        approvals = [0]
+        deadline = time.perf_counter() + args.duration
+        tasks = [reader(client, headers, args.semester_id, deadline, latencies) for _ in range(args.readers)]
+        tasks += [logger_in(client, args.username, args.password, deadline, logins) for _ in range(args.logins)]
+        if schedule_ids:
+            tasks += [approver(client, headers, schedule_ids, deadline, approvals) for _ in range(args.approvals)]
+        await asyncio.gather(*tasks)
+        report("readers under load", latencies, args.duration)
+        print(f"Background work: {logins[0]} logins, {approvals[0]} approvals in {args.duration:.0f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--semester-id", type=int, default=None)
+    parser.add_argument("--schedule-ids", default="", help="comma separated ids to approve repeatedly")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per phase")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--logins", type=int, default=4)
+    parser.add_argument("--approvals", type=int, default=2)
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
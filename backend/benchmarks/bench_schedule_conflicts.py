@@ -0,0 +1,237 @@
+"""
+Benchmark the interval-index conflict engine against the previous SQL conflict query.
+
+    python backend/benchmarks/bench_schedule_conflicts.py             # in-memory only
+    python backend/benchmarks/bench_schedule_conflicts.py --mysql     # also time the SQL path
+
+The --mysql mode creates a throwaway semester in labclass_db, inserts the synthetic
+schedules into it, times both paths and deletes everything it created.
+"""
+import argparse
+import json
+import random
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from schedule_conflicts import ScheduleConflictEngine, time_to_minutes, schedule_days
+
+DB_HOST = "localhost"
+DB_USER = "root"
+DB_PASSWORD = ""
+DB_NAME = "labclass_db"
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+# The 4-case query check_schedule_conflicts ran before the interval index
+LEGACY_CONFLICT_QUERY = """
+SELECT s.*, l.name as lab_room_name, sem.name as semester_name
+FROM schedules s
+JOIN lab_rooms l ON s.lab_room_id = l.id
+JOIN semesters sem ON s.semester_id = sem.id
+WHERE
+    s.semester_id = %s
+    AND s.lab_room_id = %s
+    AND (
+        ((s.day = %s) AND ((s.start_time <= %s AND s.end_time > %s) OR (s.start_time >= %s AND s.start_time < %s) OR (s.start_time <= %s AND s.end_time >= %s)))
+        OR (%s IS NOT NULL AND (s.day = %s) AND ((s.start_time <= %s AND s.end_time > %s) OR (s.start_time >= %s AND s.start_time < %s) OR (s.start_time <= %s AND s.end_time >= %s)))
+        OR (%s IS NOT NULL AND (s.day = %s) AND ((s.start_time <= %s AND s.end_time > %s) OR (s.start_time >= %s AND s.start_time < %s) OR (s.start_time <= %s AND s.end_time >= %s)))
+        OR (s.second_day IS NOT NULL AND ((s.second_day = %s) OR (%s IS NOT NULL AND s.second_day = %s))
+            AND ((s.start_time <= %s AND s.end_time > %s) OR (s.start_time >= %s AND s.start_time < %s) OR (s.start_time <= %s AND s.end_time >= %s)))
+    )
+"""
+
+
+def legacy_params(semester_id, lab_room_id, day, second_day, start_time, end_time):
+    return [
+        semester_id, lab_room_id,
+        day, end_time, start_time, start_time, end_time, start_time, end_time,
+        second_day, second_day, end_time, start_time, start_time, end_time, start_time, end_time,
+        second_day, second_day, end_time, start_time, start_time, end_time, start_time, end_time,
+        day, second_day, second_day, end_time, start_time, start_time, end_time, start_time, end_time
+    ]
+
+
+def format_minutes(minutes):
+    hour, minute = divmod(minutes, 60)
+    period = "AM" if hour < 12 else "PM"
+    hour = hour % 12 or 12
+    return f"{hour:02d}:{minute:02d} {period}"
+
+
+def random_slot(rng):
+    # 7:30 AM to 8:00 PM in 30 minute steps, 1 to 3 hours long
+    start = 450 + 30 * rng.randint(0, 21)
+    end = min(start + 30 * rng.randint(2, 6), 1200)
+    return start, end
+
+
+def generate_schedules(count, rooms, semester_id, seed):
+    rng = random.Random(seed)
+    schedules = []
+    for index in range(count):
+        start, end = random_slot(rng)
+        day = rng.choice(DAYS)
+        second_day = rng.choice([None, None, rng.choice(DAYS)])
+        schedules.append({
+            'id': index + 1,
+            'semester_id': semester_id,
+            'lab_room_id': rng.choice(rooms),
+            'day': day,
+            'second_day': second_day if second_day != day else None,
+            'start_time': format_minutes(start),
+            'end_time': format_minutes(end),
+            'course_code': f"BENCH{index % 500:03d}",
+            'section': f"S{index % 40}",
+            'status': 'draft',
+            'lab_room_name': None
+        })
+    return schedules
+
+
+def generate_probes(count, rooms, semester_id, seed):
+    rng = random.Random(seed + 1)
+    probes = []
+    for _ in range(count):
+        start, end = random_slot(rng)
+        day = rng.choice(DAYS)
+        second_day = rng.choice([None, rng.choice(DAYS)])
+        probes.append((semester_id, rng.choice(rooms), day, second_day if second_day != day else None,
+                       format_minutes(start), format_minutes(end)))
+    return probes
+
+
+def brute_force_conflicts(schedules, probe):
+    semester_id, room, day, second_day, start_time, end_time = probe
+    start, end = time_to_minutes(start_time), time_to_minutes(end_time)
+    wanted = set(schedule_days(day, second_day))
+    found = []
+    for schedule in schedules:
+        if schedule['semester_id'] != semester_id or schedule['lab_room_id'] != room:
+            continue
+        if not wanted & set(schedule_days(schedule['day'], schedule['second_day'])):
+            continue
+        if time_to_minutes(schedule['start_time']) < end and time_to_minutes(schedule['end_time']) > start:
+            found.append(schedule['id'])
+    return sorted(found)
+
+
+def report(label, elapsed, probes):
+    per_check = elapsed / len(probes) * 1_000_000
+    print(f"{label:<28} {elapsed * 1000:10.1f} ms total {per_check:10.1f} us/check")
+
+
+def run_in_memory(args):
+    rooms = list(range(1, args.rooms + 1))
+    schedules = generate_schedules(args.schedules, rooms, 1, args.seed)
+    probes = generate_probes(args.checks, rooms, 1, args.seed)
+
+    engine = ScheduleConflictEngine()
+    started = time.perf_counter()
+    for schedule in schedules:
+        engine.add_interval(schedule)
+    print(f"Indexed {len(schedules)} schedules across {len(rooms)} rooms in "
+          f"{(time.perf_counter() - started) * 1000:.1f} ms")
+
+    started = time.perf_counter()
+    engine_results = [[item.id for item in engine.find_conflicts(*probe)] for probe in probes]
+    report("interval index", time.perf_counter() - started, probes)
+
+    brute_probes = probes[:min(len(probes), 200)]
+    started = time.perf_counter()
+    brute_results = [brute_force_conflicts(schedules, probe) for probe in brute_probes]
+    report("linear scan (python)", time.perf_counter() - started, brute_probes)
+
+    mismatches = sum(1 for a, b in zip(engine_results, brute_results) if a != b)
+    print(f"Result check against linear scan: {len(brute_probes) - mismatches}/{len(brute_probes)} identical")
+
+
+def run_mysql(args):
+    import pymysql
+
+    conn = pymysql.connect(
+        host=DB_HOST,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME,
+        cursorclass=pymysql.cursors.DictCursor
+    )
+    semester_id = None
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT id FROM lab_rooms ORDER BY id")
+            rooms = [row['id'] for row in cursor.fetchall()]
+            if not rooms:
+                print("No lab rooms found; cannot run the MySQL benchmark")
+                return
+
+            cursor.execute(
+                "INSERT INTO semesters (name, created_at) VALUES (%s, NOW())",
+                (f"Benchmark {int(time.time())}",)
+            )
+            semester_id = cursor.lastrowid
+
+            schedules = generate_schedules(args.schedules, rooms, semester_id, args.seed)
+            cursor.executemany(
+                """
+                INSERT INTO schedules (
+                    semester_id, section, course_code, course_name, day, second_day, lab_room_id,
+                    instructor_name, start_time, end_time, schedule_types, class_type, status
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """,
+                [
+                    (semester_id, s['section'], s['course_code'], 'Benchmark', s['day'], s['second_day'],
+                     s['lab_room_id'], 'Benchmark', s['start_time'], s['end_time'], json.dumps(['lab']),
+                     'lab', 'draft')
+                    for s in schedules
+                ]
+            )
+        conn.commit()
+        print(f"Inserted {len(schedules)} schedules into benchmark semester {semester_id}")
+
+        probes = generate_probes(args.checks, rooms, semester_id, args.seed)
+
+        started = time.perf_counter()
+        with conn.cursor() as cursor:
+            for probe in probes:
+                cursor.execute(LEGACY_CONFLICT_QUERY, legacy_params(*probe))
+                cursor.fetchall()
+        report("legacy SQL query", time.perf_counter() - started, probes)
+
+        engine = ScheduleConflictEngine()
+        started = time.perf_counter()
+        engine.load_semester(conn, semester_id)
+        print(f"Engine load of semester: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        started = time.perf_counter()
+        for probe in probes:
+            engine.ensure_semester(conn, semester_id)
+            engine.find_conflicts(*probe)
+        report("engine (with freshness)", time.perf_counter() - started, probes)
+
+        started = time.perf_counter()
+        for probe in probes:
+            engine.find_conflicts(*probe)
+        report("engine (index only)", time.perf_counter() - started, probes)
+    finally:
+        if semester_id is not None:
+            with conn.cursor() as cursor:
+                cursor.execute("DELETE FROM schedules WHERE semester_id = %s", (semester_id,))
+                cursor.execute("DELETE FROM semesters WHERE id = %s", (semester_id,))
+            conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--schedules", type=int, default=12000)
+    parser.add_argument("--rooms", type=int, default=40)
+    parser.add_argument("--checks", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--mysql", action="store_true", help="also benchmark the legacy SQL query against labclass_db")
+    args = parser.parse_args()
+
+    run_in_memory(args)
+    if args.mysql:
+        run_mysql(args)
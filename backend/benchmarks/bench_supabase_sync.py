@@ -0,0 +1,127 @@
+"""
+Compare Supabase sync push throughput against the local PostgREST mock.
+
+    python backend/benchmarks/bench_supabase_sync.py --rows 2000 --latency-ms 20
+    python backend/benchmarks/bench_supabase_sync.py --rows 2000 --chunk-size 250 --concurrency 8 --fail-rate 0.05
+
+Two ways of pushing the same synthetic schedules are timed, each as upserts of
+every row followed by deletes of every row:
+
+- per-row: one requests.post / requests.delete per schedule with fresh headers
+  and no session, the way sync_schedules.py used to push;
+- batched: sync_schedules.upsert_supabase_schedules / delete_supabase_schedules,
+  i.e. chunked requests over the pooled keep-alive session, --concurrency at a
+  time, with retries on 429/5xx.
+
+--latency-ms stands in for the round trip to Supabase; with --fail-rate the
+batched path should still land every row while the per-row path loses some.
+"""
+import argparse
+import os
+import sys
+import time
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mock_postgrest import serve
+import sync_schedules
+
+
+def synthetic_schedules(count):
+    return [
+        {
+            "id": schedule_id,
+            "semester": "1st Semester 2025-2026",
+            "section": f"BSIT-{schedule_id % 4 + 1}A",
+            "course_code": f"IT{100 + schedule_id % 50}",
+            "course_name": f"Course {schedule_id % 50}",
+            "day": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"][schedule_id % 5],
+            "second_day": None,
+            "lab_room": f"Lab {schedule_id % 6 + 1}",
+            "instructor_name": f"Instructor {schedule_id % 30}",
+            "start_time": "08:00:00",
+            "end_time": "10:00:00",
+            "schedule_types": '["lecture"]',
+            "status": "approved",
+            "class_type": "regular",
+            "created_by": "1",
+            "created_at": "2025-06-01T08:00:00",
+            "updated_at": "2025-06-01T08:00:00"
+        }
+        for schedule_id in range(1, count + 1)
+    ]
+
+
+def push_per_row(base_url, schedules):
+    """The old one-request-per-schedule push; returns (upserted, deleted)"""
+    headers = {
+        "apikey": sync_schedules.SUPABASE_KEY,
+        "Authorization": f"Bearer {sync_schedules.SUPABASE_KEY}",
+        "Content-Type": "application/json",
+        "Prefer": "resolution=merge-duplicates,return=minimal"
+    }
+    upserted = deleted = 0
+    for schedule in schedules:
+        response = requests.post(
+            f"{base_url}/rest/v1/schedules",
+            headers=headers,
+            json=sync_schedules.map_schedule_for_supabase(schedule)
+        )
+        upserted += response.status_code < 400
+    for schedule in schedules:
+        response = requests.delete(f"{base_url}/rest/v1/schedules?id=eq.{schedule['id']}", headers=headers)
+        deleted += response.status_code < 400
+    return upserted, deleted
+
+
+def push_batched(schedules):
+    upserted, _ = sync_schedules.upsert_supabase_schedules(schedules)
+    deleted, _ = sync_schedules.delete_supabase_schedules([schedule["id"] for schedule in schedules])
+    return len(upserted), len(deleted)
+
+
+def run(label, state, push):
+    state.reset()
+    started = time.perf_counter()
+    upserted, deleted = push()
+    elapsed = time.perf_counter() - started
+    stats = state.stats()
+    requests_sent = sum(stats["requests"].values())
+    print(f"{label:<10} {upserted:6d} upserted {deleted:6d} deleted  {requests_sent:6d} requests  "
+          f"{stats['failures']:4d} 5xx  {elapsed:7.2f}s  {(upserted + deleted) / elapsed:9.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--chunk-size", type=int, default=500, help="rows per batched upsert and delete")
+    parser.add_argument("--concurrency", type=int, default=4, help="batched requests in flight")
+    parser.add_argument("--latency-ms", type=float, default=20, help="mock round-trip latency")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--port", type=int, default=54329)
+    parser.add_argument("--skip-per-row", action="store_true", help="only time the batched push")
+    args = parser.parse_args()
+
+    server, state = serve(port=args.port, latency_ms=args.latency_ms, fail_rate=args.fail_rate)
+    base_url = f"http://127.0.0.1:{args.port}"
+    sync_schedules.SUPABASE_URL = base_url
+    sync_schedules.SYNC_UPSERT_CHUNK_SIZE = args.chunk_size
+    sync_schedules.SYNC_DELETE_CHUNK_SIZE = args.chunk_size
+    sync_schedules.SYNC_CONCURRENCY = args.concurrency
+    sync_schedules.SYNC_RETRY_BASE_SECONDS = 0.05
+
+    schedules = synthetic_schedules(args.rows)
+    print(f"{args.rows} schedules, {args.latency_ms:g} ms latency, fail rate {args.fail_rate:g}, "
+          f"chunk size {args.chunk_size}, concurrency {args.concurrency}")
+    try:
+        if not args.skip_per_row:
+            run("per-row", state, lambda: push_per_row(base_url, schedules))
+        run("batched", state, lambda: push_batched(schedules))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Local stand-in for the Supabase PostgREST endpoint used by sync_schedules.py.
+
+    python backend/benchmarks/mock_postgrest.py --port 54321
+    SUPABASE_URL=http://127.0.0.1:54321 python backend/sync_schedules.py
+
+Tables live in memory and are keyed by id. Supported: GET with id=eq./id=in./id=gt.
+filters, order=id.asc|desc, limit and offset; POST of one row or a list, upserting
+with "Prefer: resolution=merge-duplicates" and answering 409 on duplicates
+otherwise; PATCH and DELETE with id=eq./id=in. filters. --latency-ms and
+--fail-rate simulate a remote server; GET /_stats reports requests and rows
+written per method, POST /_reset empties everything.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class MockPostgrest:
+    def __init__(self, latency_ms=0, fail_rate=0.0):
+        self.latency = latency_ms / 1000
+        self.fail_rate = fail_rate
+        self.tables = {}
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.tables = {}
+            self.requests = {}
+            self.rows_written = {}
+            self.failures = 0
+            self.bytes_sent = 0
+
+    def count(self, method, rows=0):
+        with self.lock:
+            self.requests[method] = self.requests.get(method, 0) + 1
+            self.rows_written[method] = self.rows_written.get(method, 0) + rows
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requests": dict(self.requests),
+                "rows_written": dict(self.rows_written),
+                "failures": self.failures,
+                "bytes_sent": self.bytes_sent,
+                "rows": {name: len(rows) for name, rows in self.tables.items()}
+            }
+
+
+def parse_id_filter(value):
+    """'eq.5' or 'in.(1,2,3)' -> set of id strings"""
+    if value.startswith("eq."):
+        return {value[3:]}
+    if value.startswith("in.(") and value.endswith(")"):
+        return {item.strip().strip('"') for item in value[4:-1].split(",") if item.strip()}
+    raise ValueError(f"Unsupported filter {value}")
+
+
+def make_handler(server_state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, payload=None, headers=None):
+            body = b"" if payload is None else json.dumps(payload, default=str).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+            with server_state.lock:
+                server_state.bytes_sent += len(body)
+
+        def _read_body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"null")
+
+        def _route(self):
+            """Return (table, query) for /rest/v1/<table>, or (None, None)"""
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+            if len(parts) != 3 or parts[:2] != ["rest", "v1"]:
+                return None, None
+            return parts[2], parse_qs(url.query)
+
+        def _simulate(self):
+            if server_state.latency:
+                time.sleep(server_state.latency)
+            if server_state.fail_rate and random.random() < server_state.fail_rate:
+                with server_state.lock:
+                    server_state.failures += 1
+                # Drain the unread body so the keep-alive connection stays usable
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                self._send(503, {"message": "simulated failure"}, {"Retry-After": "0"})
+                return False
+            return True
+
+        def _selected(self, rows, query):
+            if "id" in query and query["id"][0].startswith("gt."):
+                floor = int(query["id"][0][3:])
+                return [row for row in rows.values() if int(row.get("id")) > floor]
+            if "id" in query:
+                ids = parse_id_filter(query["id"][0])
+                return [row for row in rows.values() if str(row.get("id")) in ids]
+            return list(rows.values())
+
+        def do_GET(self):
+            if self.path == "/_stats":
+                self._send(200, server_state.stats())
+                return
+            table, query = self._route()
+            if table is None:
+                self._send(404, {"message": "not found"})
+                return
+            if not self._simulate():
+                return
+            server_state.count("GET")
+            with server_state.lock:
+                rows = self._selected(server_state.tables.get(table, {}), query)
+            order = query.get("order", ["id.asc"])[0]
+            rows.sort(key=lambda row: row.get("id"), reverse=order.endswith(".desc"))
+            offset = int(query.get("offset", ["0"])[0])
+            limit = int(query["limit"][0]) if "limit" in query else None
+            rows = rows[offset:offset + limit if limit is not None else None]
+            self._send(200, rows)
+
+        def do_POST(self):
+            if self.path == "/_reset":
+                server_state.reset()
+                self._send(204)
+                return
+            table, _ = self._route()
+            if table is None:
+                self._send(404, {"message": "not found"})
+                return
+            if not self._simulate():
+                return
+            payload = self._read_body()
+            rows = payload if isinstance(payload, list) else [payload]
+            merge = "resolution=merge-duplicates" in (self.headers.get("Prefer") or "")
+            with server_state.lock:
+                target = server_state.tables.setdefault(table, {})
+                if not merge and any(str(row.get("id")) in target for row in rows):
+                    conflict = True
+                else:
+                    conflict = False
+                    for row in rows:
+                        key = str(row.get("id"))
+                        target[key] = {**target.get(key, {}), **row} if merge else dict(row)
+            if conflict:
+                self._send(409, {"message": "duplicate key value violates unique constraint"})
+                return
+            server_state.count("POST", len(rows))
+            self._send(201)
+
+        def do_PATCH(self):
+            table, query = self._route()
+            if table is None or "id" not in query:
+                self._send(400, {"message": "PATCH needs an id filter"})
+                return
+            if not self._simulate():
+                return
+            changes = self._read_body()
+            with server_state.lock:
+                rows = self._selected(server_state.tables.get(table, {}), query)
+                for row in rows:
+                    row.update(changes)
+            server_state.count("PATCH", len(rows))
+            self._send(204)
+
+        def do_DELETE(self):
+            table, query = self._route()
+            if table is None or "id" not in query:
+                self._send(400, {"message": "DELETE needs an id filter"})
+                return
+            if not self._simulate():
+                return
+            with server_state.lock:
+                target = server_state.tables.get(table, {})
+                ids = parse_id_filter(query["id"][0])
+                deleted = [key for key in ids if target.pop(key, None) is not None]
+            server_state.count("DELETE", len(deleted))
+            self._send(204)
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=54321, latency_ms=0, fail_rate=0.0):
+    """Start the mock in a background thread; returns (server, state)"""
+    state = MockPostgrest(latency_ms, fail_rate)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency-ms", type=float, default=0, help="delay added to every request")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    server, _ = serve(args.host, args.port, args.latency_ms, args.fail_rate)
+    print(f"Mock PostgREST listening on http://{args.host}:{args.port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,326 @@
+"""
+Bulk import of course offerings.
+
+Offerings are unique on (code, year_and_section, semester_id)
+(uq_course_offerings_key), so an import is a batched upsert instead of a
+lookup and an insert per course: each chunk costs one COUNT of the keys that
+already exist and one multi-row INSERT ... ON DUPLICATE KEY UPDATE. With
+FOUND_ROWS off (the pymysql default) MySQL reports 1 affected row per insert,
+2 per changed row and 0 per unchanged row, which together with the existing
+count gives the inserted / updated / unchanged split. Without the unique key
+the upsert would silently insert duplicates, so imports refuse to run until
+the migration has created it (see fix_course_offering_duplicates.py).
+
+Spreadsheet uploads (ingest_course_offerings) are streamed: rows come from a
+csv.reader or an openpyxl read-only worksheet one at a time, are validated as
+they arrive and go to the database in chunks, so only one chunk and the first
+MAX_REPORTED_ROW_ERRORS errors are ever held in memory.
+"""
+import codecs
+import csv
+import re
+from datetime import datetime
+
+from schema_migrations import index_exists
+
+COURSE_IMPORT_CHUNK_SIZE = 1000
+# Row errors listed in an upload response; the rest are only counted
+MAX_REPORTED_ROW_ERRORS = 100
+
+# Distinct semester cells remembered per upload
+MAX_CACHED_SEMESTER_VALUES = 256
+
+# Lengths of the course_offerings columns
+MAX_CODE_LENGTH = 20
+MAX_NAME_LENGTH = 100
+MAX_YEAR_AND_SECTION_LENGTH = 50
+
+# Normalized header -> field; headers are matched case-insensitively, with
+# spaces, dashes and underscores treated alike
+UPLOAD_HEADERS = {
+    "code": "code",
+    "course_code": "code",
+    "name": "name",
+    "course_name": "name",
+    "year_and_section": "year_and_section",
+    "section": "year_and_section",
+    "semester": "semester",
+    "semester_id": "semester",
+}
+
+
+class UploadFormatError(ValueError):
+    """The file itself cannot be read as a course offering sheet"""
+
+
+class MissingUniqueKeyError(RuntimeError):
+    """uq_course_offerings_key has not been created, so imports cannot upsert"""
+
+
+# Set once the unique key has been seen; it is never dropped again
+_unique_key_checked = False
+
+
+def require_offering_unique_key(cursor):
+    global _unique_key_checked
+    if _unique_key_checked:
+        return
+    if not index_exists(cursor, "course_offerings", "uq_course_offerings_key"):
+        raise MissingUniqueKeyError(
+            "Course offering imports are disabled: course_offerings has duplicate rows, so the "
+            "uq_course_offerings_key migration did not run. Remove them with "
+            "'python fix_course_offering_duplicates.py --apply' and restart the API"
+        )
+    _unique_key_checked = True
+
+
+def offering_key(course):
+    return (course['code'], course['year_and_section'], course['semester_id'])
+
+
+def dedupe_offerings(courses):
+    """Collapse courses repeating a key in one payload; the last occurrence wins"""
+    unique = {}
+    for course in courses:
+        unique[offering_key(course)] = course
+    return list(unique.values())
+
+
+def _count_existing(cursor, chunk):
+    keys = ", ".join(["(%s, %s, %s)"] * len(chunk))
+    cursor.execute(
+        f"""
+        SELECT COUNT(DISTINCT code, year_and_section, semester_id) as count FROM course_offerings
+        WHERE (code, year_and_section, semester_id) IN ({keys})
+        """,
+        [value for course in chunk for value in offering_key(course)]
+    )
+    return cursor.fetchone()['count']
+
+
+def upsert_course_offerings(cursor, courses, update_existing=True):
+    """
+    Insert courses, updating the name of existing offerings when update_existing
+    (otherwise they are left alone). courses are dicts with code, name,
+    year_and_section and semester_id, unique on their key (see dedupe_offerings).
+    Returns {"inserted", "updated", "unchanged"}; the caller commits. Raises
+    MissingUniqueKeyError while uq_course_offerings_key is missing.
+    """
+    require_offering_unique_key(cursor)
+    on_duplicate = "name = VALUES(name)" if update_existing else "id = id"
+    created_at = datetime.now()
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    for start in range(0, len(courses), COURSE_IMPORT_CHUNK_SIZE):
+        chunk = courses[start:start + COURSE_IMPORT_CHUNK_SIZE]
+        existing = _count_existing(cursor, chunk)
+        # Only placeholders in VALUES, so pymysql sends one multi-row INSERT
+        cursor.executemany(
+            f"""
+            INSERT INTO course_offerings (code, name, year_and_section, semester_id, created_at)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE {on_duplicate}
+            """,
+            [
+                (course['code'], course['name'], course['year_and_section'], course['semester_id'], created_at)
+                for course in chunk
+            ]
+        )
+        inserted = len(chunk) - existing
+        updated = (cursor.rowcount - inserted) // 2
+        counts["inserted"] += inserted
+        counts["updated"] += updated
+        counts["unchanged"] += existing - updated
+    return counts
+
+
+def _normalize_header(value):
+    return re.sub(r"[\s_\-]+", "_", str(value or "").strip().lower())
+
+
+def iter_csv_rows(stream):
+    """Rows of a binary CSV stream as lists of cells, decoded as UTF-8 (BOM allowed)"""
+    # Byte lines split safely on b"\n" in UTF-8; csv joins quoted multi-line cells
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    try:
+        yield from csv.reader(decoder.decode(line) for line in stream)
+    except UnicodeDecodeError:
+        raise UploadFormatError("CSV files must be UTF-8 encoded")
+
+
+def iter_xlsx_rows(stream):
+    """Rows of the first worksheet, read with openpyxl's read-only (streaming) reader"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise UploadFormatError("XLSX uploads need the openpyxl package on the server; upload a CSV instead")
+
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except Exception as e:
+        raise UploadFormatError(f"Could not open the workbook: {e}")
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _cell_text(value):
+    """Cell value as stripped text; whole numbers from XLSX lose their '.0'"""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+class SemesterResolver:
+    """
+    Map a semester cell to a semester id: an id, an exact name, or a fragment
+    such as "1st Sem" matching part of a name (newest semester wins, as in the
+    upload dialog). The semesters table is small and read once per upload.
+    """
+
+    def __init__(self, cursor):
+        cursor.execute("SELECT id, name FROM semesters ORDER BY id")
+        self.semesters = cursor.fetchall()
+        self.ids = {row['id'] for row in self.semesters}
+        self._cache = {}
+
+    def resolve(self, value):
+        if value in self._cache:
+            return self._cache[value]
+        semester_id = None
+        if value.isdigit() and int(value) in self.ids:
+            semester_id = int(value)
+        else:
+            wanted = value.lower()
+            exact = [row['id'] for row in self.semesters if row['name'].lower() == wanted]
+            partial = [row['id'] for row in self.semesters if wanted in row['name'].lower()]
+            matches = exact or partial
+            semester_id = matches[-1] if matches else None
+        if len(self._cache) < MAX_CACHED_SEMESTER_VALUES:
+            self._cache[value] = semester_id
+        return semester_id
+
+
+def iter_valid_offerings(rows, semesters, errors, default_semester_id=None):
+    """
+    Validate spreadsheet rows one at a time. The first row holds the headers.
+    Yields offering dicts for good rows; each bad row adds {"row", "error"} to
+    errors (a RowErrors) instead of stopping the import.
+    """
+    if default_semester_id is not None and default_semester_id not in semesters.ids:
+        raise UploadFormatError(f"Semester {default_semester_id} does not exist")
+
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        raise UploadFormatError("The file is empty")
+    columns = {}
+    for index, cell in enumerate(header):
+        field = UPLOAD_HEADERS.get(_normalize_header(cell))
+        if field is not None and field not in columns:
+            columns[field] = index
+    missing = [field for field in ("code", "name", "year_and_section") if field not in columns]
+    if "semester" not in columns and default_semester_id is None:
+        missing.append("semester")
+    if missing:
+        raise UploadFormatError(
+            f"Missing column(s): {', '.join(missing)}. The first row must name the columns "
+            f"(e.g. Course Code, Course Name, Year and Section, Semester)"
+        )
+
+    for row_number, row in enumerate(rows, start=2):
+        values = {field: _cell_text(row[index]) if index < len(row) else "" for field, index in columns.items()}
+        if not any(values.values()):
+            continue
+
+        if not values["code"] or not values["name"] or not values["year_and_section"]:
+            errors.add(row_number, "Course code, course name and year and section are required")
+            continue
+        if len(values["code"]) > MAX_CODE_LENGTH:
+            errors.add(row_number, f"Course code is longer than {MAX_CODE_LENGTH} characters")
+            continue
+        if len(values["name"]) > MAX_NAME_LENGTH:
+            errors.add(row_number, f"Course name is longer than {MAX_NAME_LENGTH} characters")
+            continue
+        if len(values["year_and_section"]) > MAX_YEAR_AND_SECTION_LENGTH:
+            errors.add(row_number, f"Year and section is longer than {MAX_YEAR_AND_SECTION_LENGTH} characters")
+            continue
+
+        semester = values.get("semester")
+        if semester:
+            semester_id = semesters.resolve(semester)
+            if semester_id is None:
+                errors.add(row_number, f"Unknown semester '{semester}'")
+                continue
+        elif default_semester_id is not None:
+            semester_id = default_semester_id
+        else:
+            errors.add(row_number, "Semester is required")
+            continue
+
+        yield {
+            "code": values["code"],
+            "name": values["name"],
+            "year_and_section": values["year_and_section"],
+            "semester_id": semester_id
+        }
+
+
+class RowErrors:
+    """Counts every row error and keeps the first MAX_REPORTED_ROW_ERRORS of them"""
+
+    def __init__(self):
+        self.count = 0
+        self.reported = []
+
+    def add(self, row_number, message):
+        self.count += 1
+        if len(self.reported) < MAX_REPORTED_ROW_ERRORS:
+            self.reported.append({"row": row_number, "error": message})
+
+
+def ingest_course_offerings(cursor, stream, file_format, default_semester_id=None, update_existing=True):
+    """
+    Stream an uploaded CSV/XLSX file into course_offerings in chunks. Returns
+    the upsert counts plus rows read, duplicates within a chunk and row errors;
+    raises UploadFormatError when the file cannot be read. The caller commits.
+    """
+    if file_format == "csv":
+        rows = iter_csv_rows(stream)
+    elif file_format == "xlsx":
+        rows = iter_xlsx_rows(stream)
+    else:
+        raise UploadFormatError("Upload a .csv or .xlsx file")
+
+    errors = RowErrors()
+    offerings = iter_valid_offerings(rows, SemesterResolver(cursor), errors, default_semester_id)
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    valid_rows = 0
+    duplicates = 0
+    chunk = []
+
+    def flush():
+        nonlocal duplicates
+        unique = dedupe_offerings(chunk)
+        duplicates += len(chunk) - len(unique)
+        for key, value in upsert_course_offerings(cursor, unique, update_existing).items():
+            counts[key] += value
+        chunk.clear()
+
+    for offering in offerings:
+        valid_rows += 1
+        chunk.append(offering)
+        if len(chunk) >= COURSE_IMPORT_CHUNK_SIZE:
+            flush()
+    if chunk:
+        flush()
+
+    return {
+        **counts,
+        "valid_rows": valid_rows,
+        "duplicates": duplicates,
+        "error_count": errors.count,
+        "errors": errors.reported
+    }
@@ -0,0 +1,225 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pymysql
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the checkout timeout"""
+    pass
+
+
+class ConnectionPool:
+    """
+    Bounded pool of pymysql connections.
+
+    Connections are health-checked on checkout, idle connections above
+    min_size are reaped after max_idle seconds, and callers wait up to
+    checkout_timeout seconds for a free slot when max_size is reached.
+    """
+
+    def __init__(
+        self,
+        connect_kwargs,
+        min_size=2,
+        max_size=10,
+        max_idle=300,
+        checkout_timeout=10,
+        health_check_interval=30
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+
+        self.connect_kwargs = connect_kwargs
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+
+        # Idle connections as (connection, last_used_timestamp), most recently used on the right
+        self._idle = deque()
+        self._in_use = 0
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+
+        # Counters exposed through stats()
+        self._created = 0
+        self._closed = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._timeouts = 0
+        self._failed_health_checks = 0
+
+    def _connect(self):
+        connection = pymysql.connect(**self.connect_kwargs)
+        with self._lock:
+            self._created += 1
+        return connection
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._closed += 1
+
+    def _is_healthy(self, connection, last_used):
+        # Skip the round trip for connections that were used very recently
+        if time.monotonic() - last_used < self.health_check_interval:
+            return connection.open
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _reap_idle_locked(self):
+        """Remove idle connections beyond min_size that exceeded max_idle. Caller holds the lock."""
+        expired = []
+        now = time.monotonic()
+        # The oldest connections sit on the left of the deque
+        while self._idle and len(self._idle) + self._in_use > self.min_size:
+            connection, last_used = self._idle[0]
+            if now - last_used < self.max_idle:
+                break
+            self._idle.popleft()
+            expired.append(connection)
+        return expired
+
+    def fill(self):
+        """Open connections until min_size connections exist"""
+        while True:
+            with self._lock:
+                if len(self._idle) + self._in_use >= self.min_size:
+                    return
+                self._in_use += 1
+            try:
+                connection = self._connect()
+            except Exception:
+                with self._lock:
+                    self._in_use -= 1
+                    self._available.notify()
+                raise
+            self.release(connection)
+
+    def acquire(self):
+        """Check out a healthy connection, waiting up to checkout_timeout for a free slot"""
+        deadline = None
+        wait_started = None
+
+        while True:
+            candidate = None
+            expired = []
+            with self._lock:
+                expired = self._reap_idle_locked()
+                while not self._idle and self._in_use >= self.max_size:
+                    if wait_started is None:
+                        wait_started = time.monotonic()
+                        deadline = wait_started + self.checkout_timeout
+                        self._waits += 1
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        self._wait_time_total += self.checkout_timeout
+                        self._wait_time_max = max(self._wait_time_max, self.checkout_timeout)
+                        raise PoolTimeoutError(
+                            f"Timed out after {self.checkout_timeout}s waiting for a database connection"
+                        )
+                    self._available.wait(remaining)
+
+                if wait_started is not None:
+                    waited = time.monotonic() - wait_started
+                    self._wait_time_total += waited
+                    self._wait_time_max = max(self._wait_time_max, waited)
+                    wait_started = None
+
+                if self._idle:
+                    candidate = self._idle.pop()
+                # Reserve the slot before leaving the lock so concurrent callers respect max_size
+                self._in_use += 1
+                self._checkouts += 1
+
+            for connection in expired:
+                self._close(connection)
+
+            if candidate is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._lock:
+                        self._in_use -= 1
+                        self._checkouts -= 1
+                        self._available.notify()
+                    raise
+
+            connection, last_used = candidate
+            if self._is_healthy(connection, last_used):
+                return connection
+
+            # Stale connection: drop it and retry with the slot released
+            with self._lock:
+                self._failed_health_checks += 1
+                self._in_use -= 1
+                self._checkouts -= 1
+            self._close(connection)
+
+    def release(self, connection):
+        """Return a connection to the pool, discarding it if it is no longer usable"""
+        reusable = connection.open
+        if reusable:
+            try:
+                # Never hand out a connection with a half-finished transaction
+                connection.rollback()
+            except Exception:
+                reusable = False
+
+        with self._lock:
+            self._in_use -= 1
+            if reusable:
+                self._idle.append((connection, time.monotonic()))
+            self._available.notify()
+
+        if not reusable:
+            self._close(connection)
+
+    @contextmanager
+    def connection(self):
+        """Context manager wrapper around acquire/release"""
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def close_all(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle = [connection for connection, _ in self._idle]
+            self._idle.clear()
+        for connection in idle:
+            self._close(connection)
+
+    def stats(self):
+        """Snapshot of pool usage counters"""
+        with self._lock:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "created": self._created,
+                "closed": self._closed,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "failed_health_checks": self._failed_health_checks,
+                "wait_time_total_ms": round(self._wait_time_total * 1000, 2),
+                "wait_time_max_ms": round(self._wait_time_max * 1000, 2),
+                "wait_time_avg_ms": round(self._wait_time_total * 1000 / self._waits, 2) if self._waits else 0.0
+            }
@@ -0,0 +1,341 @@
+"""
+Durable outbound email queue.
+
+Request handlers call enqueue_email(), which only inserts a row into email_outbox.
+EmailOutboxWorker runs on a background thread, claims due rows in batches, delivers
+them over one long-lived SMTP session and reschedules failures with exponential backoff.
+
+SMTP settings come from the environment; SMTP_USERNAME and SMTP_PASSWORD have no
+default, and until they are set the worker sends nothing and leaves mail queued.
+To exercise the worker against a local stand-in server that needs no login:
+
+    python -m aiosmtpd -n -l localhost:1025
+    SMTP_HOST=localhost SMTP_PORT=1025 SMTP_STARTTLS=0 SMTP_AUTH=0 uvicorn main:app
+
+tests/test_email_outbox.py runs the worker against aiosmtpd the same way.
+"""
+import os
+import smtplib
+import socket
+import ssl
+import threading
+import time
+import uuid
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME", "")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
+SMTP_FROM = os.getenv("SMTP_FROM", SMTP_USERNAME or "no-reply@localhost")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") == "1"
+# Set to 0 only for a relay that accepts mail without logging in (e.g. a local aiosmtpd)
+SMTP_AUTH = os.getenv("SMTP_AUTH", "1") == "1"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "10"))
+
+# Worker tuning
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "50"))
+EMAIL_POLL_INTERVAL = float(os.getenv("EMAIL_POLL_INTERVAL_SECONDS", "5"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "6"))
+EMAIL_RETRY_BASE_SECONDS = int(os.getenv("EMAIL_RETRY_BASE_SECONDS", "30"))
+EMAIL_RETRY_MAX_SECONDS = int(os.getenv("EMAIL_RETRY_MAX_SECONDS", "3600"))
+# Close the SMTP session after this long without mail
+SMTP_IDLE_SECONDS = float(os.getenv("SMTP_IDLE_SECONDS", "60"))
+# Rows left in 'sending' longer than this (e.g. the process died mid-batch) are retried
+EMAIL_CLAIM_TIMEOUT_SECONDS = int(os.getenv("EMAIL_CLAIM_TIMEOUT_SECONDS", "300"))
+
+# Errors that will not go away by retrying the same message
+PERMANENT_SMTP_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPNotSupportedError)
+
+
+def enqueue_email(conn, recipient, subject, body_text, body_html=None, commit=True):
+    """Queue an email for the background worker and return the outbox row id"""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO email_outbox (recipient, subject, body_text, body_html, status, next_attempt_at)
+            VALUES (%s, %s, %s, %s, 'pending', NOW())
+            """,
+            (recipient, subject, body_text, body_html)
+        )
+        outbox_id = cursor.lastrowid
+    if commit:
+        conn.commit()
+    email_worker.wake()
+    print(f"Queued email {outbox_id} to {recipient}: {subject}")
+    return outbox_id
+
+
+def build_message(row):
+    message = MIMEMultipart("alternative")
+    message["Subject"] = row['subject']
+    message["From"] = SMTP_FROM
+    message["To"] = row['recipient']
+    message.attach(MIMEText(row['body_text'], "plain"))
+    if row.get('body_html'):
+        message.attach(MIMEText(row['body_html'], "html"))
+    return message
+
+
+def smtp_configured():
+    """False while login is required but SMTP_USERNAME / SMTP_PASSWORD are unset"""
+    return not SMTP_AUTH or bool(SMTP_USERNAME and SMTP_PASSWORD)
+
+
+def retry_delay(attempts):
+    """Seconds to wait before the next attempt after `attempts` failures"""
+    return min(EMAIL_RETRY_BASE_SECONDS * (2 ** (attempts - 1)), EMAIL_RETRY_MAX_SECONDS)
+
+
+class EmailOutboxWorker:
+    """
+    Background thread draining email_outbox.
+
+    Rows are claimed with an UPDATE tagged with this worker's id, so several API
+    processes can share one outbox without sending the same message twice.
+    """
+
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._pool = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+
+        self._smtp = None
+        self._smtp_last_used = 0.0
+
+        # Counters exposed through stats()
+        self._sent = 0
+        self._retried = 0
+        self._failed = 0
+        self._smtp_connections = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._last_error = None
+        self._unconfigured_logged = False
+
+    def start(self, pool):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._pool = pool
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._close_smtp()
+
+    def wake(self):
+        """Deliver newly queued mail now instead of at the next poll"""
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Cleared before the batch so a wake() during delivery is not lost
+            self._wakeup.clear()
+            delivered = 0
+            try:
+                delivered = self.process_batch()
+            except Exception as e:
+                with self._lock:
+                    self._last_error = str(e)
+                print(f"Email outbox worker error: {e}")
+
+            if self._smtp is not None and time.monotonic() - self._smtp_last_used > SMTP_IDLE_SECONDS:
+                self._close_smtp()
+
+            # A full batch means more mail is probably waiting
+            if delivered < EMAIL_BATCH_SIZE:
+                self._wakeup.wait(EMAIL_POLL_INTERVAL)
+
+    def _claim_batch(self, conn):
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE email_outbox
+                SET status = 'sending', claimed_by = %s, claimed_at = NOW()
+                WHERE (status = 'pending' AND next_attempt_at <= NOW())
+                   OR (status = 'sending' AND claimed_at < NOW() - INTERVAL %s SECOND)
+                ORDER BY id
+                LIMIT %s
+                """,
+                (self.worker_id, EMAIL_CLAIM_TIMEOUT_SECONDS, EMAIL_BATCH_SIZE)
+            )
+            conn.commit()
+            if cursor.rowcount == 0:
+                return []
+            cursor.execute(
+                """
+                SELECT id, recipient, subject, body_text, body_html, attempts,
+                       TIMESTAMPDIFF(MICROSECOND, created_at, NOW()) / 1000000 as age_seconds
+                FROM email_outbox
+                WHERE status = 'sending' AND claimed_by = %s
+                ORDER BY id
+                """,
+                (self.worker_id,)
+            )
+            return cursor.fetchall()
+
+    def process_batch(self):
+        """Claim and deliver one batch of due messages; returns how many were claimed"""
+        if self._pool is None:
+            return 0
+        if not smtp_configured():
+            # Leave rows pending rather than burning their attempts on a login that cannot work
+            if not self._unconfigured_logged:
+                print("Email outbox: SMTP_USERNAME/SMTP_PASSWORD are not set; queued mail is kept until they are")
+                self._unconfigured_logged = True
+            with self._lock:
+                self._last_error = "SMTP credentials are not configured"
+            return 0
+        self._unconfigured_logged = False
+
+        with self._pool.connection() as conn:
+            rows = self._claim_batch(conn)
+            if not rows:
+                return 0
+
+            for row in rows:
+                try:
+                    self._deliver(row)
+                except Exception as e:
+                    self._record_failure(conn, row, e)
+                else:
+                    self._record_success(conn, row)
+            return len(rows)
+
+    def _connect_smtp(self):
+        context = ssl.create_default_context()
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        server.ehlo()
+        if SMTP_STARTTLS:
+            server.starttls(context=context)
+            server.ehlo()
+        if SMTP_AUTH:
+            server.login(SMTP_USERNAME, SMTP_PASSWORD)
+        with self._lock:
+            self._smtp_connections += 1
+        return server
+
+    def _close_smtp(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            pass
+        self._smtp = None
+
+    def _deliver(self, row):
+        message = build_message(row).as_string()
+        # Reuse the open session; reconnect once if the server dropped it
+        for attempt in range(2):
+            if self._smtp is None:
+                self._smtp = self._connect_smtp()
+            try:
+                self._smtp.sendmail(SMTP_FROM, [row['recipient']], message)
+                self._smtp_last_used = time.monotonic()
+                return
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                self._smtp = None
+                if attempt == 1:
+                    raise
+
+    def _record_success(self, conn, row):
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE email_outbox
+                SET status = 'sent', sent_at = NOW(), attempts = attempts + 1,
+                    last_error = NULL, claimed_by = NULL
+                WHERE id = %s
+                """,
+                (row['id'],)
+            )
+        conn.commit()
+        latency = float(row['age_seconds'] or 0)
+        with self._lock:
+            self._sent += 1
+            self._latency_total += latency
+            self._latency_max = max(self._latency_max, latency)
+        print(f"Sent email {row['id']} to {row['recipient']}")
+
+    def _record_failure(self, conn, row, error):
+        attempts = row['attempts'] + 1
+        permanent = isinstance(error, PERMANENT_SMTP_ERRORS)
+        if not isinstance(error, (smtplib.SMTPResponseException,) + PERMANENT_SMTP_ERRORS):
+            # Connection level problems invalidate the session for the rest of the batch
+            self._close_smtp()
+
+        with conn.cursor() as cursor:
+            if permanent or attempts >= EMAIL_MAX_ATTEMPTS:
+                cursor.execute(
+                    """
+                    UPDATE email_outbox
+                    SET status = 'failed', attempts = %s, last_error = %s, claimed_by = NULL
+                    WHERE id = %s
+                    """,
+                    (attempts, str(error)[:1000], row['id'])
+                )
+            else:
+                cursor.execute(
+                    """
+                    UPDATE email_outbox
+                    SET status = 'pending', attempts = %s, last_error = %s, claimed_by = NULL,
+                        next_attempt_at = NOW() + INTERVAL %s SECOND
+                    WHERE id = %s
+                    """,
+                    (attempts, str(error)[:1000], retry_delay(attempts), row['id'])
+                )
+        conn.commit()
+
+        with self._lock:
+            self._last_error = str(error)
+            if permanent or attempts >= EMAIL_MAX_ATTEMPTS:
+                self._failed += 1
+            else:
+                self._retried += 1
+        print(f"Error sending email {row['id']} to {row['recipient']} (attempt {attempts}): {error}")
+
+    def stats(self, conn=None):
+        """Delivery counters for this process, plus queue depth when a connection is given"""
+        with self._lock:
+            result = {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "sent": self._sent,
+                "retried": self._retried,
+                "failed": self._failed,
+                "smtp_connections": self._smtp_connections,
+                "delivery_latency_avg_ms": round(self._latency_total * 1000 / self._sent, 2) if self._sent else 0.0,
+                "delivery_latency_max_ms": round(self._latency_max * 1000, 2),
+                "last_error": self._last_error
+            }
+
+        if conn is not None:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT status, COUNT(*) as count,
+                           TIMESTAMPDIFF(SECOND, MIN(created_at), NOW()) as oldest_seconds
+                    FROM email_outbox
+                    WHERE status IN ('pending', 'sending', 'failed')
+                    GROUP BY status
+                    """
+                )
+                rows = {row['status']: row for row in cursor.fetchall()}
+            pending = rows.get('pending')
+            result["queue_depth"] = sum(rows[key]['count'] for key in ('pending', 'sending') if key in rows)
+            result["oldest_pending_seconds"] = pending['oldest_seconds'] if pending else 0
+            result["failed_in_outbox"] = rows['failed']['count'] if 'failed' in rows else 0
+        return result
+
+
+email_worker = EmailOutboxWorker()
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+
+
+class EventSubscription:
+    """One connected client: a bounded queue owned by the event loop serving its stream"""
+
+    def __init__(self, loop, user_id, role, max_queued):
+        self.loop = loop
+        self.user_id = user_id
+        self.role = role
+        self.queue = asyncio.Queue(maxsize=max_queued)
+        # Set when events were dropped because the client fell behind; it must refetch
+        self.overflowed = False
+
+
+class EventHub:
+    """
+    In-process publish/subscribe hub behind GET /api/events.
+
+    publish() may be called from any thread (route handlers run on the worker pool);
+    events are handed to each subscriber's event loop with call_soon_threadsafe.
+    Subscribers are indexed by user id and role so targeted events do not scan
+    every connection.
+    """
+
+    def __init__(self, max_queued=100):
+        self.max_queued = max_queued
+        self._subscribers = set()
+        self._by_user = {}
+        self._by_role = {}
+        self._lock = threading.Lock()
+
+        # Counters exposed through stats()
+        self._published = 0
+        self._delivered = 0
+        self._dropped = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def subscribe(self, user_id, role):
+        """Register a client; must be called from the event loop that will consume the queue"""
+        subscription = EventSubscription(asyncio.get_running_loop(), user_id, role, self.max_queued)
+        with self._lock:
+            self._subscribers.add(subscription)
+            self._by_user.setdefault(user_id, set()).add(subscription)
+            self._by_role.setdefault(role, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+            for index, key in ((self._by_user, subscription.user_id), (self._by_role, subscription.role)):
+                members = index.get(key)
+                if members is not None:
+                    members.discard(subscription)
+                    if not members:
+                        del index[key]
+
+    def publish(self, event_type, data=None, user_ids=None, roles=None, broadcast=False):
+        """
+        Push an event to every subscriber (broadcast) or to the given users and roles.
+        Returns the number of subscriptions the event was handed to.
+        """
+        event = {"type": event_type, "data": data or {}, "published_at": time.monotonic()}
+        with self._lock:
+            if broadcast:
+                targets = set(self._subscribers)
+            else:
+                targets = set()
+                for user_id in user_ids or ():
+                    targets |= self._by_user.get(user_id, set())
+                for role in roles or ():
+                    targets |= self._by_role.get(role, set())
+            self._published += 1
+
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(self._offer, subscription, event)
+            except RuntimeError:
+                # The subscriber's loop is closed; its stream is already gone
+                self.unsubscribe(subscription)
+        return len(targets)
+
+    def _offer(self, subscription, event):
+        try:
+            subscription.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            subscription.overflowed = True
+            with self._lock:
+                self._dropped += 1
+
+    def record_delivery(self, event):
+        """Called by the stream once an event has been written to the client"""
+        latency = time.monotonic() - event["published_at"]
+        with self._lock:
+            self._delivered += 1
+            self._latency_total += latency
+            self._latency_max = max(self._latency_max, latency)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "subscribers_by_role": {role: len(members) for role, members in self._by_role.items()},
+                "users_connected": len(self._by_user),
+                "published": self._published,
+                "delivered": self._delivered,
+                "dropped": self._dropped,
+                "fanout_latency_avg_ms": round(self._latency_total * 1000 / self._delivered, 2) if self._delivered else 0.0,
+                "fanout_latency_max_ms": round(self._latency_max * 1000, 2)
+            }
+
+
+event_hub = EventHub()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Remove duplicate course offerings.
+
+The old course offering import inserted a new row every time a file was
+imported, so a (code, year_and_section, semester_id) key can appear more
+than once. The uq_course_offerings_key migration refuses to run until these
+are gone. Run once, reviewing first:
+
+    cd backend
+    python fix_course_offering_duplicates.py            # list the duplicates
+    python fix_course_offering_duplicates.py --apply    # keep the oldest row of each key
+
+Nothing references course_offerings by id, so only the extra rows are removed.
+Restart the API afterwards to create the unique index.
+"""
+
+import sys
+import os
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Import database connection from main application
+from main import get_db_connection
+
+def fix_course_offering_duplicates(apply=False):
+    """
+    List every duplicated course offering key and, with apply, delete all but
+    the oldest row of each.
+    """
+    try:
+        conn = get_db_connection()
+
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT code, year_and_section, semester_id, COUNT(*) as count, MIN(id) as kept_id
+                FROM course_offerings
+                GROUP BY code, year_and_section, semester_id
+                HAVING COUNT(*) > 1
+                ORDER BY semester_id, code, year_and_section
+                """
+            )
+            duplicates = cursor.fetchall()
+
+            if not duplicates:
+                print("No duplicate course offerings found")
+                return
+
+            print("Duplicated course offerings (the row with the lowest id is kept):")
+            for row in duplicates:
+                print(f"Semester {row['semester_id']}: {row['code']} {row['year_and_section']} "
+                      f"- {row['count']} rows, keeping ID {row['kept_id']}")
+            extra_rows = sum(row['count'] - 1 for row in duplicates)
+
+            if not apply:
+                print(f"\n{extra_rows} rows would be removed. Re-run with --apply to remove them.")
+                return
+
+            cursor.execute(
+                """
+                DELETE newer FROM course_offerings newer
+                JOIN course_offerings older
+                  ON older.code = newer.code
+                 AND older.year_and_section = newer.year_and_section
+                 AND older.semester_id = newer.semester_id
+                 AND older.id < newer.id
+                """
+            )
+            removed = cursor.rowcount
+            conn.commit()
+
+            print(f"\nRemoved {removed} duplicate course offerings")
+
+    except Exception as e:
+        print(f"Error removing duplicate course offerings: {str(e)}")
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+if __name__ == "__main__":
+    fix_course_offering_duplicates(apply="--apply" in sys.argv[1:])
@@ -10,6 +10,15 @@ import traceback
 from typing import Optional, Dict, Any
 from dotenv import load_dotenv
 from fastapi.security import OAuth2PasswordBearer
+from starlette.concurrency import run_in_threadpool
+import anyio.to_thread
+
+from db_pool import ConnectionPool
+from principal_cache import PrincipalCache
+from email_outbox import email_worker
+from notification_store import unread_count_repairer
+from notification_retention import notification_retention
+from schedule_changes import schedule_sync_worker
 
 
 load_dotenv()
@@ -23,7 +32,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
     allow_headers=["*"],
-    expose_headers=["*"],
+    expose_headers=["*", "X-Next-Cursor"],
     max_age=86400,
 )
 
@@ -32,25 +41,85 @@ SECRET_KEY = "your-secret-key"  # In production, use an environment variable
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Size of the thread pool that runs sync route handlers and dependencies (pymysql, bcrypt, SMTP).
+# Requests beyond the pool size queue for a thread instead of blocking the event loop.
+WORKER_THREADS = int(os.getenv("WORKER_THREADS", "40"))
+
+# Cache of users resolved from bearer tokens; routes/users.py invalidates entries on account changes
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+
+principal_cache = PrincipalCache(max_size=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+
 # Database configuration
 DB_HOST = "localhost"
 DB_USER = "root"
 DB_PASSWORD = ""  # Replace with your actual MySQL password
 DB_NAME = "labclass_db"
 
+# Connection pool configuration
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "20"))
+DB_POOL_MAX_IDLE_SECONDS = int(os.getenv("DB_POOL_MAX_IDLE_SECONDS", "300"))
+DB_POOL_CHECKOUT_TIMEOUT = float(os.getenv("DB_POOL_CHECKOUT_TIMEOUT", "10"))
+
+db_pool = ConnectionPool(
+    connect_kwargs={
+        "host": DB_HOST,
+        "user": DB_USER,
+        "password": DB_PASSWORD,
+        "database": DB_NAME,
+        "cursorclass": pymysql.cursors.DictCursor
+    },
+    min_size=DB_POOL_MIN_SIZE,
+    max_size=DB_POOL_MAX_SIZE,
+    max_idle=DB_POOL_MAX_IDLE_SECONDS,
+    checkout_timeout=DB_POOL_CHECKOUT_TIMEOUT
+)
+
+# Per-request state shared between auth_middleware and route dependencies
+class RequestContext:
+    """
+    Holds at most one pooled connection and the resolved user for a single request.
+    The connection is checked out lazily on first use and returned by auth_middleware
+    once the response has been produced.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.token = None
+        self.user = None  # Only set when the user was loaded from the database
+        self._connection = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self._connection = self.pool.acquire()
+        return self._connection
+
+    @property
+    def has_connection(self):
+        return self._connection is not None
+
+    def close(self):
+        if self._connection is not None:
+            connection = self._connection
+            self._connection = None
+            self.pool.release(connection)
+
 # Database connection
-def get_db_connection():
-    connection = pymysql.connect(
-        host=DB_HOST,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        database=DB_NAME,
-        cursorclass=pymysql.cursors.DictCursor
-    )
+def get_db_connection(request: Request = None):
+    context = getattr(request.state, 'context', None) if request is not None else None
+    if context is not None:
+        # Reuse the connection held by the request context; auth_middleware releases it
+        yield context.connection
+        return
+
+    connection = db_pool.acquire()
     try:
         yield connection
     finally:
-        connection.close()
+        db_pool.release(connection)
 
 # User model
 class User:
@@ -80,6 +149,25 @@ def get_password_hash(password):
         print(f"Using fallback simple hash: {simple_hash[:10]}...")
         return simple_hash
 
+def get_user_by_id(conn, user_id: str):
+    """Load a user row by primary key and wrap it in a User, or return None"""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
+        user_data = cursor.fetchone()
+        
+    if user_data is None:
+        return None
+        
+    return User(
+        id=user_data["id"],
+        full_name=user_data["full_name"],
+        email=user_data["email"],
+        role=user_data["role"],
+        is_approved=user_data["is_approved"],
+        requires_approval=user_data["requires_approval"],
+        is_active=user_data.get("is_active", True)
+    )
+
 def get_user(conn, username_or_email: str):
     with conn.cursor() as cursor:
         cursor.execute(
@@ -120,8 +208,27 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def resolve_token_user(token: str, get_conn):
+    """
+    Resolve a JWT to a User, serving repeat tokens from principal_cache.
+    get_conn is only called on a cache miss. Raises jwt.PyJWTError for invalid tokens.
+    """
+    user = principal_cache.get(token)
+    if user is not None:
+        return user
+    
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    user_id = payload.get("sub")
+    if user_id is None:
+        return None
+    
+    user = get_user_by_id(get_conn(), user_id)
+    if user is not None:
+        principal_cache.put(token, user, payload.get("exp"))
+    return user
+
 # Dummy user for bypassing authentication
-async def get_current_user():
+def get_current_user():
     return User(
         id="system",
         full_name="System User",
@@ -135,7 +242,8 @@ async def get_current_user():
 # Proper JWT token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/token")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), conn = Depends(get_db_connection), request: Request = None):
+# A plain def so FastAPI resolves it on the worker thread pool, off the event loop
+def get_current_user(token: str = Depends(oauth2_scheme), conn = Depends(get_db_connection), request: Request = None):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -168,19 +276,9 @@ async def get_current_user(token: str = Depends(oauth2_scheme), conn = Depends(g
         # Try to validate that this user exists in the database
         if conn:
             try:
-                with conn.cursor() as cursor:
-                    cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
-                    user_data = cursor.fetchone()
-                    if user_data:
-                        return User(
-                            id=user_data["id"],
-                            full_name=user_data["full_name"],
-                            email=user_data["email"],
-                            role=user_data["role"],
-                            is_approved=user_data["is_approved"],
-                            requires_approval=user_data["requires_approval"],
-                            is_active=user_data.get("is_active", True)
-                        )
+                user = get_user_by_id(conn, user_id)
+                if user:
+                    return user
             except Exception as e:
                 print(f"Error validating fallback token user: {str(e)}")
         
@@ -196,38 +294,47 @@ async def get_current_user(token: str = Depends(oauth2_scheme), conn = Depends(g
             is_active=True
         )
     
+    # Reuse the user auth_middleware already resolved for this token
+    context = getattr(request.state, 'context', None) if request is not None else None
+    if context is not None and context.user is not None and context.token == token:
+        return context.user
+    
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
+        user = resolve_token_user(token, lambda: conn)
     except jwt.PyJWTError:
         raise credentials_exception
         
-    # Get user from database
-    with conn.cursor() as cursor:
-        cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
-        user_data = cursor.fetchone()
-        
-    if user_data is None:
+    if user is None:
         raise credentials_exception
         
-    return User(
-        id=user_data["id"],
-        full_name=user_data["full_name"],
-        email=user_data["email"],
-        role=user_data["role"],
-        is_approved=user_data["is_approved"],
-        requires_approval=user_data["requires_approval"],
-        is_active=user_data.get("is_active", True)
-    )
+    return user
 
-async def get_current_active_user():
-    return await get_current_user()
+def get_current_active_user():
+    return get_current_user()
+
+# Operations endpoints that rewrite counters or delete data are System Administrator only
+def get_current_admin_user(current_user = Depends(get_current_user)):
+    if current_user.role != "System Administrator" or not current_user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="System Administrator access required"
+        )
+    return current_user
 
 # Authentication middleware to populate request.state.user
 @app.middleware("http")
 async def auth_middleware(request: Request, call_next):
+    # One context per request: a lazily acquired pooled connection plus the resolved user
+    context = RequestContext(db_pool)
+    request.state.context = context
+    try:
+        return await resolve_request_user(request, call_next, context)
+    finally:
+        if context.has_connection:
+            # release() rolls back, which is a round trip to MySQL
+            await run_in_threadpool(context.close)
+
+async def resolve_request_user(request: Request, call_next, context: RequestContext):
     # Skip authentication for login/token endpoints
     if request.url.path in ["/api/token", "/api/login", "/api/signup", "/api/forgot-password", "/api/reset-password", "/api/verify-reset-token", "/"]:
         return await call_next(request)
@@ -272,37 +379,14 @@ async def auth_middleware(request: Request, call_next):
                 print(f"Fallback token handling error: {str(e)}")
         
         try:
-            # Decode JWT token
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            user_id = payload.get("sub")
-            
-            # Get user from database
-            conn = pymysql.connect(
-                host=DB_HOST,
-                user=DB_USER,
-                password=DB_PASSWORD,
-                database=DB_NAME,
-                cursorclass=pymysql.cursors.DictCursor
-            )
-            try:
-                with conn.cursor() as cursor:
-                    cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
-                    user_data = cursor.fetchone()
-                    
-                if user_data:
-                    # Create user object and set in request state
-                    user = User(
-                        id=user_data["id"],
-                        full_name=user_data["full_name"],
-                        email=user_data["email"],
-                        role=user_data["role"],
-                        is_approved=user_data["is_approved"],
-                        requires_approval=user_data["requires_approval"],
-                        is_active=user_data.get("is_active", True)
-                    )
-                    request.state.user = user
-            finally:
-                conn.close()
+            # Decode JWT token, or reuse the cached user; on a miss the user is loaded
+            # on the connection the route dependencies will reuse. The pool checkout and
+            # query block, so they run on the worker thread pool rather than the event loop.
+            user = await run_in_threadpool(resolve_token_user, token, lambda: context.connection)
+            if user:
+                context.token = token
+                context.user = user
+                request.state.user = user
         except Exception as e:
             print(f"Auth middleware error: {str(e)}")
             # Continue without setting user in state
@@ -319,6 +403,7 @@ from routes.schedules import router as schedules_router
 from routes.course_offerings import router as course_offerings_router
 from routes.notifications import router as notifications_router
 from routes.system_settings import router as system_settings_router
+from routes.events import router as events_router
 
 # Include routers
 app.include_router(auth_router, prefix="/api")
@@ -330,12 +415,121 @@ app.include_router(schedules_router, prefix="/api")
 app.include_router(course_offerings_router, prefix="/api")
 app.include_router(notifications_router, prefix="/api")
 app.include_router(system_settings_router, prefix="/api")
+app.include_router(events_router, prefix="/api")
 
 # Root endpoint
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Lab Class API"}
 
+# Connection pool statistics (in use, idle, waits, wait time)
+@app.get("/api/db-pool/stats")
+def get_db_pool_stats(current_user = Depends(get_current_user)):
+    return db_pool.stats()
+
+# Principal cache statistics (hits, misses, evictions, invalidations)
+@app.get("/api/principal-cache/stats")
+def get_principal_cache_stats(current_user = Depends(get_current_user)):
+    return principal_cache.stats()
+
+@app.on_event("startup")
+async def startup_size_worker_threads():
+    anyio.to_thread.current_default_thread_limiter().total_tokens = WORKER_THREADS
+    print(f"Worker thread pool size: {WORKER_THREADS}")
+
+# Outbound email queue depth, delivery counters and latency
+@app.get("/api/email-outbox/stats")
+def get_email_outbox_stats(current_user = Depends(get_current_user)):
+    with db_pool.connection() as conn:
+        return email_worker.stats(conn)
+
+# Unread counter consistency repair: last runs, and an on-demand run
+@app.get("/api/notification-counters/stats")
+def get_notification_counter_stats(current_user = Depends(get_current_user)):
+    return unread_count_repairer.stats()
+
+@app.post("/api/notification-counters/repair")
+def repair_notification_counters(current_user = Depends(get_current_admin_user)):
+    repaired = unread_count_repairer.run_once()
+    return {"repaired": len(repaired), "user_ids": repaired}
+
+# Notification retention: configuration, rows reclaimed and run time, and an on-demand run
+@app.get("/api/notification-retention/stats")
+def get_notification_retention_stats(current_user = Depends(get_current_user)):
+    return notification_retention.stats()
+
+@app.post("/api/notification-retention/run")
+def run_notification_retention(current_user = Depends(get_current_admin_user)):
+    with db_pool.connection() as conn:
+        return notification_retention.run_once(conn)
+
+# Event-driven Supabase schedule sync: events consumed, rows pushed, last pass
+@app.get("/api/schedule-sync/stats")
+def get_schedule_sync_stats(current_user = Depends(get_current_user)):
+    return schedule_sync_worker.stats()
+
+@app.on_event("startup")
+async def startup_fill_db_pool():
+    try:
+        db_pool.fill()
+        print(f"Database pool ready: {db_pool.stats()}")
+    except Exception as e:
+        print(f"Error pre-filling database pool: {e}")
+
+@app.on_event("startup")
+async def startup_apply_migrations():
+    print("Applying schema migrations...")
+    try:
+        from schema_migrations import apply_migrations
+        with db_pool.connection() as conn:
+            apply_migrations(conn)
+        print("Schema migrations completed")
+    except Exception as e:
+        print(f"Error applying schema migrations: {e}")
+
+@app.on_event("startup")
+async def startup_email_worker():
+    email_worker.start(db_pool)
+    print(f"Email outbox worker started: {email_worker.worker_id}")
+
+@app.on_event("shutdown")
+async def shutdown_email_worker():
+    email_worker.stop()
+
+@app.on_event("startup")
+async def startup_unread_count_repairer():
+    unread_count_repairer.start(db_pool)
+    print(f"Unread count repair every {unread_count_repairer.interval:.0f}s")
+
+@app.on_event("shutdown")
+async def shutdown_unread_count_repairer():
+    unread_count_repairer.stop()
+
+@app.on_event("startup")
+async def startup_notification_retention():
+    notification_retention.start(db_pool)
+    print(
+        f"Notification retention every {notification_retention.interval:.0f}s "
+        f"({notification_retention.max_age_days} days, {notification_retention.max_per_user} per user)"
+    )
+
+@app.on_event("shutdown")
+async def shutdown_notification_retention():
+    notification_retention.stop()
+
+@app.on_event("startup")
+async def startup_schedule_sync_worker():
+    schedule_sync_worker.start(db_pool)
+    print("Schedule sync worker started")
+
+@app.on_event("shutdown")
+async def shutdown_schedule_sync_worker():
+    schedule_sync_worker.stop()
+
+@app.on_event("shutdown")
+async def shutdown_close_db_pool():
+    db_pool.close_all()
+
 @app.on_event("startup")
 async def startup_sync_instructors():
     print("Running startup sync_instructors...")
@@ -347,9 +541,8 @@ async def startup_sync_instructors():
         spec.loader.exec_module(sync_module)
         
         # Run the sync function
-        conn = next(get_db_connection())
-        sync_module.sync_instructors_with_users(conn)
-        conn.close()
+        with db_pool.connection() as conn:
+            sync_module.sync_instructors_with_users(conn)
         print("Completed startup sync_instructors")
     except Exception as e:
         print(f"Error in startup sync_instructors: {e}")
@@ -359,9 +552,7 @@ async def ensure_system_settings():
     """Ensure that required system settings are present in the database"""
     print("Checking system settings...")
     try:
-        conn = next(get_db_connection())
-        
-        with conn.cursor() as cursor:
+        with db_pool.connection() as conn, conn.cursor() as cursor:
             # Check if current_display_semester_id exists
             cursor.execute(
                 "SELECT COUNT(*) as count FROM system_settings WHERE setting_key = 'current_display_semester_id'"
@@ -392,7 +583,6 @@ async def ensure_system_settings():
             else:
                 print("current_display_semester_id setting already exists")
         
-        conn.close()
         print("System settings check completed")
     except Exception as e:
         print(f"Error ensuring system settings: {e}")
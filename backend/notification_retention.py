@@ -0,0 +1,295 @@
+"""
+Retention for notifications and user_notifications.
+
+Each run, in small batches that commit separately so no lock is held for long:
+
+1. inbox rows whose notification is older than NOTIFICATION_RETENTION_DAYS are
+   removed;
+2. inbox rows beyond the newest NOTIFICATION_MAX_PER_USER of each user are
+   removed; rows of global notifications are not counted or removed here, as
+   they record that a still-live global was read or cleared and dropping one
+   would bring it back unread (they go with the global in step 1 or 3);
+3. global notifications older than the retention age and notifications left
+   without recipients are deleted.
+
+Before anything is deleted it is summarized into notification_archive: one row
+per notification with its content and how many recipients had and had read it,
+instead of one row per recipient. Run this file directly for a one-off pass:
+
+    cd backend
+    python notification_retention.py
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from notification_store import delete_inbox_rows, reset_global_seen
+
+# Database configuration (used when run as a script)
+DB_HOST = "localhost"
+DB_USER = "root"
+DB_PASSWORD = ""
+DB_NAME = "labclass_db"
+
+# Notifications without recipients are kept this long so an in-flight fan-out is not raced
+ORPHAN_GRACE_HOURS = 24
+
+
+def _placeholders(values):
+    return ", ".join(["%s"] * len(values))
+
+
+def archive_inbox_rows(cursor, row_ids):
+    """Add the recipients in row_ids to their notifications' archive rows"""
+    placeholders = _placeholders(row_ids)
+    cursor.execute(
+        f"""
+        INSERT INTO notification_archive
+            (notification_id, title, message, type, related_to, related_id, is_global,
+             created_at, created_by, recipients, read_recipients)
+        SELECT n.id, n.title, n.message, n.type, n.related_to, n.related_id, n.is_global,
+               n.created_at, n.created_by, c.recipients, c.read_recipients
+        FROM notifications n
+        JOIN (
+            SELECT notification_id, COUNT(*) as recipients, SUM(is_read) as read_recipients
+            FROM user_notifications
+            WHERE id IN ({placeholders})
+            GROUP BY notification_id
+        ) c ON c.notification_id = n.id
+        ON DUPLICATE KEY UPDATE
+            recipients = recipients + VALUES(recipients),
+            read_recipients = read_recipients + VALUES(read_recipients),
+            archived_at = NOW()
+        """,
+        list(row_ids)
+    )
+
+
+def archive_notifications(cursor, notification_ids):
+    """Archive notifications that are about to be deleted; existing archive rows are kept"""
+    placeholders = _placeholders(notification_ids)
+    cursor.execute(
+        f"""
+        INSERT INTO notification_archive
+            (notification_id, title, message, type, related_to, related_id, is_global,
+             created_at, created_by, recipients, read_recipients)
+        SELECT n.id, n.title, n.message, n.type, n.related_to, n.related_id, n.is_global,
+               n.created_at, n.created_by, 0, 0
+        FROM notifications n
+        WHERE n.id IN ({placeholders})
+        ON DUPLICATE KEY UPDATE archived_at = NOW()
+        """,
+        list(notification_ids)
+    )
+
+
+class NotificationRetentionJob:
+    """Background thread applying the retention policy every interval seconds"""
+
+    def __init__(self):
+        self.max_age_days = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "180"))
+        self.max_per_user = int(os.getenv("NOTIFICATION_MAX_PER_USER", "500"))
+        self.batch_size = int(os.getenv("NOTIFICATION_RETENTION_BATCH", "500"))
+        self.interval = float(os.getenv("NOTIFICATION_RETENTION_INTERVAL_SECONDS", "21600"))
+        self._pool = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+        # Counters exposed through stats()
+        self._runs = 0
+        self._rows_reclaimed = {"aged": 0, "over_limit": 0, "notifications": 0}
+        self._last_run = None
+        self._last_error = None
+
+    def start(self, pool):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._pool = pool
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="notification-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                with self._pool.connection() as conn:
+                    self.run_once(conn)
+            except Exception as e:
+                with self._lock:
+                    self._last_error = str(e)
+                print(f"Notification retention error: {e}")
+
+    def _remove_rows(self, conn, row_ids):
+        with conn.cursor() as cursor:
+            archive_inbox_rows(cursor, row_ids)
+            removed = delete_inbox_rows(cursor, row_ids)
+        conn.commit()
+        return removed
+
+    def purge_aged_rows(self, conn):
+        removed = 0
+        while not self._stop.is_set():
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT un.id
+                    FROM user_notifications un
+                    JOIN notifications n ON n.id = un.notification_id
+                    WHERE n.created_at < NOW() - INTERVAL %s DAY
+                    LIMIT %s
+                    """,
+                    (self.max_age_days, self.batch_size)
+                )
+                row_ids = [row['id'] for row in cursor.fetchall()]
+            if not row_ids:
+                break
+            removed += self._remove_rows(conn, row_ids)
+        return removed
+
+    def purge_over_limit_rows(self, conn):
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT un.user_id FROM user_notifications un
+                JOIN notifications n ON n.id = un.notification_id
+                WHERE n.is_global = FALSE
+                GROUP BY un.user_id
+                HAVING COUNT(*) > %s
+                """,
+                (self.max_per_user,)
+            )
+            user_ids = [row['user_id'] for row in cursor.fetchall()]
+        conn.commit()
+
+        removed = 0
+        for user_id in user_ids:
+            while not self._stop.is_set():
+                # Everything past the newest max_per_user targeted rows, oldest notifications first
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        """
+                        SELECT id FROM (
+                            SELECT un.id, un.notification_id FROM user_notifications un
+                            JOIN notifications n ON n.id = un.notification_id
+                            WHERE un.user_id = %s AND n.is_global = FALSE
+                            ORDER BY un.notification_id DESC
+                            LIMIT 18446744073709551615 OFFSET %s
+                        ) extra
+                        ORDER BY notification_id ASC
+                        LIMIT %s
+                        """,
+                        (user_id, self.max_per_user, self.batch_size)
+                    )
+                    row_ids = [row['id'] for row in cursor.fetchall()]
+                if not row_ids:
+                    break
+                removed += self._remove_rows(conn, row_ids)
+        return removed
+
+    def purge_notifications(self, conn):
+        """Delete aged global notifications and notifications nobody receives any more"""
+        removed = 0
+        while not self._stop.is_set():
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT n.id, n.is_global FROM notifications n
+                    WHERE n.is_global = TRUE AND n.created_at < NOW() - INTERVAL %s DAY
+                    UNION
+                    SELECT n.id, n.is_global FROM notifications n
+                    WHERE n.is_global = FALSE
+                      AND n.created_at < NOW() - INTERVAL %s HOUR
+                      AND NOT EXISTS (SELECT 1 FROM user_notifications un WHERE un.notification_id = n.id)
+                    LIMIT %s
+                    """,
+                    (self.max_age_days, ORPHAN_GRACE_HOURS, self.batch_size)
+                )
+                rows = cursor.fetchall()
+                notification_ids = [row['id'] for row in rows]
+                global_ids = [row['id'] for row in rows if row['is_global']]
+                if not notification_ids:
+                    break
+
+                placeholders = _placeholders(notification_ids)
+                # Exception rows of aged global notifications go through the counters first
+                cursor.execute(
+                    f"SELECT id FROM user_notifications WHERE notification_id IN ({placeholders})",
+                    notification_ids
+                )
+                row_ids = [row['id'] for row in cursor.fetchall()]
+                if row_ids:
+                    archive_inbox_rows(cursor, row_ids)
+                    delete_inbox_rows(cursor, row_ids)
+
+                archive_notifications(cursor, notification_ids)
+                cursor.execute(f"DELETE FROM notifications WHERE id IN ({placeholders})", notification_ids)
+                removed += cursor.rowcount
+                if global_ids:
+                    # Users who may have counted these as unread recount on their next request
+                    reset_global_seen(cursor, max(global_ids))
+            conn.commit()
+        return removed
+
+    def run_once(self, conn):
+        """Apply the whole policy once and return what was reclaimed"""
+        started = time.perf_counter()
+        reclaimed = {
+            "aged": self.purge_aged_rows(conn),
+            "over_limit": self.purge_over_limit_rows(conn),
+            "notifications": self.purge_notifications(conn)
+        }
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self._runs += 1
+            for key, value in reclaimed.items():
+                self._rows_reclaimed[key] += value
+            self._last_run = {
+                "finished_at": time.time(),
+                "duration_ms": round(elapsed * 1000, 1),
+                "reclaimed": reclaimed
+            }
+            self._last_error = None
+        print(f"Notification retention reclaimed {reclaimed} in {elapsed:.2f}s")
+        return self._last_run
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_age_days": self.max_age_days,
+                "max_per_user": self.max_per_user,
+                "batch_size": self.batch_size,
+                "interval_seconds": self.interval,
+                "runs": self._runs,
+                "rows_reclaimed": dict(self._rows_reclaimed),
+                "last_run": self._last_run,
+                "last_error": self._last_error
+            }
+
+
+notification_retention = NotificationRetentionJob()
+
+
+if __name__ == "__main__":
+    import pymysql
+
+    connection = pymysql.connect(
+        host=DB_HOST,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME,
+        cursorclass=pymysql.cursors.DictCursor
+    )
+    try:
+        print(notification_retention.run_once(connection))
+    finally:
+        connection.close()
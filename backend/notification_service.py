@@ -0,0 +1,213 @@
+"""
+Role-scoped inbox operations behind the notification endpoints.
+
+/notifications serves the requesting user's inbox, while /dean-notifications and
+/acad-coor-notifications serve the inbox of the user holding that role. Each
+family is an InboxScope: the owner is resolved once per request (role owners
+are cached) and the same notification_store query runs for every family, so a
+request costs the operation itself plus at most one owner lookup.
+"""
+import threading
+import time
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+from event_hub import event_hub
+from notification_store import clear_all, count_unread, list_notifications, mark_all_read, mark_read
+
+# Notification list pages; clients pass the X-Next-Cursor value back as ?after=
+NOTIFICATION_PAGE_SIZE = 50
+MAX_NOTIFICATION_PAGE_SIZE = 200
+
+
+class RoleOwnerCache:
+    """
+    role -> id of the user holding it, kept for ttl seconds. Role inboxes are
+    looked up on every sidebar refresh; users.py invalidates the cache whenever
+    a role can change hands.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._owners = {}
+        self._lock = threading.Lock()
+
+    def get(self, cursor, role):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._owners.get(role)
+            if entry is not None and entry[1] > now:
+                return entry[0]
+
+        cursor.execute("SELECT id FROM users WHERE role = %s LIMIT 1", (role,))
+        owner = cursor.fetchone()
+        if owner is None:
+            return None
+        with self._lock:
+            self._owners[role] = (owner['id'], now + self.ttl)
+        return owner['id']
+
+    def invalidate(self):
+        with self._lock:
+            self._owners.clear()
+
+
+role_owners = RoleOwnerCache()
+
+
+class InboxScope:
+    """One notification endpoint family: whose inbox it serves and how messages name it"""
+
+    def __init__(self, role=None, label=None):
+        self.role = role
+        self.label = label
+
+    @property
+    def noun(self):
+        """'notifications' or e.g. 'Dean notifications'"""
+        return f"{self.label} notifications" if self.label else "notifications"
+
+    @property
+    def owner_name(self):
+        return self.label or "this user"
+
+    def resolve_owner(self, cursor, request=None):
+        """User id whose inbox this request operates on"""
+        if self.role is not None:
+            owner_id = role_owners.get(cursor, self.role)
+            if owner_id is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"No {self.label} user found in the database"
+                )
+            return owner_id
+
+        # The requesting user, or the user_id query parameter / X-User-ID header for fallback tokens
+        user = getattr(request.state, 'user', None)
+        if user is not None and hasattr(user, 'id'):
+            return user.id
+        user_id = request.query_params.get('user_id') or request.headers.get('X-User-ID')
+        if not user_id:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User ID is required"
+            )
+        return user_id
+
+    def _publish_change(self, owner_id, change):
+        """Tell the owner's open clients (sidebar badges) that their unread count moved"""
+        event_hub.publish("notification", {"change": change}, user_ids=[owner_id])
+
+    def _fail(self, conn, action, error):
+        conn.rollback()
+        print(f"Error {action} {self.noun}: {str(error)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error {action} {self.noun}"
+        )
+
+    def list_page(self, conn, request, filter_type, sort_by, limit, after):
+        """Return (notifications, next_cursor) for one page of the inbox"""
+        try:
+            limit = page_limit(limit)
+            keyset = parse_page_cursor(after)
+            with conn.cursor() as cursor:
+                owner_id = self.resolve_owner(cursor, request)
+                notifications = list_notifications(cursor, owner_id, filter_type, sort_by, limit, keyset)
+            return notifications, next_page_cursor(notifications, limit)
+        except HTTPException:
+            raise
+        except Exception as e:
+            self._fail(conn, "fetching", e)
+
+    def unread_count(self, conn, request=None):
+        try:
+            with conn.cursor() as cursor:
+                owner_id = self.resolve_owner(cursor, request)
+                count = count_unread(cursor, owner_id)
+            # count_unread may have seeded the owner's global counter
+            conn.commit()
+            return {"count": count}
+        except HTTPException:
+            raise
+        except Exception as e:
+            self._fail(conn, "counting unread", e)
+
+    def mark_read(self, conn, notification_id, request=None):
+        try:
+            with conn.cursor() as cursor:
+                owner_id = self.resolve_owner(cursor, request)
+                # Materialized rows are updated; a global notification gets a read exception row
+                if not mark_read(cursor, owner_id, notification_id):
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail=f"Notification not found for {self.owner_name}"
+                    )
+            conn.commit()
+            self._publish_change(owner_id, "read")
+            message = f"{self.label} notification marked as read" if self.label else "Notification marked as read"
+            return {"message": message}
+        except HTTPException:
+            raise
+        except Exception as e:
+            self._fail(conn, "marking as read", e)
+
+    def mark_all_read(self, conn, request=None):
+        try:
+            with conn.cursor() as cursor:
+                owner_id = self.resolve_owner(cursor, request)
+                updated_count = mark_all_read(cursor, owner_id)
+            conn.commit()
+            self._publish_change(owner_id, "read_all")
+            return {"message": f"Marked {updated_count} {self.noun} as read"}
+        except HTTPException:
+            raise
+        except Exception as e:
+            self._fail(conn, "marking all as read", e)
+
+    def clear(self, conn, request=None):
+        try:
+            with conn.cursor() as cursor:
+                owner_id = self.resolve_owner(cursor, request)
+                # Only this inbox is cleared; the notifications themselves stay
+                deleted_count = clear_all(cursor, owner_id)
+            conn.commit()
+            self._publish_change(owner_id, "cleared")
+            return {
+                "message": f"Cleared {deleted_count} notifications for {self.label or 'user'}",
+                "count": deleted_count
+            }
+        except HTTPException:
+            raise
+        except Exception as e:
+            self._fail(conn, "clearing", e)
+
+
+USER_INBOX = InboxScope()
+DEAN_INBOX = InboxScope(role="Dean", label="Dean")
+ACAD_COOR_INBOX = InboxScope(role="Academic Coordinator", label="Academic Coordinator")
+
+
+def parse_page_cursor(after: Optional[str]):
+    """Decode a cursor (the last notification id of the previous page)"""
+    if not after:
+        return None
+    try:
+        return int(after)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def page_limit(limit: int):
+    return max(1, min(limit, MAX_NOTIFICATION_PAGE_SIZE))
+
+
+def next_page_cursor(notifications, limit):
+    """A full page may have more after it; point the client at its last row"""
+    if len(notifications) < limit:
+        return None
+    return str(notifications[-1]['id'])
@@ -0,0 +1,481 @@
+"""
+Per-user notification queries over the hybrid inbox model.
+
+Targeted notifications are materialized as user_notifications rows. Global
+notifications are stored once in notifications and merged in at read time:
+
+- notification_read_state.global_read_up_to marks every global notification with
+  an id at or below it as read for that user ("mark all as read");
+- notification_read_state.global_cleared_up_to hides every global notification
+  with an id at or below it ("clear all");
+- a user_notifications row for a global notification is an exception row that
+  overrides both watermarks (e.g. a single global notification marked read, or
+  rows materialized before global notifications stopped being fanned out).
+
+A user only sees global notifications created after their account was, and only
+while approved and active (the audience the old per-user fan-out wrote rows for).
+
+notification_read_state.unread_count is a maintained counter of the user's
+unread user_notifications rows. Every write below adjusts it in the same
+transaction as the rows it changes, so unread counts do not scan the inbox;
+repair_unread_counts() recomputes it to correct drift from writers that bypass
+this module.
+
+Unread globals are counted the same way: notification_global_counter.posted
+goes up by one per global notification (record_global_posted), and
+notification_read_state.global_posted_seen is the value of it the user has
+accounted for. Marking all read or clearing sets it to the current value,
+marking one global read adds one, and the difference is the user's unread
+globals. A NULL global_posted_seen (new users, or after the retention job
+deleted globals) is seeded from one exact count on the next count_unread.
+"""
+import os
+import threading
+import time
+
+# Global notifications visible to a user that have no exception row.
+# Parameters: user_id, user_id
+VISIBLE_GLOBALS_SQL = """
+    FROM notifications n
+    JOIN users u ON u.id = %s
+    LEFT JOIN notification_read_state rs ON rs.user_id = u.id
+    WHERE n.is_global = TRUE
+      AND u.is_approved = TRUE AND u.is_active = TRUE
+      AND n.created_at >= u.date_created
+      AND n.id > COALESCE(rs.global_cleared_up_to, 0)
+      AND NOT EXISTS (
+          SELECT 1 FROM user_notifications ex
+          WHERE ex.user_id = %s AND ex.notification_id = n.id
+      )
+"""
+
+
+def _visible_globals_params(user_id):
+    return [user_id, user_id]
+
+
+# Columns the notification pages render; keeps wide rows out of list responses
+NOTIFICATION_COLUMNS = "n.id, n.title, n.message, n.type, n.related_to, n.related_id, n.created_at"
+
+
+def list_notifications(cursor, user_id, filter_type=None, sort_by="newest", limit=50, after=None):
+    """
+    One page of materialized and global notifications for user_id, newest first
+    unless sort_by is 'oldest'. after is the id of the last row of the previous
+    page; notification ids grow with created_at, so they order the inbox alone.
+
+    Each branch of the merge is an index range read in id order, limited before
+    the UNION: unread and read rows separately on idx_user_notifications_inbox
+    (user_id, is_read, notification_id), globals on idx_notifications_global
+    (is_global, id). A page costs about three page sizes of index entries,
+    however large the inbox is.
+    """
+    order = "ASC" if sort_by == "oldest" else "DESC"
+    op = ">" if order == "ASC" else "<"
+
+    branches = []
+    for is_read in (False, True):
+        query = f"""
+            SELECT {NOTIFICATION_COLUMNS}, un.is_read, un.read_at
+            FROM user_notifications un
+            JOIN notifications n ON n.id = un.notification_id
+            WHERE un.user_id = %s AND un.is_read = %s
+        """
+        params = [user_id, is_read]
+        if filter_type and filter_type != "all":
+            query += " AND n.related_to = %s"
+            params.append(filter_type)
+        if after is not None:
+            query += f" AND un.notification_id {op} %s"
+            params.append(after)
+        query += f" ORDER BY un.notification_id {order} LIMIT %s"
+        branches.append((query, params + [limit]))
+
+    globals_query = f"""
+        SELECT {NOTIFICATION_COLUMNS},
+               n.id <= COALESCE(rs.global_read_up_to, 0) as is_read,
+               CASE WHEN n.id <= COALESCE(rs.global_read_up_to, 0) THEN rs.global_read_at END as read_at
+    """ + VISIBLE_GLOBALS_SQL
+    globals_params = _visible_globals_params(user_id)
+
+    if filter_type and filter_type != "all":
+        globals_query += " AND n.related_to = %s"
+        globals_params.append(filter_type)
+    if after is not None:
+        globals_query += f" AND n.id {op} %s"
+        globals_params.append(after)
+    globals_query += f" ORDER BY n.id {order} LIMIT %s"
+    branches.append((globals_query, globals_params + [limit]))
+
+    cursor.execute(
+        " UNION ALL ".join(f"({query})" for query, _ in branches) + f" ORDER BY id {order} LIMIT %s",
+        [param for _, params in branches for param in params] + [limit]
+    )
+    notifications = cursor.fetchall()
+    for notification in notifications:
+        notification['is_read'] = bool(notification['is_read'])
+    return notifications
+
+
+def count_unread(cursor, user_id):
+    """
+    Unread count from the maintained counters: one primary key read of the user,
+    their read state and the global counter. Writes the seed when the user's
+    global_posted_seen is unset, so the caller commits.
+    """
+    cursor.execute(
+        """
+        SELECT u.date_created, u.is_approved AND u.is_active as receives_globals,
+               COALESCE(rs.unread_count, 0) as unread_count, rs.global_posted_seen,
+               GREATEST(COALESCE(rs.global_read_up_to, 0), COALESCE(rs.global_cleared_up_to, 0)) as watermark,
+               COALESCE(g.posted, 0) as global_posted
+        FROM users u
+        LEFT JOIN notification_read_state rs ON rs.user_id = u.id
+        LEFT JOIN notification_global_counter g ON g.id = 1
+        WHERE u.id = %s
+        """,
+        (user_id,)
+    )
+    state = cursor.fetchone()
+    if state is None:
+        return 0
+    if not state['receives_globals']:
+        return state['unread_count']
+    if state['global_posted_seen'] is not None:
+        return state['unread_count'] + max(state['global_posted'] - state['global_posted_seen'], 0)
+
+    unread_globals = _count_unread_globals(cursor, user_id, state['watermark'], state['date_created'])
+    cursor.execute(
+        """
+        INSERT INTO notification_read_state (user_id, global_posted_seen) VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE global_posted_seen = VALUES(global_posted_seen)
+        """,
+        (user_id, state['global_posted'] - unread_globals)
+    )
+    return state['unread_count'] + unread_globals
+
+
+def _count_unread_globals(cursor, user_id, watermark, date_created):
+    """Exact count of unread visible globals, used to seed global_posted_seen"""
+    cursor.execute(
+        """
+        SELECT COUNT(*) as count
+        FROM notifications n
+        WHERE n.is_global = TRUE
+          AND n.id > %s
+          AND n.created_at >= %s
+          AND NOT EXISTS (
+              SELECT 1 FROM user_notifications ex
+              WHERE ex.user_id = %s AND ex.notification_id = n.id
+          )
+        """,
+        (watermark, date_created, user_id)
+    )
+    return cursor.fetchone()['count']
+
+
+def record_global_posted(cursor):
+    """Count one new global notification; call in the transaction that inserts it"""
+    cursor.execute("UPDATE notification_global_counter SET posted = posted + 1 WHERE id = 1")
+
+
+def _global_posted(cursor):
+    cursor.execute("SELECT posted FROM notification_global_counter WHERE id = 1")
+    row = cursor.fetchone()
+    return row['posted'] if row else 0
+
+
+def increment_unread(cursor, user_ids):
+    """Add one unread notification to the counters of user_ids (unknown ids are skipped)"""
+    if not user_ids:
+        return
+    placeholders = ", ".join(["%s"] * len(user_ids))
+    cursor.execute(
+        f"""
+        INSERT INTO notification_read_state (user_id, unread_count)
+        SELECT id, 1 FROM users WHERE id IN ({placeholders})
+        ON DUPLICATE KEY UPDATE unread_count = unread_count + 1
+        """,
+        list(user_ids)
+    )
+
+
+def delete_inbox_rows(cursor, row_ids):
+    """Delete user_notifications rows by id, keeping the unread counters in step"""
+    if not row_ids:
+        return 0
+    placeholders = ", ".join(["%s"] * len(row_ids))
+    cursor.execute(
+        f"SELECT user_id, is_read FROM user_notifications WHERE id IN ({placeholders}) FOR UPDATE",
+        list(row_ids)
+    )
+    unread_by_user = {}
+    for row in cursor.fetchall():
+        if not row['is_read']:
+            unread_by_user[row['user_id']] = unread_by_user.get(row['user_id'], 0) + 1
+
+    cursor.execute(f"DELETE FROM user_notifications WHERE id IN ({placeholders})", list(row_ids))
+    deleted = cursor.rowcount
+    for user_id, unread in unread_by_user.items():
+        _decrement_unread(cursor, user_id, unread)
+    return deleted
+
+
+def _decrement_unread(cursor, user_id, amount):
+    if amount <= 0:
+        return
+    cursor.execute(
+        """
+        UPDATE notification_read_state
+        SET unread_count = GREATEST(unread_count - %s, 0)
+        WHERE user_id = %s
+        """,
+        (amount, user_id)
+    )
+
+
+def mark_read(cursor, user_id, notification_id):
+    """Mark one notification read; returns False when the user cannot see it"""
+    cursor.execute(
+        "SELECT is_read FROM user_notifications WHERE notification_id = %s AND user_id = %s",
+        (notification_id, user_id)
+    )
+    user_notification = cursor.fetchone()
+    if user_notification:
+        if not user_notification['is_read']:
+            cursor.execute(
+                """
+                UPDATE user_notifications
+                SET is_read = TRUE, read_at = NOW()
+                WHERE notification_id = %s AND user_id = %s AND is_read = FALSE
+                """,
+                (notification_id, user_id)
+            )
+            _decrement_unread(cursor, user_id, cursor.rowcount)
+        return True
+
+    # A visible global notification gets a read exception row
+    cursor.execute(
+        f"SELECT n.id > COALESCE(rs.global_read_up_to, 0) as was_unread {VISIBLE_GLOBALS_SQL} AND n.id = %s",
+        _visible_globals_params(user_id) + [notification_id]
+    )
+    visible = cursor.fetchone()
+    if visible is None:
+        return False
+    cursor.execute(
+        """
+        INSERT INTO user_notifications (user_id, notification_id, is_read, read_at)
+        VALUES (%s, %s, TRUE, NOW())
+        """,
+        (user_id, notification_id)
+    )
+    if visible['was_unread']:
+        # One fewer unread global; an unseeded (NULL) state stays NULL
+        cursor.execute(
+            "UPDATE notification_read_state SET global_posted_seen = global_posted_seen + 1 WHERE user_id = %s",
+            (user_id,)
+        )
+    return True
+
+
+def _latest_global_id(cursor):
+    cursor.execute("SELECT COALESCE(MAX(id), 0) as max_id FROM notifications WHERE is_global = TRUE")
+    return cursor.fetchone()['max_id']
+
+
+def mark_all_read(cursor, user_id):
+    """Mark every notification read for user_id and return how many were unread"""
+    cursor.execute(
+        f"SELECT COUNT(*) as count {VISIBLE_GLOBALS_SQL} AND n.id > COALESCE(rs.global_read_up_to, 0)",
+        _visible_globals_params(user_id)
+    )
+    unread_globals = cursor.fetchone()['count']
+
+    cursor.execute(
+        """
+        UPDATE user_notifications
+        SET is_read = TRUE, read_at = NOW()
+        WHERE user_id = %s AND is_read = FALSE
+        """,
+        (user_id,)
+    )
+    updated_count = cursor.rowcount
+
+    # Subtract what was marked rather than zeroing, so a concurrent fan-out is kept
+    cursor.execute(
+        """
+        INSERT INTO notification_read_state
+            (user_id, global_read_up_to, global_read_at, unread_count, global_posted_seen)
+        VALUES (%s, %s, NOW(), 0, %s)
+        ON DUPLICATE KEY UPDATE
+            global_read_up_to = GREATEST(global_read_up_to, VALUES(global_read_up_to)),
+            global_read_at = NOW(),
+            unread_count = GREATEST(unread_count - %s, 0),
+            global_posted_seen = VALUES(global_posted_seen)
+        """,
+        (user_id, _latest_global_id(cursor), _global_posted(cursor), updated_count)
+    )
+    return updated_count + unread_globals
+
+
+def clear_all(cursor, user_id):
+    """Remove every notification from user_id's inbox and return how many were removed"""
+    cursor.execute(f"SELECT COUNT(*) as count {VISIBLE_GLOBALS_SQL}", _visible_globals_params(user_id))
+    visible_globals = cursor.fetchone()['count']
+
+    # Delete from user_notifications only (not from notifications), so other users keep theirs.
+    # Unread rows go first so their count can be taken off the counter.
+    cursor.execute("DELETE FROM user_notifications WHERE user_id = %s AND is_read = FALSE", (user_id,))
+    unread_deleted = cursor.rowcount
+    cursor.execute("DELETE FROM user_notifications WHERE user_id = %s", (user_id,))
+    deleted_count = unread_deleted + cursor.rowcount
+
+    cursor.execute(
+        """
+        INSERT INTO notification_read_state (user_id, global_cleared_up_to, unread_count, global_posted_seen)
+        VALUES (%s, %s, 0, %s)
+        ON DUPLICATE KEY UPDATE
+            global_cleared_up_to = GREATEST(global_cleared_up_to, VALUES(global_cleared_up_to)),
+            unread_count = GREATEST(unread_count - %s, 0),
+            global_posted_seen = VALUES(global_posted_seen)
+        """,
+        (user_id, _latest_global_id(cursor), _global_posted(cursor), unread_deleted)
+    )
+    return deleted_count + visible_globals
+
+
+# Recomputed unread count per user, for comparison with the maintained counter
+ACTUAL_UNREAD_SQL = """
+    SELECT u.id as user_id, COUNT(un.id) as actual, COALESCE(rs.unread_count, 0) as counted
+    FROM users u
+    LEFT JOIN user_notifications un ON un.user_id = u.id AND un.is_read = FALSE
+    LEFT JOIN notification_read_state rs ON rs.user_id = u.id
+    GROUP BY u.id, rs.unread_count
+"""
+
+
+def reset_global_seen(cursor, up_to_id):
+    """
+    Forget global_posted_seen for users who might have counted globals with id <=
+    up_to_id as unread (their watermark is below it), after such globals were
+    deleted; count_unread reseeds them exactly.
+    """
+    cursor.execute(
+        """
+        UPDATE notification_read_state SET global_posted_seen = NULL
+        WHERE global_posted_seen IS NOT NULL
+          AND GREATEST(global_read_up_to, global_cleared_up_to) < %s
+        """,
+        (up_to_id,)
+    )
+    return cursor.rowcount
+
+
+def repair_unread_counts(conn):
+    """
+    Recompute unread counters that disagree with user_notifications and return the
+    user ids that were fixed. Drifted users are found with a plain read, then each
+    counter row is locked before recounting, which serializes the fix with writers
+    (they update the counter in the same transaction as the rows).
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT user_id FROM ({ACTUAL_UNREAD_SQL}) c WHERE c.actual <> c.counted")
+        drifted = [row['user_id'] for row in cursor.fetchall()]
+    conn.commit()
+
+    repaired = []
+    for user_id in drifted:
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    INSERT INTO notification_read_state (user_id, unread_count) VALUES (%s, 0)
+                    ON DUPLICATE KEY UPDATE user_id = user_id
+                    """,
+                    (user_id,)
+                )
+                cursor.execute(
+                    "SELECT unread_count FROM notification_read_state WHERE user_id = %s FOR UPDATE",
+                    (user_id,)
+                )
+                counted = cursor.fetchone()['unread_count']
+                cursor.execute(
+                    "SELECT COUNT(*) as count FROM user_notifications WHERE user_id = %s AND is_read = FALSE",
+                    (user_id,)
+                )
+                actual = cursor.fetchone()['count']
+                if actual != counted:
+                    cursor.execute(
+                        "UPDATE notification_read_state SET unread_count = %s WHERE user_id = %s",
+                        (actual, user_id)
+                    )
+                    repaired.append(user_id)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"Error repairing unread count for user {user_id}: {e}")
+    return repaired
+
+
+class UnreadCountRepairer:
+    """Background thread running repair_unread_counts() every interval seconds"""
+
+    def __init__(self, interval=None):
+        self.interval = interval or float(os.getenv("UNREAD_COUNT_REPAIR_SECONDS", "3600"))
+        self._pool = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+        # Counters exposed through stats()
+        self._runs = 0
+        self._repaired = 0
+        self._last_run_at = None
+        self._last_error = None
+
+    def start(self, pool):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._pool = pool
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="unread-count-repair", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self):
+        with self._pool.connection() as conn:
+            repaired = repair_unread_counts(conn)
+        with self._lock:
+            self._runs += 1
+            self._repaired += len(repaired)
+            self._last_run_at = time.time()
+        if repaired:
+            print(f"Repaired unread counters for {len(repaired)} users")
+        return repaired
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                with self._lock:
+                    self._last_error = str(e)
+                print(f"Unread count repair error: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "interval_seconds": self.interval,
+                "runs": self._runs,
+                "repaired": self._repaired,
+                "last_run_at": self._last_run_at,
+                "last_error": self._last_error
+            }
+
+
+unread_count_repairer = UnreadCountRepairer()
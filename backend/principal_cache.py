@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class PrincipalCache:
+    """
+    Bounded LRU cache of authenticated users keyed by bearer token.
+
+    Entries expire after ttl seconds (or earlier, when the token itself expires),
+    and every token belonging to a user can be dropped at once with invalidate_user().
+    """
+
+    def __init__(self, max_size=1024, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+
+        # token -> (user, expires_at), least recently used first
+        self._entries = OrderedDict()
+        # user_id -> set of tokens, so invalidation does not scan the whole cache
+        self._tokens_by_user = {}
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def _discard_locked(self, token):
+        user, _ = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(user.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user.id]
+
+    def get(self, token):
+        """Return the cached user for token, or None on a miss or expired entry"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            user, expires_at = entry
+            if expires_at <= now:
+                self._discard_locked(token)
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(token)
+            self._hits += 1
+            return user
+
+    def put(self, token, user, token_expires_at=None):
+        """
+        Cache user for token. token_expires_at is the JWT 'exp' claim as a unix
+        timestamp; the entry never outlives the token it was resolved from.
+        """
+        lifetime = self.ttl
+        if token_expires_at is not None:
+            lifetime = min(lifetime, token_expires_at - time.time())
+        if lifetime <= 0:
+            return
+
+        with self._lock:
+            if token in self._entries:
+                self._discard_locked(token)
+
+            self._entries[token] = (user, time.monotonic() + lifetime)
+            self._tokens_by_user.setdefault(user.id, set()).add(token)
+
+            while len(self._entries) > self.max_size:
+                oldest_token = next(iter(self._entries))
+                self._discard_locked(oldest_token)
+                self._evictions += 1
+
+    def invalidate_user(self, user_id):
+        """Drop every cached token for user_id, e.g. after a role or status change"""
+        with self._lock:
+            tokens = self._tokens_by_user.pop(user_id, set())
+            for token in tokens:
+                self._entries.pop(token, None)
+            if tokens:
+                self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations
+            }
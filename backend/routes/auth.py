@@ -5,9 +5,6 @@ from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
 import uuid
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import random
 import string
 import os
@@ -28,6 +25,8 @@ from main import (
     verify_password,
     get_current_user
 )
+from email_outbox import enqueue_email
+from event_hub import event_hub
 
 router = APIRouter(tags=["authentication"])
 
@@ -50,7 +49,7 @@ class UserSignUp(BaseModel):
     role: str
 
 @router.post("/token", response_model=Token)
-async def login_for_access_token(
+def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     conn = Depends(get_db_connection)
 ):
@@ -118,7 +117,7 @@ async def login_for_access_token(
     }
 
 @router.post("/signup", status_code=status.HTTP_201_CREATED)
-async def sign_up(user_data: UserSignUp, request: Request, conn = Depends(get_db_connection)):
+def sign_up(user_data: UserSignUp, request: Request, conn = Depends(get_db_connection)):
     # Check if user with this ID or email already exists
     with conn.cursor() as cursor:
         cursor.execute(
@@ -189,6 +188,10 @@ async def sign_up(user_data: UserSignUp, request: Request, conn = Depends(get_db
             detail=f"Failed to create user: {str(e)}"
         )
     
+    if requires_approval:
+        # Refresh the pending account badge on System Administrator sidebars
+        event_hub.publish("pending_accounts", roles=["System Administrator"])
+    
     return {
         "message": "User registered successfully",
         "requires_approval": requires_approval,
@@ -200,7 +203,7 @@ class LoginRequest(BaseModel):
     password: str
 
 @router.post("/login", response_model=Token)
-async def login(
+def login(
     login_data: LoginRequest,
     conn = Depends(get_db_connection)
 ):
@@ -280,7 +283,7 @@ class ResetPasswordRequest(BaseModel):
 
 # Add the forgot password endpoint
 @router.post("/forgot-password", response_model=dict)
-async def forgot_password(
+def forgot_password(
     request_data: PasswordResetRequest,
     request_obj: Request,
     conn = Depends(get_db_connection)
@@ -362,9 +365,9 @@ async def forgot_password(
                 reset_url = f"http://localhost:5173/reset-password?token={reset_token}&email={request_data.email}"
                 print(f"[MOCK EMAIL] Password reset link for {request_data.email}: {reset_url}")
                 
-                # Send reset email with handling timeouts and errors
+                # Queue the reset email; the outbox worker handles SMTP timeouts and retries
                 try:
-                    send_reset_email(request_data.email, reset_url, user["full_name"])
+                    send_reset_email(conn, request_data.email, reset_url, user["full_name"])
                 except Exception as email_error:
                     print(f"Error sending reset email: {str(email_error)}")
                     # Don't fail the request just because email sending failed
@@ -391,14 +394,8 @@ async def forgot_password(
             headers=headers
         )
 
-def send_reset_email(email, reset_url, name):
-    """Helper function to send a password reset email."""
-    # Hard-coded email configuration (same as send_approval_email)
-    smtp_server = "smtp.gmail.com"
-    smtp_port = "587"
-    smtp_username = "pierredosdos@gmail.com"
-    smtp_password = "bibb iylk bqkc grez"
-    
+def send_reset_email(conn, email, reset_url, name):
+    """Helper function to queue a password reset email for the outbox worker."""
     try:
         # For development/demo environment, just log and return success
         # This prevents timeouts during development
@@ -406,13 +403,7 @@ def send_reset_email(email, reset_url, name):
             print(f"[DEV MODE] Would send password reset email to {email} with URL: {reset_url}")
             return True
             
-        # Create email message
-        message = MIMEMultipart("alternative")
-        message["Subject"] = "Password Reset Request"
-        message["From"] = smtp_username
-        message["To"] = email
-        
-        # Plain text version - simplified for faster sending
+        # Plain text version
         text = f"""
 Hello {name},
 
@@ -428,7 +419,7 @@ Best regards,
 The UIC Lab Class Scheduler Team
         """
         
-        # HTML version - simplified for faster sending
+        # HTML version
         html = f"""
 <html>
 <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
@@ -455,47 +446,17 @@ The UIC Lab Class Scheduler Team
 </html>
         """
         
-        # Attach parts
-        part1 = MIMEText(text, "plain")
-        part2 = MIMEText(html, "html")
-        message.attach(part1)
-        message.attach(part2)
-        
-        # Send email with timeout
-        context = ssl.create_default_context()
-        with smtplib.SMTP(smtp_server, int(smtp_port), timeout=10) as server:
-            server.ehlo()
-            server.starttls(context=context)
-            server.ehlo()
-            server.login(smtp_username, smtp_password)
-            server.sendmail(smtp_username, email, message.as_string())
-        
-        print(f"Password reset email sent to {email}")
+        # Delivery happens on the email outbox worker, outside the request
+        enqueue_email(conn, email, "Password Reset Request", text, html)
         return True
-    except smtplib.SMTPException as e:
-        print(f"SMTP Error sending reset email: {str(e)}")
-        # Don't raise the exception here, just log it
-        return False
     except Exception as e:
-        print(f"Error sending reset email: {str(e)}")
+        print(f"Error queueing reset email: {str(e)}")
         # Don't raise the exception here, just log it
         return False
 
-def send_approval_email(email, name, role):
-    """Helper function to send an account approval notification email."""
-    # Hard-coded email configuration
-    smtp_server = "smtp.gmail.com"
-    smtp_port = "587"
-    smtp_username = "pierredosdos@gmail.com"
-    smtp_password = "bibb iylk bqkc grez"
-    
+def send_approval_email(conn, email, name, role):
+    """Helper function to queue an account approval notification email."""
     try:
-        # Create email message
-        message = MIMEMultipart("alternative")
-        message["Subject"] = "Your Account Has Been Approved"
-        message["From"] = smtp_username
-        message["To"] = email
-        
         # Login URL
         login_url = "http://localhost:5173/login"
         
@@ -553,26 +514,14 @@ def send_approval_email(email, name, role):
         </html>
         """
         
-        # Attach parts
-        part1 = MIMEText(text, "plain")
-        part2 = MIMEText(html, "html")
-        message.attach(part1)
-        message.attach(part2)
-        
-        # Send email
-        with smtplib.SMTP(smtp_server, int(smtp_port)) as server:
-            server.starttls()
-            server.login(smtp_username, smtp_password)
-            server.sendmail(smtp_username, email, message.as_string())
-        
-        print(f"Account approval email sent to {email}")
+        enqueue_email(conn, email, "Your Account Has Been Approved", text, html)
     except Exception as e:
-        print(f"Error sending approval email: {str(e)}")
+        print(f"Error queueing approval email: {str(e)}")
         # Don't raise the exception here, just log it
         # This ensures the approval process continues even if email sending fails
 
 @router.post("/verify-reset-token")
-async def verify_reset_token(request: VerifyTokenRequest):
+def verify_reset_token(request: VerifyTokenRequest):
     # Add CORS headers for this specific endpoint
     headers = {
         "Access-Control-Allow-Origin": "*",
@@ -633,7 +582,7 @@ async def verify_reset_token(request: VerifyTokenRequest):
         conn.close()
 
 @router.post("/reset-password")
-async def reset_password(request: ResetPasswordRequest):
+def reset_password(request: ResetPasswordRequest):
     """Reset a user's password using a valid token"""
     # Connect to the database
     conn = pymysql.connect(
@@ -797,7 +746,7 @@ class TestPasswordResetRequest(BaseModel):
     new_password: str = "testpassword123"
 
 @router.post("/test-password-reset")
-async def test_password_reset(request: TestPasswordResetRequest, request_obj: Request):
+def test_password_reset(request: TestPasswordResetRequest, request_obj: Request):
     """Test endpoint to reset a password without requiring a token (for debugging only)"""
     email = request.email
     new_password = request.new_password
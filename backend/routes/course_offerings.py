@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
 from pydantic import BaseModel
 from typing import List, Optional
 import pymysql
@@ -9,6 +9,13 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from main import get_db_connection
+from course_offering_import import (
+    MissingUniqueKeyError,
+    UploadFormatError,
+    dedupe_offerings,
+    ingest_course_offerings,
+    upsert_course_offerings
+)
 
 router = APIRouter(tags=["course_offerings"])
 
@@ -25,54 +32,91 @@ class CourseOfferingList(BaseModel):
     courses: List[CourseOfferingBase]
 
 @router.post("/course-offerings/import", response_model=dict)
-async def import_course_offerings(
+def import_course_offerings(
     courses: List[CourseOfferingCreate],
+    update_existing: bool = True,
     conn = Depends(get_db_connection)
 ):
+    """
+    Upsert courses on (code, year_and_section, semester_id). Existing offerings
+    get the imported name unless update_existing is false.
+    """
     try:
-        imported_count = 0
+        payload = [course.dict() for course in courses]
+        unique = dedupe_offerings(payload)
         with conn.cursor() as cursor:
-            for course in courses:
-                # Check if course already exists
-                cursor.execute(
-                    """
-                    SELECT id FROM course_offerings 
-                    WHERE code = %s AND year_and_section = %s AND semester_id = %s
-                    """,
-                    (course.code, course.year_and_section, course.semester_id)
-                )
-                existing_course = cursor.fetchone()
-                
-                if not existing_course:
-                    # Insert new course
-                    cursor.execute(
-                        """
-                        INSERT INTO course_offerings 
-                        (code, name, year_and_section, semester_id, created_at)
-                        VALUES (%s, %s, %s, %s, %s)
-                        """,
-                        (
-                            course.code,
-                            course.name,
-                            course.year_and_section,
-                            course.semester_id,
-                            datetime.now()
-                        )
-                    )
-                    imported_count += 1
-        
+            counts = upsert_course_offerings(cursor, unique, update_existing)
         conn.commit()
-        return {"message": f"Successfully imported {imported_count} courses"}
+        return {
+            "message": (
+                f"Successfully imported {len(unique)} courses: {counts['inserted']} new, "
+                f"{counts['updated']} updated, {counts['unchanged']} unchanged"
+            ),
+            **counts,
+            "duplicates": len(payload) - len(unique)
+        }
         
+    except MissingUniqueKeyError as e:
+        conn.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    except Exception as e:
+        conn.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to import courses: {str(e)}"
+        )
+
+@router.post("/course-offerings/upload", response_model=dict)
+def upload_course_offerings(
+    file: UploadFile = File(...),
+    semester_id: Optional[int] = Form(None),
+    update_existing: bool = Form(True),
+    conn = Depends(get_db_connection)
+):
+    """
+    Import a .csv or .xlsx sheet of course offerings, streamed row by row. The
+    first row names the columns; semester_id applies to rows without a Semester
+    column/value. Bad rows are reported and skipped, the rest are upserted.
+    """
+    file_format = os.path.splitext(file.filename or "")[1].lstrip(".").lower()
+    try:
+        with conn.cursor() as cursor:
+            result = ingest_course_offerings(cursor, file.file, file_format, semester_id, update_existing)
+        conn.commit()
+        imported = result['inserted'] + result['updated'] + result['unchanged']
+        message = (
+            f"Imported {imported} courses: {result['inserted']} new, "
+            f"{result['updated']} updated, {result['unchanged']} unchanged"
+        )
+        if result['error_count']:
+            message += f"; {result['error_count']} rows skipped"
+        return {"message": message, **result}
+    except UploadFormatError as e:
+        conn.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except MissingUniqueKeyError as e:
+        conn.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
     except Exception as e:
         conn.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to import courses: {str(e)}"
         )
+    finally:
+        file.file.close()
 
 @router.get("/course-offerings", response_model=CourseOfferingList)
-async def get_course_offerings(
+def get_course_offerings(
     semester_id: Optional[int] = None,
     conn = Depends(get_db_connection)
 ):
@@ -97,7 +141,7 @@ async def get_course_offerings(
         )
 
 @router.delete("/course-offerings/all", response_model=dict)
-async def delete_all_course_offerings(
+def delete_all_course_offerings(
     conn = Depends(get_db_connection)
 ):
     try:
@@ -0,0 +1,99 @@
+from fastapi import APIRouter, HTTPException, status, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+import asyncio
+import json
+import os
+
+# Import from main app
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import db_pool, resolve_token_user
+from event_hub import event_hub
+
+router = APIRouter(tags=["events"])
+
+# Comment lines keep proxies from closing idle streams and let us notice disconnects
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+# Browsers wait this long before reconnecting a dropped EventSource
+EVENTS_RETRY_MS = 3000
+
+
+def resolve_stream_user(token: Optional[str]):
+    """
+    Resolve the subscriber from a signed JWT. EventSource cannot send headers, so
+    the token comes as a query parameter. A stream carries the user's
+    notifications and forced logouts for as long as it stays open, so fallback
+    tokens and bare user ids, which prove nothing, are refused.
+    """
+    if not token or token.startswith("user_fallback_token_"):
+        return None
+    with db_pool.connection() as conn:
+        try:
+            return resolve_token_user(token, lambda: conn)
+        except Exception as e:
+            print(f"Event stream token error: {str(e)}")
+            return None
+
+
+def format_event(event_type, data):
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.get("/events")
+async def stream_events(
+    request: Request,
+    token: Optional[str] = None
+):
+    """Server-sent event stream of notification, pending account and forced logout events"""
+    if token is None:
+        auth_header = request.headers.get("Authorization")
+        if auth_header and auth_header.startswith("Bearer "):
+            token = auth_header.replace("Bearer ", "")
+
+    # Resolve on the worker pool and give the connection back before streaming starts
+    user = await run_in_threadpool(resolve_stream_user, token)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials"
+        )
+
+    subscription = event_hub.subscribe(user.id, user.role)
+    print(f"Event stream opened for user {user.id} ({user.role})")
+
+    async def event_stream():
+        try:
+            yield f"retry: {EVENTS_RETRY_MS}\n\n"
+            yield format_event("connected", {"user_id": user.id, "role": user.role})
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+
+                if subscription.overflowed:
+                    # Events were dropped while this client lagged; have it refetch everything
+                    subscription.overflowed = False
+                    yield format_event("resync", {})
+                yield format_event(event["type"], event["data"])
+                event_hub.record_delivery(event)
+        finally:
+            event_hub.unsubscribe(subscription)
+            print(f"Event stream closed for user {user.id}")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# Subscriber counts and fan-out latency
+@router.get("/events/stats")
+def get_event_hub_stats():
+    return event_hub.stats()
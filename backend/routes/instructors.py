@@ -26,7 +26,7 @@ class InstructorCreate(BaseModel):
     role: Optional[str] = None
 
 @router.get("/instructors", response_model=List[InstructorModel])
-async def get_instructors(
+def get_instructors(
     conn = Depends(get_db_connection)
 ):
     """
@@ -56,7 +56,7 @@ async def get_instructors(
         )
 
 @router.post("/instructors", response_model=InstructorModel)
-async def create_instructor(
+def create_instructor(
     instructor: InstructorCreate = Body(...),
     conn = Depends(get_db_connection)
 ):
@@ -97,7 +97,7 @@ async def create_instructor(
         )
 
 @router.post("/instructors/sync", response_model=List[InstructorModel])
-async def sync_instructors(
+def sync_instructors(
     conn = Depends(get_db_connection)
 ):
     """
@@ -185,7 +185,7 @@ async def sync_instructors(
         )
 
 @router.get("/instructors/active", response_model=List[InstructorModel])
-async def get_active_instructors(
+def get_active_instructors(
     conn = Depends(get_db_connection)
 ):
     """
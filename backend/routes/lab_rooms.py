@@ -18,7 +18,7 @@ class LabRoomModel(BaseModel):
     created_at: str
 
 @router.get("/lab-rooms", response_model=List[LabRoomModel])
-async def get_lab_rooms(conn = Depends(get_db_connection)):
+def get_lab_rooms(conn = Depends(get_db_connection)):
     """
     Get all lab rooms from the database.
     """
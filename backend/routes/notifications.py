@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+import hashlib
 import json
 
 # Import from main app
@@ -9,9 +10,53 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from main import get_db_connection
+from event_hub import event_hub
+from notification_store import increment_unread, record_global_posted
+from notification_service import (
+    ACAD_COOR_INBOX,
+    DEAN_INBOX,
+    NOTIFICATION_PAGE_SIZE,
+    USER_INBOX
+)
 
 router = APIRouter(tags=["notifications"])
 
+# Target user ids per INSERT ... SELECT when distributing to an explicit list
+NOTIFICATION_FANOUT_CHUNK_SIZE = 1000
+
+def notification_dedupe_key(kind, scope):
+    """Key of the notification_dedupe row for (kind, scope)"""
+    return hashlib.sha256(f"{kind}|{scope}".encode()).hexdigest()
+
+
+def find_duplicate_notification(cursor, kind, scope, window_seconds):
+    """
+    Return (dedupe_key, existing_id) for a notification of this kind and scope.
+    existing_id is set when one was created in the last window_seconds.
+
+    The (kind, scope) row in notification_dedupe is locked FOR UPDATE until the
+    caller's transaction ends, so a concurrent request for the same kind and
+    scope waits here and then sees the notification this one posts. Pass
+    dedupe_key on to create_notification, which records the new notification
+    under it. Nothing is committed here; the caller commits (create_notification
+    does) or rolls back.
+    """
+    dedupe_key = notification_dedupe_key(kind, scope)
+    cursor.execute("INSERT IGNORE INTO notification_dedupe (dedupe_key) VALUES (%s)", (dedupe_key,))
+    cursor.execute(
+        """
+        SELECT notification_id, created_at > DATE_SUB(NOW(), INTERVAL %s SECOND) as is_recent
+        FROM notification_dedupe
+        WHERE dedupe_key = %s
+        FOR UPDATE
+        """,
+        (window_seconds, dedupe_key)
+    )
+    last = cursor.fetchone()
+    if last and last['notification_id'] and last['is_recent']:
+        return dedupe_key, last['notification_id']
+    return dedupe_key, None
+
 # Models
 class NotificationCreate(BaseModel):
     title: str
@@ -46,7 +91,8 @@ def create_notification(
     related_id: Optional[int] = None,
     is_global: bool = False,
     created_by: Optional[str] = None,
-    target_users: Optional[List[str]] = None
+    target_users: Optional[List[str]] = None,
+    dedupe_key: Optional[str] = None
 ):
     """
     Create a notification and distribute to appropriate users
@@ -61,6 +107,8 @@ def create_notification(
         is_global: Whether all users should receive this notification
         created_by: User ID of the creator
         target_users: List of specific user IDs to receive the notification
+        dedupe_key: Key from find_duplicate_notification; the new notification is
+                    recorded under it for later duplicate checks
     """
     try:
         print(f"Creating notification: title='{title}', message='{message}', type='{type}', is_global={is_global}")
@@ -81,60 +129,60 @@ def create_notification(
             (title, message, type, related_to, related_id, is_global, created_at, created_by)
             VALUES (%s, %s, %s, %s, %s, %s, NOW(), %s)
             """
-            cursor.execute(
-                query,
-                (title, message, type, related_to, related_id, is_global, created_by)
-            )
+            cursor.execute(query, (title, message, type, related_to, related_id, is_global, created_by))
             
             notification_id = cursor.lastrowid
             print(f"Created notification with ID: {notification_id}")
             
-            # If global, distribute to all users
+            if dedupe_key:
+                cursor.execute(
+                    """
+                    INSERT INTO notification_dedupe (dedupe_key, notification_id, created_at)
+                    VALUES (%s, %s, NOW())
+                    ON DUPLICATE KEY UPDATE notification_id = VALUES(notification_id), created_at = VALUES(created_at)
+                    """,
+                    (dedupe_key, notification_id)
+                )
+            
+            # Global notifications are stored once and merged into each inbox on read
+            # (see notification_store), so posting one costs the same for any audience
             if is_global:
-                print("This is a global notification, distributing to all active users")
-                cursor.execute("SELECT id FROM users WHERE is_approved = TRUE AND is_active = TRUE")
-                users = cursor.fetchall()
-                
-                if not users:
-                    print("Warning: No active users found in the database")
-                else:
-                    print(f"Distributing notification to {len(users)} users")
-                
-                for user in users:
-                    try:
-                        cursor.execute(
-                            """
-                            INSERT INTO user_notifications (user_id, notification_id, is_read)
-                            VALUES (%s, %s, FALSE)
-                            """,
-                            (user['id'], notification_id)
-                        )
-                        print(f"Sent notification {notification_id} to user {user['id']}")
-                    except Exception as user_error:
-                        print(f"Error sending notification to user {user['id']}: {str(user_error)}")
-                        # Continue with other users even if one fails
+                record_global_posted(cursor)
+                print(f"Notification {notification_id} is global; no per-user rows written")
             
-            # If target users specified, distribute to them
+            # If target users specified, distribute to them in chunks
             elif target_users:
-                print(f"Distributing notification to {len(target_users)} specific users")
-                for user_id in target_users:
-                    try:
-                        cursor.execute(
-                            """
-                            INSERT INTO user_notifications (user_id, notification_id, is_read)
-                            VALUES (%s, %s, FALSE)
-                            """,
-                            (user_id, notification_id)
-                        )
-                        print(f"Sent notification {notification_id} to user {user_id}")
-                    except Exception as user_error:
-                        print(f"Error sending notification to user {user_id}: {str(user_error)}")
-                        # Continue with other users even if one fails
+                # Joining against users skips unknown ids instead of failing the whole chunk on the FK
+                unique_targets = list(dict.fromkeys(target_users))
+                distributed = 0
+                for chunk_start in range(0, len(unique_targets), NOTIFICATION_FANOUT_CHUNK_SIZE):
+                    chunk = unique_targets[chunk_start:chunk_start + NOTIFICATION_FANOUT_CHUNK_SIZE]
+                    placeholders = ", ".join(["%s"] * len(chunk))
+                    cursor.execute(
+                        f"""
+                        INSERT INTO user_notifications (user_id, notification_id, is_read)
+                        SELECT id, %s, FALSE FROM users WHERE id IN ({placeholders})
+                        """,
+                        [notification_id] + chunk
+                    )
+                    distributed += cursor.rowcount
+                    increment_unread(cursor, chunk)
+                if distributed < len(unique_targets):
+                    print(f"Warning: {len(unique_targets) - distributed} target users not found")
+                print(f"Distributed notification {notification_id} to {distributed} specific users")
             else:
                 print("Warning: Notification created but not distributed (neither global nor target users specified)")
             
             conn.commit()
             print(f"Notification {notification_id} created and distributed successfully")
+            
+            # Tell connected clients to refresh their unread counts
+            event_hub.publish(
+                "notification",
+                {"notification_id": notification_id, "title": title, "type": type, "related_to": related_to},
+                user_ids=target_users,
+                broadcast=is_global
+            )
             return notification_id
     except Exception as e:
         conn.rollback()
@@ -239,20 +287,10 @@ def create_schedule_approval_notification(conn, semester_id, created_by=None, sc
                 title = "Schedule Posted"
                 
                 # Check for duplicate "Schedule Posted" notifications for this semester
-                cursor.execute(
-                    """
-                    SELECT id FROM notifications 
-                    WHERE title = 'Schedule Posted'
-                    AND message = %s
-                    AND created_at > DATE_SUB(NOW(), INTERVAL 10 MINUTE)
-                    LIMIT 1
-                    """,
-                    (message,)
-                )
-                existing = cursor.fetchone()
-                if existing:
+                dedupe_key, existing_id = find_duplicate_notification(cursor, "schedule_posted", semester_id, 600)
+                if existing_id:
                     print(f"Found existing 'Schedule Posted' notification for {semester_name}. Skipping duplicate.")
-                    return existing['id']
+                    return existing_id
             # CASE 1: First schedule in a semester (Schedule Posted)
             elif approved_count == 0:
                 print("DEBUG: PATH 1 - First schedule in semester (posted message)")
@@ -260,20 +298,10 @@ def create_schedule_approval_notification(conn, semester_id, created_by=None, sc
                 title = "Schedule Posted"
                 
                 # Check for duplicate "Schedule Posted" notifications for this semester
-                cursor.execute(
-                    """
-                    SELECT id FROM notifications 
-                    WHERE title = 'Schedule Posted'
-                    AND message = %s
-                    AND created_at > DATE_SUB(NOW(), INTERVAL 10 MINUTE)
-                    LIMIT 1
-                    """,
-                    (message,)
-                )
-                existing = cursor.fetchone()
-                if existing:
+                dedupe_key, existing_id = find_duplicate_notification(cursor, "schedule_posted", semester_id, 600)
+                if existing_id:
                     print(f"Found existing 'Schedule Posted' notification for {semester_name}. Skipping duplicate.")
-                    return existing['id']
+                    return existing_id
             
             # CASE 2: Update to a course in the CURRENT display semester 
             elif is_current_display_semester and course_code and section:
@@ -283,20 +311,10 @@ def create_schedule_approval_notification(conn, semester_id, created_by=None, sc
                 title = "Schedule Updated"
                 
                 # Check for duplicate notifications for this exact course+section (to avoid duplicates for same course)
-                cursor.execute(
-                    """
-                    SELECT id FROM notifications 
-                    WHERE title = 'Schedule Updated'
-                    AND message = %s
-                    AND created_at > DATE_SUB(NOW(), INTERVAL 2 MINUTE)
-                    LIMIT 1
-                    """,
-                    (message,)
-                )
-                existing = cursor.fetchone()
-                if existing:
+                dedupe_key, existing_id = find_duplicate_notification(cursor, "schedule_updated", f"{semester_id}:{course_code}:{section}", 120)
+                if existing_id:
                     print(f"Found existing notification for {course_code} of {section}. Skipping duplicate.")
-                    return existing['id']
+                    return existing_id
             
             # CASE 3: Additional course in non-current semester (approved message)
             elif course_code and section and not is_current_display_semester:
@@ -305,20 +323,10 @@ def create_schedule_approval_notification(conn, semester_id, created_by=None, sc
                 title = "Schedule Approved"
                 
                 # Check for duplicate notifications for this exact course+section
-                cursor.execute(
-                    """
-                    SELECT id FROM notifications 
-                    WHERE title = 'Schedule Approved'
-                    AND message = %s
-                    AND created_at > DATE_SUB(NOW(), INTERVAL 2 MINUTE)
-                    LIMIT 1
-                    """,
-                    (message,)
-                )
-                existing = cursor.fetchone()
-                if existing:
+                dedupe_key, existing_id = find_duplicate_notification(cursor, "schedule_approved", f"{semester_id}:{course_code}:{section}", 120)
+                if existing_id:
                     print(f"Found existing notification for {course_code} of {section}. Skipping duplicate.")
-                    return existing['id']
+                    return existing_id
             else:
                 print("DEBUG: PATH 4 - No specific course and not first schedule (skipping)")
                 # If other schedules are already approved and no specific course, skip notification
@@ -336,7 +344,8 @@ def create_schedule_approval_notification(conn, semester_id, created_by=None, sc
                 related_to="schedule",
                 related_id=semester_id,
                 is_global=True,
-                created_by=created_by
+                created_by=created_by,
+                dedupe_key=dedupe_key
             )
             
             if notification_id:
@@ -421,21 +430,10 @@ def create_schedule_pending_notification(conn, semester_id, created_by=None, sch
             title = "Schedules Pending Approval"
             
             # Check for duplicate notifications within a short time window
-            cursor.execute(
-                """
-                SELECT id FROM notifications 
-                WHERE title = 'Schedules Pending Approval'
-                AND related_to = 'schedule'
-                AND related_id = %s
-                AND created_at > DATE_SUB(NOW(), INTERVAL 5 MINUTE)
-                LIMIT 1
-                """,
-                (semester_id,)
-            )
-            existing = cursor.fetchone()
-            if existing:
+            dedupe_key, existing_id = find_duplicate_notification(cursor, "schedules_pending", semester_id, 300)
+            if existing_id:
                 print(f"Found existing pending approval notification for {semester_name}. Skipping duplicate.")
-                return existing['id']
+                return existing_id
                 
             print(f"CREATING NOTIFICATION: title='{title}', message='{message}'")
             
@@ -449,7 +447,8 @@ def create_schedule_pending_notification(conn, semester_id, created_by=None, sch
                 related_id=semester_id,
                 is_global=False, # Not global, only for the Dean
                 created_by=created_by,
-                target_users=[dean_id] # Send only to the Dean
+                target_users=[dean_id], # Send only to the Dean
+                dedupe_key=dedupe_key
             )
             
             if notification_id:
@@ -464,840 +463,138 @@ def create_schedule_pending_notification(conn, semester_id, created_by=None, sch
         print(f"Traceback: {traceback.format_exc()}")
         return None
 
-# Routes
+# Routes: each endpoint family is an InboxScope (see notification_service)
 @router.get("/notifications", response_model=List[Dict[str, Any]])
-async def get_user_notifications(
+def get_user_notifications(
+    response: Response,
     request: Request,
     filter_type: Optional[str] = None,
     sort_by: str = "newest",
+    limit: int = NOTIFICATION_PAGE_SIZE,
+    after: Optional[str] = None,
     conn = Depends(get_db_connection)
 ):
-    """Get notifications for the current user"""
-    try:
-        print(f"DEBUG: Received notifications request with filter_type={filter_type}, sort_by={sort_by}")
-        print(f"DEBUG: Request headers: {request.headers}")
-        print(f"DEBUG: Request query params: {request.query_params}")
-        
-        # Get user ID from request state, or use default
-        user_id = getattr(request.state, 'user', None)
-        if user_id is None or not hasattr(user_id, 'id'):
-            # Try to get from query parameters or headers
-            user_id = request.query_params.get('user_id') or request.headers.get('X-User-ID')
-            print(f"DEBUG: Got user_id from query params or headers: {user_id}")
-            
-            if not user_id:
-                print("DEBUG: No user_id found in request")
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="User ID is required"
-                )
-        else:
-            user_id = user_id.id
-            print(f"DEBUG: Got user_id from request state: {user_id}")
-        
-        print(f"DEBUG: Final user_id being used for query: {user_id}")
-        
-        with conn.cursor() as cursor:
-            # First check if the user exists
-            cursor.execute("SELECT COUNT(*) as count FROM users WHERE id = %s", (user_id,))
-            user_exists = cursor.fetchone()['count'] > 0
-            print(f"DEBUG: User exists in database: {user_exists}")
-            
-            # Check if user has any notifications
-            cursor.execute(
-                "SELECT COUNT(*) as count FROM user_notifications WHERE user_id = %s",
-                (user_id,)
-            )
-            notification_count = cursor.fetchone()['count']
-            print(f"DEBUG: User has {notification_count} notifications in user_notifications table")
-            
-            # Base query
-            query = """
-            SELECT n.*, un.is_read, un.read_at
-            FROM notifications n
-            JOIN user_notifications un ON n.id = un.notification_id
-            WHERE un.user_id = %s
-            """
-            
-            params = [user_id]
-            
-            # Add filter condition if provided
-            if filter_type and filter_type != "all":
-                query += " AND n.related_to = %s"
-                params.append(filter_type)
-            
-            # Add sorting
-            if sort_by == "oldest":
-                query += " ORDER BY n.created_at ASC"
-            else:
-                query += " ORDER BY n.created_at DESC"
-            
-            print(f"DEBUG: Executing SQL: {query} with params: {params}")
-            cursor.execute(query, params)
-            notifications = cursor.fetchall()
-            print(f"DEBUG: Found {len(notifications)} notifications for user")
-            
-            # Convert datetime objects to strings for JSON serialization
-            for notification in notifications:
-                notification['created_at'] = notification['created_at'].isoformat()
-                if notification['read_at']:
-                    notification['read_at'] = notification['read_at'].isoformat()
-            
-            return notifications
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error fetching notifications: {str(e)}")
-        import traceback
-        print(f"DEBUG: Traceback: {traceback.format_exc()}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error fetching notifications"
-        )
-
-@router.get("/dean-notifications", response_model=List[Dict[str, Any]])
-async def get_dean_notifications(
-    filter_type: Optional[str] = None,
-    sort_by: str = "newest",
-    conn = Depends(get_db_connection)
-):
-    """Get notifications for the Dean user, identified directly from the database"""
-    try:
-        print(f"DEBUG: Received Dean notifications request with filter_type={filter_type}, sort_by={sort_by}")
-        
-        # Find the Dean user directly from the database
-        with conn.cursor() as cursor:
-            # Get the Dean user ID from the database
-            cursor.execute("SELECT id FROM users WHERE role = 'Dean' LIMIT 1")
-            dean_result = cursor.fetchone()
-            
-            if not dean_result:
-                print("DEBUG: No Dean user found in the database")
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="No Dean user found in the database"
-                )
-            
-            dean_id = dean_result['id']
-            print(f"DEBUG: Found Dean user with ID: {dean_id}")
-            
-            # Check if Dean has any notifications
-            cursor.execute(
-                "SELECT COUNT(*) as count FROM user_notifications WHERE user_id = %s",
-                (dean_id,)
-            )
-            notification_count = cursor.fetchone()['count']
-            print(f"DEBUG: Dean has {notification_count} notifications in user_notifications table")
-            
-            # Base query
-            query = """
-            SELECT n.*, un.is_read, un.read_at
-            FROM notifications n
-            JOIN user_notifications un ON n.id = un.notification_id
-            WHERE un.user_id = %s
-            """
-            
-            params = [dean_id]
-            
-            # Add filter condition if provided
-            if filter_type and filter_type != "all":
-                query += " AND n.related_to = %s"
-                params.append(filter_type)
-            
-            # Add sorting
-            if sort_by == "oldest":
-                query += " ORDER BY n.created_at ASC"
-            else:
-                query += " ORDER BY n.created_at DESC"
-            
-            print(f"DEBUG: Executing SQL for Dean: {query} with params: {params}")
-            cursor.execute(query, params)
-            notifications = cursor.fetchall()
-            print(f"DEBUG: Found {len(notifications)} notifications for Dean")
-            
-            # Convert datetime objects to strings for JSON serialization
-            for notification in notifications:
-                notification['created_at'] = notification['created_at'].isoformat()
-                if notification['read_at']:
-                    notification['read_at'] = notification['read_at'].isoformat()
-            
-            return notifications
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error fetching Dean notifications: {str(e)}")
-        import traceback
-        print(f"DEBUG: Traceback: {traceback.format_exc()}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error fetching Dean notifications: {str(e)}"
-        )
+    """Get a page of notifications for the current user"""
+    return list_inbox_page(USER_INBOX, conn, response, request, filter_type, sort_by, limit, after)
 
 @router.patch("/notifications/{notification_id}/read")
-async def mark_notification_as_read(
+def mark_notification_as_read(
     notification_id: int,
     request: Request,
     conn = Depends(get_db_connection)
 ):
-    """Mark a notification as read"""
-    try:
-        # Get user ID from request state, or use default
-        user_id = getattr(request.state, 'user', None)
-        if user_id is None or not hasattr(user_id, 'id'):
-            # Try to get from query parameters or headers
-            user_id = request.query_params.get('user_id') or request.headers.get('X-User-ID')
-            
-            if not user_id:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="User ID is required"
-                )
-        else:
-            user_id = user_id.id
-        
-        with conn.cursor() as cursor:
-            # Check if the notification exists for this user
-            cursor.execute(
-                """
-                SELECT * FROM user_notifications 
-                WHERE notification_id = %s AND user_id = %s
-                """,
-                (notification_id, user_id)
-            )
-            
-            user_notification = cursor.fetchone()
-            
-            if not user_notification:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Notification not found for this user"
-                )
-            
-            # Mark as read if not already read
-            if not user_notification['is_read']:
-                cursor.execute(
-                    """
-                    UPDATE user_notifications 
-                    SET is_read = TRUE, read_at = NOW() 
-                    WHERE notification_id = %s AND user_id = %s
-                    """,
-                    (notification_id, user_id)
-                )
-                
-                conn.commit()
-            
-            return {"message": "Notification marked as read"}
-    except HTTPException:
-        raise
-    except Exception as e:
-        conn.rollback()
-        print(f"Error marking notification as read: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error marking notification as read"
-        )
+    """Mark a notification as read for the current user"""
+    return USER_INBOX.mark_read(conn, notification_id, request)
 
 @router.patch("/notifications/read-all")
-async def mark_all_notifications_as_read(
+def mark_all_notifications_as_read(
     request: Request,
     conn = Depends(get_db_connection)
 ):
-    """Mark all notifications as read for a user"""
-    try:
-        # Get user ID from request state, or use default
-        user_id = getattr(request.state, 'user', None)
-        if user_id is None or not hasattr(user_id, 'id'):
-            # Try to get from query parameters or headers
-            user_id = request.query_params.get('user_id') or request.headers.get('X-User-ID')
-            
-            if not user_id:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="User ID is required"
-                )
-        else:
-            user_id = user_id.id
-        
-        with conn.cursor() as cursor:
-            cursor.execute(
-                """
-                UPDATE user_notifications 
-                SET is_read = TRUE, read_at = NOW() 
-                WHERE user_id = %s AND is_read = FALSE
-                """,
-                (user_id,)
-            )
-            
-            updated_count = cursor.rowcount
-            conn.commit()
-            
-            return {"message": f"Marked {updated_count} notifications as read"}
-    except HTTPException:
-        raise
-    except Exception as e:
-        conn.rollback()
-        print(f"Error marking all notifications as read: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error marking all notifications as read"
-        )
+    """Mark all notifications as read for the current user"""
+    return USER_INBOX.mark_all_read(conn, request)
 
 @router.get("/notifications/unread-count")
-async def get_unread_notification_count(
+def get_unread_notification_count(
     request: Request,
     conn = Depends(get_db_connection)
 ):
-    """Get the count of unread notifications for a user"""
-    try:
-        # Get user ID from request state, or use default
-        user_id = getattr(request.state, 'user', None)
-        if user_id is None or not hasattr(user_id, 'id'):
-            # Try to get from query parameters or headers
-            user_id = request.query_params.get('user_id') or request.headers.get('X-User-ID')
-            
-            if not user_id:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="User ID is required"
-                )
-        else:
-            user_id = user_id.id
-        
-        with conn.cursor() as cursor:
-            cursor.execute(
-                """
-                SELECT COUNT(*) as count 
-                FROM user_notifications 
-                WHERE user_id = %s AND is_read = FALSE
-                """,
-                (user_id,)
-            )
-            
-            result = cursor.fetchone()
-            return {"count": result['count']}
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error getting unread notification count: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error getting unread notification count"
-        )
+    """Get the count of unread notifications for the current user"""
+    return USER_INBOX.unread_count(conn, request)
 
 @router.delete("/notifications/clear-all")
-async def clear_all_notifications(
+def clear_all_notifications(
     request: Request,
     conn = Depends(get_db_connection)
 ):
-    """Delete all notifications for a specific user from user_notifications table"""
-    try:
-        # Get user ID from request state, or use default
-        user_id = getattr(request.state, 'user', None)
-        if user_id is None or not hasattr(user_id, 'id'):
-            # Try to get from query parameters or headers
-            user_id = request.query_params.get('user_id') or request.headers.get('X-User-ID')
-            
-            if not user_id:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="User ID is required"
-                )
-        else:
-            user_id = user_id.id
-        
-        with conn.cursor() as cursor:
-            # Delete from user_notifications table only (not from notifications table)
-            # This ensures that only this user's association with notifications is removed
-            cursor.execute(
-                """
-                DELETE FROM user_notifications 
-                WHERE user_id = %s
-                """,
-                (user_id,)
-            )
-            
-            deleted_count = cursor.rowcount
-            conn.commit()
-            
-            return {"message": f"Cleared {deleted_count} notifications for user", "count": deleted_count}
-    except HTTPException:
-        raise
-    except Exception as e:
-        conn.rollback()
-        print(f"Error clearing notifications: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error clearing notifications"
-        )
+    """Clear all notifications from the current user's inbox"""
+    return USER_INBOX.clear(conn, request)
+
+@router.get("/dean-notifications", response_model=List[Dict[str, Any]])
+def get_dean_notifications(
+    response: Response,
+    filter_type: Optional[str] = None,
+    sort_by: str = "newest",
+    limit: int = NOTIFICATION_PAGE_SIZE,
+    after: Optional[str] = None,
+    conn = Depends(get_db_connection)
+):
+    """Get a page of notifications for the Dean user"""
+    return list_inbox_page(DEAN_INBOX, conn, response, None, filter_type, sort_by, limit, after)
 
 @router.patch("/dean-notifications/{notification_id}/read")
-async def mark_dean_notification_as_read(
+def mark_dean_notification_as_read(
     notification_id: int,
     conn = Depends(get_db_connection)
 ):
-    """Mark a notification as read for the Dean user, identified directly from the database"""
-    try:
-        # Find the Dean user directly from the database
-        with conn.cursor() as cursor:
-            # Get the Dean user ID from the database
-            cursor.execute("SELECT id FROM users WHERE role = 'Dean' LIMIT 1")
-            dean_result = cursor.fetchone()
-            
-            if not dean_result:
-                print("DEBUG: No Dean user found in the database")
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="No Dean user found in the database"
-                )
-            
-            dean_id = dean_result['id']
-            print(f"DEBUG: Found Dean user with ID: {dean_id}")
-            
-            # Check if the notification exists for the Dean
-            cursor.execute(
-                """
-                SELECT * FROM user_notifications 
-                WHERE notification_id = %s AND user_id = %s
-                """,
-                (notification_id, dean_id)
-            )
-            
-            user_notification = cursor.fetchone()
-            
-            if not user_notification:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Notification not found for Dean"
-                )
-            
-            # Mark as read if not already read
-            if not user_notification['is_read']:
-                cursor.execute(
-                    """
-                    UPDATE user_notifications 
-                    SET is_read = TRUE, read_at = NOW() 
-                    WHERE notification_id = %s AND user_id = %s
-                    """,
-                    (notification_id, dean_id)
-                )
-                
-                conn.commit()
-            
-            return {"message": "Dean notification marked as read"}
-    except HTTPException:
-        raise
-    except Exception as e:
-        conn.rollback()
-        print(f"Error marking Dean notification as read: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error marking Dean notification as read"
-        )
+    """Mark a notification as read for the Dean user"""
+    return DEAN_INBOX.mark_read(conn, notification_id)
 
 @router.patch("/dean-notifications/read-all")
-async def mark_all_dean_notifications_as_read(
+def mark_all_dean_notifications_as_read(
     conn = Depends(get_db_connection)
 ):
-    """Mark all notifications as read for the Dean user, identified directly from the database"""
-    try:
-        # Find the Dean user directly from the database
-        with conn.cursor() as cursor:
-            # Get the Dean user ID from the database
-            cursor.execute("SELECT id FROM users WHERE role = 'Dean' LIMIT 1")
-            dean_result = cursor.fetchone()
-            
-            if not dean_result:
-                print("DEBUG: No Dean user found in the database")
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="No Dean user found in the database"
-                )
-            
-            dean_id = dean_result['id']
-            print(f"DEBUG: Found Dean user with ID: {dean_id}")
-            
-            cursor.execute(
-                """
-                UPDATE user_notifications 
-                SET is_read = TRUE, read_at = NOW() 
-                WHERE user_id = %s AND is_read = FALSE
-                """,
-                (dean_id,)
-            )
-            
-            updated_count = cursor.rowcount
-            conn.commit()
-            
-            return {"message": f"Marked {updated_count} Dean notifications as read"}
-    except HTTPException:
-        raise
-    except Exception as e:
-        conn.rollback()
-        print(f"Error marking all Dean notifications as read: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error marking all Dean notifications as read"
-        )
+    """Mark all notifications as read for the Dean user"""
+    return DEAN_INBOX.mark_all_read(conn)
 
 @router.delete("/dean-notifications/clear-all")
-async def clear_all_dean_notifications(
+def clear_all_dean_notifications(
     conn = Depends(get_db_connection)
 ):
-    """Delete all notifications for the Dean user, identified directly from the database"""
-    try:
-        # Find the Dean user directly from the database
-        with conn.cursor() as cursor:
-            # Get the Dean user ID from the database
-            cursor.execute("SELECT id FROM users WHERE role = 'Dean' LIMIT 1")
-            dean_result = cursor.fetchone()
-            
-            if not dean_result:
-                print("DEBUG: No Dean user found in the database")
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="No Dean user found in the database"
-                )
-            
-            dean_id = dean_result['id']
-            print(f"DEBUG: Found Dean user with ID: {dean_id}")
-            
-            # Delete from user_notifications table only (not from notifications table)
-            cursor.execute(
-                """
-                DELETE FROM user_notifications 
-                WHERE user_id = %s
-                """,
-                (dean_id,)
-            )
-            
-            deleted_count = cursor.rowcount
-            conn.commit()
-            
-            return {"message": f"Cleared {deleted_count} notifications for Dean", "count": deleted_count}
-    except HTTPException:
-        raise
-    except Exception as e:
-        conn.rollback()
-        print(f"Error clearing Dean notifications: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error clearing Dean notifications"
-        )
+    """Clear all notifications from the Dean user's inbox"""
+    return DEAN_INBOX.clear(conn)
+
+@router.get("/dean-notifications/unread-count")
+def get_dean_unread_notification_count(
+    conn = Depends(get_db_connection)
+):
+    """Get the count of unread notifications for the Dean user"""
+    return DEAN_INBOX.unread_count(conn)
 
 @router.get("/acad-coor-notifications", response_model=List[Dict[str, Any]])
-async def get_acad_coor_notifications(
+def get_acad_coor_notifications(
+    response: Response,
     filter_type: Optional[str] = None,
     sort_by: str = "newest",
+    limit: int = NOTIFICATION_PAGE_SIZE,
+    after: Optional[str] = None,
     conn = Depends(get_db_connection)
 ):
-    """Get notifications for the Academic Coordinator user, identified directly from the database"""
-    try:
-        print(f"DEBUG: Received Academic Coordinator notifications request with filter_type={filter_type}, sort_by={sort_by}")
-        
-        # Find the Academic Coordinator user directly from the database
-        with conn.cursor() as cursor:
-            # Get the Academic Coordinator user ID from the database
-            cursor.execute("SELECT id FROM users WHERE role = 'Academic Coordinator' LIMIT 1")
-            acad_coor_result = cursor.fetchone()
-            
-            if not acad_coor_result:
-                print("DEBUG: No Academic Coordinator user found in the database")
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="No Academic Coordinator user found in the database"
-                )
-            
-            acad_coor_id = acad_coor_result['id']
-            print(f"DEBUG: Found Academic Coordinator user with ID: {acad_coor_id}")
-            
-            # Check if Academic Coordinator has any notifications
-            cursor.execute(
-                "SELECT COUNT(*) as count FROM user_notifications WHERE user_id = %s",
-                (acad_coor_id,)
-            )
-            notification_count = cursor.fetchone()['count']
-            print(f"DEBUG: Academic Coordinator has {notification_count} notifications in user_notifications table")
-            
-            # Base query
-            query = """
-            SELECT n.*, un.is_read, un.read_at
-            FROM notifications n
-            JOIN user_notifications un ON n.id = un.notification_id
-            WHERE un.user_id = %s
-            """
-            
-            params = [acad_coor_id]
-            
-            # Add filter condition if provided
-            if filter_type and filter_type != "all":
-                query += " AND n.related_to = %s"
-                params.append(filter_type)
-            
-            # Add sorting
-            if sort_by == "oldest":
-                query += " ORDER BY n.created_at ASC"
-            else:
-                query += " ORDER BY n.created_at DESC"
-            
-            print(f"DEBUG: Executing SQL for Academic Coordinator: {query} with params: {params}")
-            cursor.execute(query, params)
-            notifications = cursor.fetchall()
-            print(f"DEBUG: Found {len(notifications)} notifications for Academic Coordinator")
-            
-            # Convert datetime objects to strings for JSON serialization
-            for notification in notifications:
-                notification['created_at'] = notification['created_at'].isoformat()
-                if notification['read_at']:
-                    notification['read_at'] = notification['read_at'].isoformat()
-            
-            return notifications
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error fetching Academic Coordinator notifications: {str(e)}")
-        import traceback
-        print(f"DEBUG: Traceback: {traceback.format_exc()}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error fetching Academic Coordinator notifications: {str(e)}"
-        )
+    """Get a page of notifications for the Academic Coordinator user"""
+    return list_inbox_page(ACAD_COOR_INBOX, conn, response, None, filter_type, sort_by, limit, after)
 
 @router.patch("/acad-coor-notifications/{notification_id}/read")
-async def mark_acad_coor_notification_as_read(
+def mark_acad_coor_notification_as_read(
     notification_id: int,
     conn = Depends(get_db_connection)
 ):
-    """Mark a notification as read for the Academic Coordinator user, identified directly from the database"""
-    try:
-        # Find the Academic Coordinator user directly from the database
-        with conn.cursor() as cursor:
-            # Get the Academic Coordinator user ID from the database
-            cursor.execute("SELECT id FROM users WHERE role = 'Academic Coordinator' LIMIT 1")
-            acad_coor_result = cursor.fetchone()
-            
-            if not acad_coor_result:
-                print("DEBUG: No Academic Coordinator user found in the database")
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="No Academic Coordinator user found in the database"
-                )
-            
-            acad_coor_id = acad_coor_result['id']
-            print(f"DEBUG: Found Academic Coordinator user with ID: {acad_coor_id}")
-            
-            # Check if the notification exists for the Academic Coordinator
-            cursor.execute(
-                """
-                SELECT * FROM user_notifications 
-                WHERE notification_id = %s AND user_id = %s
-                """,
-                (notification_id, acad_coor_id)
-            )
-            
-            user_notification = cursor.fetchone()
-            
-            if not user_notification:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Notification not found for Academic Coordinator"
-                )
-            
-            # Mark as read if not already read
-            if not user_notification['is_read']:
-                cursor.execute(
-                    """
-                    UPDATE user_notifications 
-                    SET is_read = TRUE, read_at = NOW() 
-                    WHERE notification_id = %s AND user_id = %s
-                    """,
-                    (notification_id, acad_coor_id)
-                )
-                
-                conn.commit()
-            
-            return {"message": "Academic Coordinator notification marked as read"}
-    except HTTPException:
-        raise
-    except Exception as e:
-        conn.rollback()
-        print(f"Error marking Academic Coordinator notification as read: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error marking Academic Coordinator notification as read"
-        )
+    """Mark a notification as read for the Academic Coordinator user"""
+    return ACAD_COOR_INBOX.mark_read(conn, notification_id)
 
 @router.patch("/acad-coor-notifications/read-all")
-async def mark_all_acad_coor_notifications_as_read(
+def mark_all_acad_coor_notifications_as_read(
     conn = Depends(get_db_connection)
 ):
-    """Mark all notifications as read for the Academic Coordinator user, identified directly from the database"""
-    try:
-        # Find the Academic Coordinator user directly from the database
-        with conn.cursor() as cursor:
-            # Get the Academic Coordinator user ID from the database
-            cursor.execute("SELECT id FROM users WHERE role = 'Academic Coordinator' LIMIT 1")
-            acad_coor_result = cursor.fetchone()
-            
-            if not acad_coor_result:
-                print("DEBUG: No Academic Coordinator user found in the database")
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="No Academic Coordinator user found in the database"
-                )
-            
-            acad_coor_id = acad_coor_result['id']
-            print(f"DEBUG: Found Academic Coordinator user with ID: {acad_coor_id}")
-            
-            cursor.execute(
-                """
-                UPDATE user_notifications 
-                SET is_read = TRUE, read_at = NOW() 
-                WHERE user_id = %s AND is_read = FALSE
-                """,
-                (acad_coor_id,)
-            )
-            
-            updated_count = cursor.rowcount
-            conn.commit()
-            
-            return {"message": f"Marked {updated_count} Academic Coordinator notifications as read"}
-    except HTTPException:
-        raise
-    except Exception as e:
-        conn.rollback()
-        print(f"Error marking all Academic Coordinator notifications as read: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error marking all Academic Coordinator notifications as read"
-        )
+    """Mark all notifications as read for the Academic Coordinator user"""
+    return ACAD_COOR_INBOX.mark_all_read(conn)
 
 @router.delete("/acad-coor-notifications/clear-all")
-async def clear_all_acad_coor_notifications(
-    conn = Depends(get_db_connection)
-):
-    """Delete all notifications for the Academic Coordinator user, identified directly from the database"""
-    try:
-        # Find the Academic Coordinator user directly from the database
-        with conn.cursor() as cursor:
-            # Get the Academic Coordinator user ID from the database
-            cursor.execute("SELECT id FROM users WHERE role = 'Academic Coordinator' LIMIT 1")
-            acad_coor_result = cursor.fetchone()
-            
-            if not acad_coor_result:
-                print("DEBUG: No Academic Coordinator user found in the database")
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="No Academic Coordinator user found in the database"
-                )
-            
-            acad_coor_id = acad_coor_result['id']
-            print(f"DEBUG: Found Academic Coordinator user with ID: {acad_coor_id}")
-            
-            # Delete from user_notifications table only (not from notifications table)
-            cursor.execute(
-                """
-                DELETE FROM user_notifications 
-                WHERE user_id = %s
-                """,
-                (acad_coor_id,)
-            )
-            
-            deleted_count = cursor.rowcount
-            conn.commit()
-            
-            return {"message": f"Cleared {deleted_count} notifications for Academic Coordinator", "count": deleted_count}
-    except HTTPException:
-        raise
-    except Exception as e:
-        conn.rollback()
-        print(f"Error clearing Academic Coordinator notifications: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error clearing Academic Coordinator notifications"
-        )
-
-@router.get("/dean-notifications/unread-count")
-async def get_dean_unread_notification_count(
+def clear_all_acad_coor_notifications(
     conn = Depends(get_db_connection)
 ):
-    """Get the count of unread notifications for the Dean user, identified directly from the database"""
-    try:
-        # Find the Dean user directly from the database
-        with conn.cursor() as cursor:
-            # Get the Dean user ID from the database
-            cursor.execute("SELECT id FROM users WHERE role = 'Dean' LIMIT 1")
-            dean_result = cursor.fetchone()
-            
-            if not dean_result:
-                print("DEBUG: No Dean user found in the database")
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="No Dean user found in the database"
-                )
-            
-            dean_id = dean_result['id']
-            print(f"DEBUG: Found Dean user with ID: {dean_id}")
-            
-            cursor.execute(
-                """
-                SELECT COUNT(*) as count 
-                FROM user_notifications 
-                WHERE user_id = %s AND is_read = FALSE
-                """,
-                (dean_id,)
-            )
-            
-            result = cursor.fetchone()
-            print(f"DEBUG: Dean has {result['count']} unread notifications")
-            return {"count": result['count']}
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error getting Dean unread notification count: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error getting Dean unread notification count"
-        )
+    """Clear all notifications from the Academic Coordinator user's inbox"""
+    return ACAD_COOR_INBOX.clear(conn)
 
 @router.get("/acad-coor-notifications/unread-count")
-async def get_acad_coor_unread_notification_count(
+def get_acad_coor_unread_notification_count(
     conn = Depends(get_db_connection)
 ):
-    """Get the count of unread notifications for the Academic Coordinator user, identified directly from the database"""
-    try:
-        # Find the Academic Coordinator user directly from the database
-        with conn.cursor() as cursor:
-            # Get the Academic Coordinator user ID from the database
-            cursor.execute("SELECT id FROM users WHERE role = 'Academic Coordinator' LIMIT 1")
-            acad_coor_result = cursor.fetchone()
-            
-            if not acad_coor_result:
-                print("DEBUG: No Academic Coordinator user found in the database")
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="No Academic Coordinator user found in the database"
-                )
-            
-            acad_coor_id = acad_coor_result['id']
-            print(f"DEBUG: Found Academic Coordinator user with ID: {acad_coor_id}")
-            
-            cursor.execute(
-                """
-                SELECT COUNT(*) as count 
-                FROM user_notifications 
-                WHERE user_id = %s AND is_read = FALSE
-                """,
-                (acad_coor_id,)
-            )
-            
-            result = cursor.fetchone()
-            print(f"DEBUG: Academic Coordinator has {result['count']} unread notifications")
-            return {"count": result['count']}
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error getting Academic Coordinator unread notification count: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error getting Academic Coordinator unread notification count"
-        ) 
\ No newline at end of file
+    """Get the count of unread notifications for the Academic Coordinator user"""
+    return ACAD_COOR_INBOX.unread_count(conn)
+
+
+def list_inbox_page(scope, conn, response, request, filter_type, sort_by, limit, after):
+    notifications, next_cursor = scope.list_page(conn, request, filter_type, sort_by, limit, after)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return notifications
@@ -11,9 +11,22 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from main import get_db_connection, get_current_user
+from schedule_conflicts import (
+    ScheduleConflictEngine,
+    conflict_engine,
+    time_to_minutes,
+    weekday_code,
+    weekday_name,
+    sweep_overlaps
+)
+
+# Allowed scheduling window in minutes since midnight (7:30 AM - 8:00 PM)
+SCHEDULE_DAY_START_MINUTE = 7 * 60 + 30
+SCHEDULE_DAY_END_MINUTE = 20 * 60
 
 # Import notification functions
 from routes.notifications import create_schedule_approval_notification, create_schedule_pending_notification
+from schedule_changes import record_schedule_changes, record_schedule_tombstones, schedule_sync_worker
 
 # Function to convert "HH:MM AM/PM" format to "HH:MM:SS" 24-hour format
 def convert_time_format(time_str):
@@ -53,106 +66,58 @@ def check_schedule_conflicts(
     Check for scheduling conflicts in the same semester, time, day (including second day), and room.
     Returns a tuple (has_conflict, conflict_details) where conflict_details provides information
     about the conflicting schedule if a conflict exists.
+    
+    Conflicts are answered from the in-process interval index (schedule_conflicts.conflict_engine),
+    which compares times as minutes rather than strings. Two schedules conflict when they share a
+    room and a weekday and their [start, end) ranges overlap; back-to-back slots do not conflict.
     """
     
     try:
-        with conn.cursor() as cursor:
-            # Base query to find conflicts
-            query = """
-            SELECT s.*, l.name as lab_room_name, sem.name as semester_name 
-            FROM schedules s
-            JOIN lab_rooms l ON s.lab_room_id = l.id 
-            JOIN semesters sem ON s.semester_id = sem.id 
-            WHERE 
-                s.semester_id = %s 
-                AND s.lab_room_id = %s
-                AND (
-                    -- Case 1: The existing schedule conflicts with the main day of the new schedule
-                    (
-                        (s.day = %s) 
-                        AND (
-                            (s.start_time <= %s AND s.end_time > %s) OR  -- Existing schedule starts before and ends during/after
-                            (s.start_time >= %s AND s.start_time < %s) OR  -- Existing schedule starts during
-                            (s.start_time <= %s AND s.end_time >= %s)  -- New schedule falls completely within existing schedule
-                        )
-                    )
-                    -- Case 2: The existing schedule conflicts with the second day of the new schedule (if it exists)
-                    OR (
-                        %s IS NOT NULL 
-                        AND (s.day = %s)
-                        AND (
-                            (s.start_time <= %s AND s.end_time > %s) OR
-                            (s.start_time >= %s AND s.start_time < %s) OR
-                            (s.start_time <= %s AND s.end_time >= %s)
-                        )
-                    )
-                    -- Case 3: The main day of the existing schedule conflicts with the second day of the new schedule
-                    OR (
-                        %s IS NOT NULL
-                        AND (s.day = %s)
-                        AND (
-                            (s.start_time <= %s AND s.end_time > %s) OR
-                            (s.start_time >= %s AND s.start_time < %s) OR
-                            (s.start_time <= %s AND s.end_time >= %s)
-                        )
-                    )
-                    -- Case 4: The second day of the existing schedule conflicts with the main/second day of the new schedule
-                    OR (
-                        s.second_day IS NOT NULL
-                        AND (
-                            (s.second_day = %s) OR (%s IS NOT NULL AND s.second_day = %s)
-                        )
-                        AND (
-                            (s.start_time <= %s AND s.end_time > %s) OR
-                            (s.start_time >= %s AND s.start_time < %s) OR
-                            (s.start_time <= %s AND s.end_time >= %s)
-                        )
-                    )
-                )
-            """
-            
-            params = [
-                semester_id, lab_room_id,
-                # Case 1 parameters
-                day, end_time, start_time, start_time, end_time, start_time, end_time,
-                # Case 2 parameters
-                second_day, second_day, end_time, start_time, start_time, end_time, start_time, end_time,
-                # Case 3 parameters
-                second_day, second_day, end_time, start_time, start_time, end_time, start_time, end_time,
-                # Case 4 parameters
-                day, second_day, second_day, end_time, start_time, start_time, end_time, start_time, end_time
-            ]
-            
-            # If updating an existing schedule, exclude it from conflict check
-            if current_schedule_id:
-                query += " AND s.id != %s"
-                params.append(current_schedule_id)
-            
-            cursor.execute(query, params)
-            conflicts = cursor.fetchall()
-            
-            if conflicts:
-                conflict = conflicts[0]
-                conflict_details = {
-                    'id': conflict['id'],
-                    'course_code': conflict['course_code'],
-                    'section': conflict['section'],
-                    'day': conflict['day'],
-                    'second_day': conflict['second_day'],
-                    'lab_room_name': conflict['lab_room_name'],
-                    'start_time': conflict['start_time'],
-                    'end_time': conflict['end_time'],
-                    'status': conflict['status']
-                }
-                return True, conflict_details
-            
-            return False, None
+        conflict_engine.ensure_semester(conn, semester_id)
+        conflicts = conflict_engine.find_conflicts(
+            semester_id,
+            lab_room_id,
+            day,
+            second_day,
+            start_time,
+            end_time,
+            exclude_id=current_schedule_id
+        )
+        
+        if conflicts:
+            return True, conflicts[0].conflict_details()
+        
+        return False, None
             
     except Exception as e:
         print(f"Error checking schedule conflicts: {str(e)}")
         # Don't raise an exception here, let the calling function handle it
         return False, {"error": str(e)}
 
+def format_conflict_message(conflict_details):
+    """Human-readable 409 detail for a conflict returned by check_schedule_conflicts"""
+    conflict_msg = f"Schedule conflict detected with: {conflict_details['course_code']} ({conflict_details['section']})"
+    conflict_msg += f", on {conflict_details['day']}"
+    if conflict_details['second_day']:
+        conflict_msg += f"/{conflict_details['second_day']}"
+    conflict_msg += f" from {conflict_details['start_time']} to {conflict_details['end_time']}"
+    conflict_msg += f" in {conflict_details['lab_room_name']}"
+    conflict_msg += f" (Status: {conflict_details['status']})"
+    return conflict_msg
+
+def refresh_conflict_index(conn, schedule_id=None, deleted=False):
+    """Apply a committed schedule write to the conflict index; on failure drop the index so it reloads"""
+    try:
+        if schedule_id is None:
+            conflict_engine.clear()
+        elif deleted:
+            conflict_engine.remove_schedule(conn, schedule_id)
+        else:
+            conflict_engine.refresh_schedule(conn, schedule_id)
+    except Exception as e:
+        print(f"Error updating conflict index, clearing it: {str(e)}")
+        conflict_engine.clear()
+
 # Function to validate time constraints (7:30 AM - 8:00 PM)
 def validate_schedule_time_constraints(start_time, end_time):
     """
@@ -163,36 +128,19 @@ def validate_schedule_time_constraints(start_time, end_time):
     Returns a tuple (is_valid, error_message)
     """
     try:
-        # Convert times to standardized format for comparison
         # Expected format is like "9:00 AM" or "2:30 PM"
         min_time = "07:30 AM"
         max_time = "08:00 PM"
+        min_minutes = SCHEDULE_DAY_START_MINUTE
+        max_minutes = SCHEDULE_DAY_END_MINUTE
         
-        # Function to convert time string to minutes for easy comparison
-        def convert_to_minutes(time_str):
-            # Parse time string (format: "HH:MM AM/PM")
-            parts = time_str.split()
-            if len(parts) != 2:
-                raise ValueError(f"Invalid time format: {time_str}")
-                
-            time_part = parts[0]
-            period = parts[1]
-            
-            hour, minute = map(int, time_part.split(':'))
-            
-            # Convert to 24-hour format for comparison
-            if period == 'PM' and hour < 12:
-                hour += 12
-            elif period == 'AM' and hour == 12:
-                hour = 0
-                
-            return hour * 60 + minute
-        
-        # Convert all times to minutes for comparison
-        start_minutes = convert_to_minutes(start_time)
-        end_minutes = convert_to_minutes(end_time)
-        min_minutes = convert_to_minutes(min_time)
-        max_minutes = convert_to_minutes(max_time)
+        # Convert times to minutes since midnight for comparison
+        start_minutes = time_to_minutes(start_time)
+        if start_minutes is None:
+            raise ValueError(f"Invalid time format: {start_time}")
+        end_minutes = time_to_minutes(end_time)
+        if end_minutes is None:
+            raise ValueError(f"Invalid time format: {end_time}")
         
         # Validate constraints
         if start_minutes < min_minutes:
@@ -237,8 +185,53 @@ class BulkScheduleStatusUpdate(BaseModel):
     status: str
     semester_id: Optional[int] = None
 
+class ScheduleConflictCandidate(BaseModel):
+    id: Optional[int] = None  # Set when the candidate replaces an existing schedule
+    lab_room_id: int
+    day: str
+    second_day: Optional[str] = None
+    start_time: str
+    end_time: str
+    course_code: Optional[str] = None
+    section: Optional[str] = None
+
+class BatchConflictCheck(BaseModel):
+    semester_id: int
+    schedules: List[ScheduleConflictCandidate]
+
+# Upper bound on candidates per batch conflict check
+MAX_BATCH_CONFLICT_CANDIDATES = 5000
+
+class BulkScheduleCreate(BaseModel):
+    schedules: List[ScheduleCreate]
+    all_or_nothing: bool = False  # Insert nothing if any row is rejected
+
+# Upper bound on rows per bulk create, and rows per multi-row INSERT statement
+MAX_BULK_CREATE_SCHEDULES = 5000
+BULK_INSERT_CHUNK_SIZE = 500
+
+def get_schedule_creator_id(request: Request, current_user):
+    """User ID for created_by - extracted from the request data when a fallback token is used"""
+    user_id = current_user.id
+    auth_header = request.headers.get("Authorization")
+    if auth_header and "user_fallback_token_" in auth_header:
+        # Extract user ID from request cookies or query params
+        user_str = request.cookies.get('user') or request.query_params.get('user')
+        if not user_str:
+            # Try to get from headers
+            user_str = request.headers.get('X-User-Data')
+        
+        if user_str:
+            try:
+                user_data = json.loads(user_str)
+                user_id = user_data.get('id')
+                print(f"Extracted user ID from request data: {user_id}")
+            except Exception as e:
+                print(f"Error extracting user ID from request data: {str(e)}")
+    return user_id
+
 @router.get("/schedules")
-async def get_schedules(
+def get_schedules(
     semester_id: Optional[int] = None,
     conn = Depends(get_db_connection)
 ):
@@ -257,7 +250,9 @@ async def get_schedules(
                 query += " AND s.semester_id = %s"
                 params.append(semester_id)
             
-            query += " ORDER BY s.day, s.start_time"
+            # Weekday code and minute columns sort in calendar order (no index leads with them,
+            # so MySQL sorts the filtered rows)
+            query += " ORDER BY s.day_code, s.start_minute, s.id"
             
             cursor.execute(query, params)
             schedules = cursor.fetchall()
@@ -275,7 +270,7 @@ async def get_schedules(
         )
 
 @router.post("/schedules", status_code=status.HTTP_201_CREATED)
-async def create_schedule(
+def create_schedule(
     schedule: ScheduleCreate,
     request: Request,
     conn = Depends(get_db_connection),
@@ -285,25 +280,7 @@ async def create_schedule(
         # Debug: Print received schedule data
         print("Received schedule data:", schedule.dict())
         
-        # Get user ID - extract from Authorization header if it's a fallback token
-        user_id = current_user.id
-        auth_header = request.headers.get("Authorization")
-        if auth_header and "user_fallback_token_" in auth_header:
-            # Extract user ID from request cookies or query params
-            user_str = request.cookies.get('user') or request.query_params.get('user')
-            if not user_str:
-                # Try to get from headers
-                user_str = request.headers.get('X-User-Data')
-            
-            if user_str:
-                try:
-                    # Using global json import instead of reimporting
-                    user_data = json.loads(user_str)
-                    user_id = user_data.get('id')
-                    print(f"Extracted user ID from request data: {user_id}")
-                except Exception as e:
-                    print(f"Error extracting user ID from request data: {str(e)}")
-        
+        user_id = get_schedule_creator_id(request, current_user)
         print(f"Using user ID {user_id} for created_by field")
         
         # Validate class_type
@@ -337,18 +314,9 @@ async def create_schedule(
         )
         
         if has_conflict:
-            # Prepare conflict message with details
-            conflict_msg = f"Schedule conflict detected with: {conflict_details['course_code']} ({conflict_details['section']})"
-            conflict_msg += f", on {conflict_details['day']}"
-            if conflict_details['second_day']:
-                conflict_msg += f"/{conflict_details['second_day']}"
-            conflict_msg += f" from {conflict_details['start_time']} to {conflict_details['end_time']}"
-            conflict_msg += f" in {conflict_details['lab_room_name']}"
-            conflict_msg += f" (Status: {conflict_details['status']})"
-            
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
-                detail=conflict_msg
+                detail=format_conflict_message(conflict_details)
             )
         
         # For start_time and end_time, keep them as is (since they're varchar in the database)
@@ -378,9 +346,10 @@ async def create_schedule(
                     semester_id, section, course_code, course_name,
                     day, second_day, lab_room_id, instructor_name, 
                     start_time, end_time, schedule_types, class_type,
-                    status, created_by, created_at, updated_at
+                    status, created_by, start_minute, end_minute,
+                    day_code, second_day_code, created_at, updated_at
                 ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW()
+                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW()
                 )
                 """,
                 (
@@ -390,11 +359,14 @@ async def create_schedule(
                     schedule.lab_room_id, schedule.instructor_name[:100],
                     schedule.start_time[:10], schedule.end_time[:10], 
                     json.dumps(schedule.schedule_types),
-                    schedule.class_type, 'draft', user_id
+                    schedule.class_type, 'draft', user_id,
+                    time_to_minutes(schedule.start_time), time_to_minutes(schedule.end_time),
+                    weekday_code(schedule.day), weekday_code(schedule.second_day)
                 )
             )
             
             schedule_id = cursor.lastrowid
+            record_schedule_changes(cursor, [schedule_id])
             
             # Log the action
             try:
@@ -420,6 +392,8 @@ async def create_schedule(
                 print(f"Error logging to audit_log but continuing: {str(log_error)}")
             
             conn.commit()
+            schedule_sync_worker.wake()
+            refresh_conflict_index(conn, schedule_id)
             
             return {
                 "id": schedule_id,
@@ -439,8 +413,329 @@ async def create_schedule(
             detail=f"Error creating schedule: {str(e)}"
         )
 
+@router.post("/schedules/conflicts:batch")
+def read_inserted_schedule_ids(cursor, first_id, rows, created_by, created_at):
+    """
+    Ids of rows just inserted by one multi-row INSERT, in row order. The ids
+    increase in row order but need not be consecutive (innodb_autoinc_lock_mode=2,
+    auto_increment_increment > 1), so they are read back from first_id on and
+    matched to the rows on their natural key; rows of other inserts interleaved
+    with this one are skipped.
+    """
+    cursor.execute(
+        """
+        SELECT id, semester_id, section, course_code, day, start_minute
+        FROM schedules
+        WHERE id >= %s AND created_by = %s AND created_at = %s
+        ORDER BY id
+        """,
+        (first_id, created_by, created_at)
+    )
+    inserted = cursor.fetchall()
+    ids = []
+    for row in inserted:
+        if len(ids) == len(rows):
+            break
+        expected = rows[len(ids)]
+        if (row['semester_id'], row['section'], row['course_code'], row['day'], row['start_minute']) == (
+            expected[0], expected[1], expected[2], expected[4], expected[14]
+        ):
+            ids.append(row['id'])
+    if len(ids) != len(rows):
+        raise RuntimeError(f"Read back {len(ids)} of {len(rows)} inserted schedule ids")
+    return ids
+
+
+def check_schedule_conflicts_batch(
+    batch: BatchConflictCheck,
+    conn = Depends(get_db_connection)
+):
+    """
+    Validate a whole draft timetable in one call.
+    Returns every conflict between the candidates and the saved schedules of the semester,
+    and among the candidates themselves. Candidates with an id replace that saved schedule.
+    """
+    try:
+        if len(batch.schedules) > MAX_BATCH_CONFLICT_CANDIDATES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {MAX_BATCH_CONFLICT_CANDIDATES} schedules can be checked at once"
+            )
+        
+        conflict_engine.ensure_semester(conn, batch.semester_id)
+        replaced_ids = {candidate.id for candidate in batch.schedules if candidate.id is not None}
+        existing = [
+            item for item in conflict_engine.semester_intervals(batch.semester_id)
+            if item.id not in replaced_ids
+        ]
+        
+        # Candidates come first so slot positions below len(candidates) identify them
+        errors = []
+        slots = []
+        for index, candidate in enumerate(batch.schedules):
+            is_valid_time, error_message = validate_schedule_time_constraints(
+                candidate.start_time,
+                candidate.end_time
+            )
+            start_minute = time_to_minutes(candidate.start_time)
+            end_minute = time_to_minutes(candidate.end_time)
+            if is_valid_time and end_minute <= start_minute:
+                is_valid_time, error_message = False, "End time must be later than start time"
+            if not is_valid_time:
+                errors.append({"index": index, "id": candidate.id, "detail": error_message})
+                start_minute = end_minute = None
+            slots.append((candidate.lab_room_id, candidate.day, candidate.second_day, start_minute, end_minute))
+        for item in existing:
+            slots.append((item.lab_room_id, item.day, item.second_day, item.start_minute, item.end_minute))
+        
+        candidate_count = len(batch.schedules)
+        conflicts = []
+        for (first, second), weekdays in sorted(sweep_overlaps(slots).items()):
+            if first >= candidate_count:
+                # Both sides are saved schedules; not something this batch introduces
+                continue
+            candidate = batch.schedules[first]
+            conflict = {
+                "index": first,
+                "id": candidate.id,
+                "course_code": candidate.course_code,
+                "section": candidate.section,
+                "days": [weekday_name(weekday) for weekday in weekdays]
+            }
+            if second < candidate_count:
+                other = batch.schedules[second]
+                conflict["conflicts_with"] = {
+                    "type": "candidate",
+                    "index": second,
+                    "id": other.id,
+                    "course_code": other.course_code,
+                    "section": other.section,
+                    "day": other.day,
+                    "second_day": other.second_day,
+                    "start_time": other.start_time,
+                    "end_time": other.end_time
+                }
+            else:
+                conflict["conflicts_with"] = dict(
+                    existing[second - candidate_count].conflict_details(),
+                    type="existing"
+                )
+            conflicts.append(conflict)
+        
+        return {
+            "semester_id": batch.semester_id,
+            "checked": candidate_count,
+            "has_conflicts": bool(conflicts),
+            "conflict_count": len(conflicts),
+            "conflicts": conflicts,
+            "errors": errors
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error checking batch schedule conflicts: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error checking schedule conflicts: {str(e)}"
+        )
+
+@router.post("/schedules/bulk")
+def create_schedules_bulk(
+    bulk: BulkScheduleCreate,
+    request: Request,
+    conn = Depends(get_db_connection),
+    current_user = Depends(get_current_user)
+):
+    """
+    Create many draft schedules in one transaction.
+    Rows are validated in order exactly like POST /schedules, including conflicts with rows
+    accepted earlier in the same request, and the result of every row is reported by index.
+    """
+    try:
+        if not bulk.schedules:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No schedules provided"
+            )
+        if len(bulk.schedules) > MAX_BULK_CREATE_SCHEDULES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {MAX_BULK_CREATE_SCHEDULES} schedules can be created at once"
+            )
+        
+        user_id = get_schedule_creator_id(request, current_user)
+        print(f"Bulk creating {len(bulk.schedules)} schedules for user {user_id}")
+        
+        # Validate foreign keys once per distinct id
+        semester_ids = sorted({schedule.semester_id for schedule in bulk.schedules})
+        lab_room_ids = sorted({schedule.lab_room_id for schedule in bulk.schedules})
+        with conn.cursor() as cursor:
+            placeholders = ", ".join(["%s"] * len(semester_ids))
+            cursor.execute(f"SELECT id FROM semesters WHERE id IN ({placeholders})", semester_ids)
+            known_semesters = {row['id'] for row in cursor.fetchall()}
+            
+            placeholders = ", ".join(["%s"] * len(lab_room_ids))
+            cursor.execute(f"SELECT id, name FROM lab_rooms WHERE id IN ({placeholders})", lab_room_ids)
+            lab_room_names = {row['id']: row['name'] for row in cursor.fetchall()}
+        
+        for semester_id in semester_ids:
+            if semester_id in known_semesters:
+                conflict_engine.ensure_semester(conn, semester_id)
+        
+        # Rows accepted so far in this request, indexed like the saved schedules
+        accepted_index = ScheduleConflictEngine()
+        results = []
+        rows = []
+        for index, schedule in enumerate(bulk.schedules):
+            def reject(status_code, detail):
+                results.append({"index": index, "status": "error", "status_code": status_code, "detail": detail})
+            
+            if schedule.class_type not in ['lab', 'lec', 'lab/lec']:
+                reject(status.HTTP_400_BAD_REQUEST, "class_type must be 'lab', 'lec', or 'lab/lec'")
+                continue
+            
+            is_valid_time, error_message = validate_schedule_time_constraints(
+                schedule.start_time,
+                schedule.end_time
+            )
+            if not is_valid_time:
+                reject(status.HTTP_400_BAD_REQUEST, error_message)
+                continue
+            
+            if schedule.semester_id not in known_semesters:
+                reject(status.HTTP_400_BAD_REQUEST, f"Semester with ID {schedule.semester_id} does not exist")
+                continue
+            if schedule.lab_room_id not in lab_room_names:
+                reject(status.HTTP_400_BAD_REQUEST, f"Lab room with ID {schedule.lab_room_id} does not exist")
+                continue
+            
+            slot = (
+                schedule.semester_id, schedule.lab_room_id, schedule.day, schedule.second_day,
+                schedule.start_time, schedule.end_time
+            )
+            conflicts = conflict_engine.find_conflicts(*slot) or accepted_index.find_conflicts(*slot)
+            if conflicts:
+                reject(status.HTTP_409_CONFLICT, format_conflict_message(conflicts[0].conflict_details()))
+                continue
+            
+            # Negative ids keep batch rows apart from saved schedules in the conflict details
+            accepted_index.add_interval({
+                'id': -(index + 1),
+                'semester_id': schedule.semester_id,
+                'lab_room_id': schedule.lab_room_id,
+                'day': schedule.day,
+                'second_day': schedule.second_day,
+                'start_time': schedule.start_time,
+                'end_time': schedule.end_time,
+                'course_code': schedule.course_code,
+                'section': schedule.section,
+                'status': 'draft',
+                'lab_room_name': lab_room_names[schedule.lab_room_id]
+            })
+            results.append({"index": index, "status": "created"})
+            rows.append((
+                schedule.semester_id, schedule.section[:20],
+                schedule.course_code[:20], schedule.course_name[:100],
+                schedule.day[:10], schedule.second_day[:10] if schedule.second_day else None,
+                schedule.lab_room_id, schedule.instructor_name[:100],
+                schedule.start_time[:10], schedule.end_time[:10],
+                json.dumps(schedule.schedule_types),
+                schedule.class_type, 'draft', user_id,
+                time_to_minutes(schedule.start_time), time_to_minutes(schedule.end_time),
+                weekday_code(schedule.day), weekday_code(schedule.second_day)
+            ))
+        
+        failed_count = len(bulk.schedules) - len(rows)
+        if bulk.all_or_nothing and failed_count:
+            for result in results:
+                if result["status"] == "created":
+                    result["status"] = "skipped"
+            return {
+                "message": f"No schedules created: {failed_count} of {len(bulk.schedules)} rows were rejected",
+                "created_count": 0,
+                "failed_count": failed_count,
+                "results": results
+            }
+        
+        created_ids = []
+        # Whole seconds, as DATETIME stores them, so read_inserted_schedule_ids can match on it
+        created_at = datetime.now().replace(microsecond=0)
+        with conn.cursor() as cursor:
+            for chunk_start in range(0, len(rows), BULK_INSERT_CHUNK_SIZE):
+                chunk = rows[chunk_start:chunk_start + BULK_INSERT_CHUNK_SIZE]
+                # pymysql only sends one multi-row INSERT when VALUES holds nothing but
+                # placeholders (so no NOW() here)
+                cursor.executemany(
+                    """
+                    INSERT INTO schedules (
+                        semester_id, section, course_code, course_name,
+                        day, second_day, lab_room_id, instructor_name, 
+                        start_time, end_time, schedule_types, class_type,
+                        status, created_by, start_minute, end_minute,
+                        day_code, second_day_code, created_at, updated_at
+                    ) VALUES (
+                        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
+                    )
+                    """,
+                    [row + (created_at, created_at) for row in chunk]
+                )
+                # lastrowid is the id of the first row of the statement
+                created_ids.extend(read_inserted_schedule_ids(cursor, cursor.lastrowid, chunk, user_id, created_at))
+            record_schedule_changes(cursor, created_ids)
+            
+            if created_ids:
+                try:
+                    client_ip = request.client.host if request.client else None
+                    cursor.execute(
+                        """
+                        INSERT INTO audit_log (user_id, action, details, ip_address)
+                        VALUES (%s, %s, %s, %s)
+                        """,
+                        (
+                            user_id,
+                            "BULK_CREATE_SCHEDULES",
+                            f"Created {len(created_ids)} schedules (ids {created_ids[0]}-{created_ids[-1]})",
+                            client_ip
+                        )
+                    )
+                except Exception as log_error:
+                    print(f"Error logging to audit_log but continuing: {str(log_error)}")
+        
+        conn.commit()
+        schedule_sync_worker.wake()
+        
+        created_iter = iter(created_ids)
+        for result in results:
+            if result["status"] == "created":
+                result["id"] = next(created_iter)
+        
+        # One reload per touched semester instead of one refresh per row
+        for semester_id in {row[0] for row in rows}:
+            try:
+                conflict_engine.load_semester(conn, semester_id)
+            except Exception as e:
+                print(f"Error reloading conflict index for semester {semester_id}: {str(e)}")
+                conflict_engine.clear()
+        
+        return {
+            "message": f"{len(created_ids)} schedules created successfully as draft",
+            "created_count": len(created_ids),
+            "failed_count": failed_count,
+            "results": results
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        conn.rollback()
+        print(f"Error bulk creating schedules: {str(e)}")
+        print(f"Traceback: {traceback.format_exc()}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error creating schedules: {str(e)}"
+        )
+
 @router.put("/schedules/{schedule_id}")
-async def update_schedule(
+def update_schedule(
     schedule_id: int,
     schedule: ScheduleUpdate,
     request: Request,
@@ -477,18 +772,9 @@ async def update_schedule(
         )
         
         if has_conflict:
-            # Prepare conflict message with details
-            conflict_msg = f"Schedule conflict detected with: {conflict_details['course_code']} ({conflict_details['section']})"
-            conflict_msg += f", on {conflict_details['day']}"
-            if conflict_details['second_day']:
-                conflict_msg += f"/{conflict_details['second_day']}"
-            conflict_msg += f" from {conflict_details['start_time']} to {conflict_details['end_time']}"
-            conflict_msg += f" in {conflict_details['lab_room_name']}"
-            conflict_msg += f" (Status: {conflict_details['status']})"
-            
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
-                detail=conflict_msg
+                detail=format_conflict_message(conflict_details)
             )
         
         # Prepare data with proper string handling
@@ -523,6 +809,7 @@ async def update_schedule(
                     semester_id = %s, section = %s, course_code = %s, course_name = %s,
                     day = %s, second_day = %s, lab_room_id = %s, instructor_name = %s,
                     start_time = %s, end_time = %s, schedule_types = %s, class_type = %s,
+                    start_minute = %s, end_minute = %s, day_code = %s, second_day_code = %s,
                     updated_at = NOW()
                 WHERE id = %s
                 """,
@@ -530,9 +817,13 @@ async def update_schedule(
                     schedule.semester_id, section, course_code, course_name,
                     day, second_day, schedule.lab_room_id, instructor_name, 
                     start_time, end_time, schedule_types_json,
-                    schedule.class_type, schedule_id
+                    schedule.class_type,
+                    time_to_minutes(start_time), time_to_minutes(end_time),
+                    weekday_code(day), weekday_code(second_day),
+                    schedule_id
                 )
             )
+            record_schedule_changes(cursor, [schedule_id])
             
             # Log the update
             try:
@@ -553,6 +844,8 @@ async def update_schedule(
                 # Continue even if logging fails
             
             conn.commit()
+            schedule_sync_worker.wake()
+            refresh_conflict_index(conn, schedule_id)
             
             # Fetch the updated schedule to return
             cursor.execute(
@@ -593,7 +886,7 @@ async def update_schedule(
         )
 
 @router.patch("/schedules/{schedule_id}/status")
-async def update_schedule_status(
+def update_schedule_status(
     schedule_id: int,
     status_update: ScheduleStatusUpdate,
     request: Request,
@@ -635,6 +928,7 @@ async def update_schedule_status(
                 "UPDATE schedules SET status = %s WHERE id = %s",
                 (status_update.status, schedule_id)
             )
+            record_schedule_changes(cursor, [schedule_id])
             
             # If the status is being changed to 'pending', create a notification for the Dean
             if status_update.status == 'pending':
@@ -803,6 +1097,8 @@ async def update_schedule_status(
                 # Continue even if logging fails
             
             conn.commit()
+            schedule_sync_worker.wake()
+            refresh_conflict_index(conn, schedule_id)
             
             return {
                 "message": f"Schedule status updated to {status_update.status} successfully",
@@ -821,7 +1117,7 @@ async def update_schedule_status(
         )
 
 @router.get("/schedules/status/{status}")
-async def get_schedules_by_status(
+def get_schedules_by_status(
     status: str,
     conn = Depends(get_db_connection)
 ):
@@ -861,7 +1157,7 @@ async def get_schedules_by_status(
         )
 
 @router.delete("/schedules/{schedule_id}")
-async def delete_schedule(
+def delete_schedule(
     schedule_id: int,
     request: Request,
     conn = Depends(get_db_connection)
@@ -896,7 +1192,8 @@ async def delete_schedule(
                     detail="Schedule not found"
                 )
             
-            # Delete schedule
+            # Delete schedule, leaving a tombstone and a sync event for the Supabase sync
+            record_schedule_tombstones(cursor, [schedule_id])
             cursor.execute(
                 "DELETE FROM schedules WHERE id = %s",
                 (schedule_id,)
@@ -917,6 +1214,8 @@ async def delete_schedule(
             )
             
             conn.commit()
+            schedule_sync_worker.wake()
+            refresh_conflict_index(conn, schedule_id, deleted=True)
             
             return {"message": "Schedule deleted successfully"}
     except HTTPException:
@@ -930,7 +1229,7 @@ async def delete_schedule(
         )
 
 @router.delete("/schedules/all")
-async def delete_all_schedules(
+def delete_all_schedules(
     request: Request,
     conn = Depends(get_db_connection)
 ):
@@ -961,7 +1260,8 @@ async def delete_all_schedules(
             if schedule_count == 0:
                 return {"message": "No schedules to delete"}
             
-            # Delete all schedules
+            # Delete all schedules, leaving tombstones and sync events for the Supabase sync
+            record_schedule_tombstones(cursor)
             cursor.execute("DELETE FROM schedules")
             
             # Log the deletion
@@ -979,6 +1279,8 @@ async def delete_all_schedules(
             )
             
             conn.commit()
+            schedule_sync_worker.wake()
+            refresh_conflict_index(conn)
             
             return {"message": f"All schedules deleted successfully ({schedule_count} total)"}
     except HTTPException:
@@ -992,7 +1294,7 @@ async def delete_all_schedules(
         )
 
 @router.get("/schedules/check-course-usage")
-async def check_course_usage(
+def check_course_usage(
     course_code: str,
     semester_id: int,
     section: str,
@@ -1036,7 +1338,7 @@ async def check_course_usage(
         )
 
 @router.get("/schedules/used-courses/{semester_id}")
-async def get_used_courses(
+def get_used_courses(
     semester_id: int,
     section: Optional[str] = None,
     schedule_id: Optional[int] = None,
@@ -1204,7 +1506,7 @@ def check_and_add_next_academic_year_semesters(conn, semester_id, user_id):
         # Don't raise, just log the error 
 
 @router.patch("/schedules/bulk-status-update")
-async def update_multiple_schedules_status(
+def update_multiple_schedules_status(
     update_data: BulkScheduleStatusUpdate,
     request: Request,
     conn = Depends(get_db_connection)
@@ -1232,157 +1534,137 @@ async def update_multiple_schedules_status(
         else:
             user_id = user_id.id
             
-        print(f"Performing bulk status update to {update_data.status} with user: {user_id}")
-        
-        # Get semester ID if it's not provided - use the first schedule's semester
-        semester_id = update_data.semester_id
-        if not semester_id and update_data.schedule_ids:
-            with conn.cursor() as cursor:
-                cursor.execute(
-                    "SELECT semester_id FROM schedules WHERE id = %s",
-                    (update_data.schedule_ids[0],)
-                )
-                result = cursor.fetchone()
-                if result:
-                    semester_id = result['semester_id']
+        schedule_ids = sorted(set(update_data.schedule_ids))
+        placeholders = ", ".join(["%s"] * len(schedule_ids))
+        print(f"Performing bulk status update of {len(schedule_ids)} schedules to {update_data.status} with user: {user_id}")
         
         # Update all schedules in a single transaction
         with conn.cursor() as cursor:
-            # Update the status of all schedules
-            update_count = 0
-            for schedule_id in update_data.schedule_ids:
-                cursor.execute(
-                    "UPDATE schedules SET status = %s WHERE id = %s",
-                    (update_data.status, schedule_id)
-                )
-                update_count += cursor.rowcount
-                
-                # Log each status change to audit log
-                try:
+            # Semesters touched by this update, for the conflict index and the default semester
+            cursor.execute(
+                f"SELECT DISTINCT semester_id FROM schedules WHERE id IN ({placeholders})",
+                schedule_ids
+            )
+            affected_semesters = [row['semester_id'] for row in cursor.fetchall()]
+            
+            # Get semester ID if it's not provided - use the first schedule's semester
+            semester_id = update_data.semester_id
+            if not semester_id and affected_semesters:
+                if len(affected_semesters) == 1:
+                    semester_id = affected_semesters[0]
+                else:
                     cursor.execute(
-                        """
-                        INSERT INTO audit_log (user_id, action, details, ip_address)
-                        VALUES (%s, %s, %s, %s)
-                        """,
-                        (
-                            user_id,
-                            "UPDATE_SCHEDULE_STATUS",
-                            f"Schedule {schedule_id} status changed to {update_data.status}",
-                            request.client.host if hasattr(request, 'client') else None
-                        )
+                        "SELECT semester_id FROM schedules WHERE id = %s",
+                        (update_data.schedule_ids[0],)
                     )
-                except Exception as log_error:
-                    print(f"Error logging status change: {log_error}")
-                    # Continue even if logging fails
+                    result = cursor.fetchone()
+                    if result:
+                        semester_id = result['semester_id']
             
-            # If changing to pending, create a notification for the Dean
-            if update_data.status == 'pending' and semester_id:
-                try:
-                    # Create a notification for the Dean with the count of schedules
-                    notification_id = create_schedule_pending_notification(
-                        conn=conn,
-                        semester_id=semester_id,
-                        created_by=user_id,
-                        schedule_count=update_count
+            cursor.execute(
+                f"UPDATE schedules SET status = %s WHERE id IN ({placeholders})",
+                [update_data.status] + schedule_ids
+            )
+            update_count = cursor.rowcount
+            record_schedule_changes(cursor, schedule_ids)
+            
+            # One audit entry for the whole batch
+            try:
+                cursor.execute(
+                    """
+                    INSERT INTO audit_log (user_id, action, details, ip_address)
+                    VALUES (%s, %s, %s, %s)
+                    """,
+                    (
+                        user_id,
+                        "BULK_UPDATE_SCHEDULE_STATUS",
+                        f"Schedules {', '.join(str(schedule_id) for schedule_id in schedule_ids)} status changed to {update_data.status}",
+                        request.client.host if request.client else None
                     )
-                    print(f"Created bulk schedule pending notification with ID: {notification_id}")
-                except Exception as notif_error:
-                    print(f"Error creating bulk schedule pending notification: {notif_error}")
-                    # Continue even if notification creation fails
+                )
+            except Exception as log_error:
+                print(f"Error logging status change: {log_error}")
+                # Continue even if logging fails
             
-            # If changing to approved, potentially create approval notifications
+            was_already_current_display_semester = False
             if update_data.status == 'approved' and semester_id:
-                try:
-                    # Check if this semester is the current display semester
-                    cursor.execute(
-                        "SELECT setting_value FROM system_settings WHERE setting_key = 'current_display_semester_id'"
-                    )
-                    setting_row = cursor.fetchone()
-                    was_already_current_display_semester = False
-                    
-                    if setting_row and setting_row['setting_value'] == str(semester_id):
-                        was_already_current_display_semester = True
-                        print(f"Semester {semester_id} is already set as current_display_semester_id")
-                    else:
-                        # Set this as the current display semester
-                        if setting_row:
-                            # Update existing setting
-                            cursor.execute(
-                                """
-                                UPDATE system_settings 
-                                SET setting_value = %s, updated_at = NOW()
-                                WHERE setting_key = 'current_display_semester_id'
-                                """,
-                                (str(semester_id),)
-                            )
-                        else:
-                            # Insert new setting
-                            cursor.execute(
-                                """
-                                INSERT INTO system_settings 
-                                (setting_key, setting_value, description)
-                                VALUES ('current_display_semester_id', %s, 'ID of the semester that should be displayed in all dashboards')
-                                """,
-                                (str(semester_id),)
-                            )
-                            
-                        # Commit changes to ensure system settings are updated
-                        conn.commit()
-                        print(f"Updated current_display_semester_id to {semester_id} in bulk approval")
-                        
-                        # Small delay to ensure system settings are properly updated before notifications
-                        import time
-                        time.sleep(0.5)  # 500ms delay
-                        
-                        # Re-fetch to confirm the update
-                        cursor.execute(
-                            "SELECT setting_value FROM system_settings WHERE setting_key = 'current_display_semester_id'"
-                        )
-                        updated_setting = cursor.fetchone()
-                        if updated_setting and updated_setting['setting_value'] == str(semester_id):
-                            print("Confirmed system settings update was successful for bulk approval")
-                        else:
-                            print("Warning: System settings update may not have been applied for bulk approval")
-                            
-                    # Recheck the current display semester one more time to be extra sure
+                # Read the display semester before switching it, so the notification can tell
+                # a newly posted semester from an update to the one already on the dashboards
+                cursor.execute(
+                    "SELECT setting_value FROM system_settings WHERE setting_key = 'current_display_semester_id'"
+                )
+                setting_row = cursor.fetchone()
+                was_already_current_display_semester = bool(
+                    setting_row and setting_row['setting_value'] == str(semester_id)
+                )
+                if not was_already_current_display_semester:
                     cursor.execute(
-                        "SELECT setting_value FROM system_settings WHERE setting_key = 'current_display_semester_id'"
-                    )
-                    latest_setting = cursor.fetchone()
-                    if latest_setting and latest_setting['setting_value'] == str(semester_id):
-                        was_already_current_display_semester = True
-                        print("Final check: This semester is now the current display semester")
-                        
-                    # Create a notification about the approved schedules
-                    notification_id = create_schedule_approval_notification(
-                        conn=conn,
-                        semester_id=semester_id,
-                        created_by=user_id,
-                        was_already_current_display_semester=was_already_current_display_semester,
-                        is_bulk_approval=True
+                        """
+                        INSERT INTO system_settings 
+                        (setting_key, setting_value, description)
+                        VALUES ('current_display_semester_id', %s, 'ID of the semester that should be displayed in all dashboards')
+                        ON DUPLICATE KEY UPDATE setting_value = VALUES(setting_value), updated_at = NOW()
+                        """,
+                        (str(semester_id),)
                     )
-                    print(f"Created bulk schedule approval notification with ID: {notification_id}")
-                    
-                except Exception as notif_error:
-                    print(f"Error handling bulk approval notification: {notif_error}")
-                    # Continue even if notification creation fails
+                    print(f"Updated current_display_semester_id to {semester_id} in bulk approval")
             
+            # Status and settings become visible together, before any notification is sent
             conn.commit()
-            
-            return {
-                "message": f"{update_count} schedules updated to {update_data.status} successfully",
-                "updated_count": update_count,
-                "semester_id": semester_id
-            }
+            schedule_sync_worker.wake()
+        
+        # If changing to pending, create a notification for the Dean
+        if update_data.status == 'pending' and semester_id:
+            try:
+                # Create a notification for the Dean with the count of schedules
+                notification_id = create_schedule_pending_notification(
+                    conn=conn,
+                    semester_id=semester_id,
+                    created_by=user_id,
+                    schedule_count=update_count
+                )
+                print(f"Created bulk schedule pending notification with ID: {notification_id}")
+            except Exception as notif_error:
+                print(f"Error creating bulk schedule pending notification: {notif_error}")
+                # Continue even if notification creation fails
+        
+        # If changing to approved, create one approval notification for the batch
+        if update_data.status == 'approved' and semester_id:
+            try:
+                notification_id = create_schedule_approval_notification(
+                    conn=conn,
+                    semester_id=semester_id,
+                    created_by=user_id,
+                    was_already_current_display_semester=was_already_current_display_semester,
+                    is_bulk_approval=True
+                )
+                print(f"Created bulk schedule approval notification with ID: {notification_id}")
+            except Exception as notif_error:
+                print(f"Error handling bulk approval notification: {notif_error}")
+                # Continue even if notification creation fails
+        
+        conn.commit()
+        
+        for affected_semester_id in affected_semesters:
+            try:
+                conflict_engine.load_semester(conn, affected_semester_id)
+            except Exception as e:
+                print(f"Error reloading conflict index for semester {affected_semester_id}: {str(e)}")
+                conflict_engine.clear()
+        
+        return {
+            "message": f"{update_count} schedules updated to {update_data.status} successfully",
+            "updated_count": update_count,
+            "semester_id": semester_id
+        }
             
     except HTTPException:
         raise
     except Exception as e:
         conn.rollback()
         print(f"Error performing bulk status update: {str(e)}")
-        import traceback
         print(f"Traceback: {traceback.format_exc()}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error updating schedules: {str(e)}"
-        ) 
\ No newline at end of file
+        )
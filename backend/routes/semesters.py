@@ -17,7 +17,7 @@ class SemesterModel(BaseModel):
     created_at: str
 
 @router.get("/semesters", response_model=List[SemesterModel])
-async def get_semesters(conn = Depends(get_db_connection)):
+def get_semesters(conn = Depends(get_db_connection)):
     """
     Get all semesters from the database.
     """
@@ -16,7 +16,7 @@ class SystemSettingUpdate(BaseModel):
     description: Optional[str] = None
 
 @router.get("/system-settings/{setting_key}")
-async def get_system_setting(
+def get_system_setting(
     setting_key: str,
     conn = Depends(get_db_connection)
 ):
@@ -46,7 +46,7 @@ async def get_system_setting(
         )
 
 @router.put("/system-settings/{setting_key}")
-async def update_system_setting(
+def update_system_setting(
     setting_key: str,
     setting_update: SystemSettingUpdate,
     request: Request,
@@ -125,7 +125,7 @@ async def update_system_setting(
         )
         
 @router.get("/system-settings/display-semester/current")
-async def get_current_display_semester(
+def get_current_display_semester(
     conn = Depends(get_db_connection)
 ):
     """Get the current display semester with semester details"""
@@ -4,19 +4,28 @@ from typing import List, Optional
 import pymysql
 from datetime import datetime
 from sqlalchemy.orm import Session
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 
 # Import from main app - update to absolute imports
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from main import get_db_connection, User, get_password_hash, verify_password
+from main import get_db_connection, User, get_password_hash, verify_password, principal_cache
 from routes.auth import send_approval_email  # Import only the approval email function
+from routes.instructors import sync_instructors
+from email_outbox import enqueue_email
+from event_hub import event_hub
+from notification_service import role_owners
 
 router = APIRouter(tags=["users"])
 
+def publish_pending_accounts_changed():
+    """Let System Administrator sidebars refresh their pending account badge"""
+    event_hub.publish("pending_accounts", roles=["System Administrator"])
+
+def publish_forced_logout(user_id, timestamp):
+    """Push the forced logout to the user's open sessions instead of waiting for their next check"""
+    event_hub.publish("forced_logout", {"timestamp": timestamp}, user_ids=[user_id])
+
 class UserBase(BaseModel):
     id: str
     full_name: str
@@ -37,7 +46,7 @@ class ApproveUserRequest(BaseModel):
     requires_approval: Optional[int] = 0
 
 @router.get("/users/pending-approval", response_model=UserList)
-async def get_pending_users(
+def get_pending_users(
     conn = Depends(get_db_connection)
 ):
     # Get all users pending approval
@@ -71,7 +80,7 @@ async def get_pending_users(
         )
 
 @router.get("/users/all", response_model=UserList)
-async def get_all_users(
+def get_all_users(
     conn = Depends(get_db_connection)
 ):
     # Get all users
@@ -95,7 +104,7 @@ async def get_all_users(
         )
 
 @router.put("/users/{user_id}/approve")
-async def approve_user(
+def approve_user(
     user_id: str,
     approval_data: ApproveUserRequest,
     request: Request,
@@ -163,29 +172,26 @@ async def approve_user(
             )
             
         conn.commit()
+        principal_cache.invalidate_user(user_id)
+        role_owners.invalidate()
+        publish_pending_accounts_changed()
         
         # If the user has one of the instructor roles, sync with instructors table
         if user["role"] in ['Academic Coordinator', 'Dean', 'Faculty/Staff']:
             try:
-                # Import httpx for making internal API calls
-                import httpx
-                
-                # Make an internal API call to sync instructors
-                async with httpx.AsyncClient() as client:
-                    # Call our own API endpoint to sync instructors
-                    response = await client.post(
-                        "http://localhost:8000/api/instructors/sync"
-                    )
-                    
-                    if response.status_code != 200:
-                        print(f"Warning: Failed to sync instructors after user approval: {response.text}")
+                # Run the sync in-process on this request's connection (the approval is
+                # already committed) rather than calling our own API over HTTP, which
+                # would hold this worker thread and connection while waiting for another
+                sync_instructors(conn)
+            except HTTPException as e:
+                print(f"Warning: Failed to sync instructors after user approval: {e.detail}")
             except Exception as e:
                 # Don't fail the whole request if sync fails
                 print(f"Warning: Exception while syncing instructors: {str(e)}")
         
         # Send approval notification email
         try:
-            send_approval_email(user["email"], user["full_name"], user["role"])
+            send_approval_email(conn, user["email"], user["full_name"], user["role"])
         except Exception as e:
             # Log the error but don't fail the approval process if email sending fails
             print(f"Warning: Failed to send approval email: {str(e)}")
@@ -215,7 +221,7 @@ async def get_current_user_info():
     }
 
 @router.get("/users/approved", response_model=UserList)
-async def get_approved_users(
+def get_approved_users(
     conn = Depends(get_db_connection)
 ):
     # Get all approved users
@@ -249,7 +255,7 @@ async def get_approved_users(
         )
 
 @router.get("/users/{user_id}/profile", response_model=UserBase)
-async def get_user_profile(
+def get_user_profile(
     user_id: str,
     conn = Depends(get_db_connection)
 ):
@@ -294,7 +300,7 @@ async def get_user_profile(
 
 # Special debug route that bypasses authentication for profile access
 @router.get("/users/{user_id}/debug-profile")
-async def get_user_profile_debug(
+def get_user_profile_debug(
     user_id: str,
     request: Request,
     conn = Depends(get_db_connection)
@@ -352,7 +358,7 @@ class UserProfileUpdate(BaseModel):
     year_section: Optional[str] = None
     
 @router.put("/users/{user_id}/profile", response_model=UserBase)
-async def update_user_profile(
+def update_user_profile(
     user_id: str,
     profile_data: UserProfileUpdate,
     conn = Depends(get_db_connection)
@@ -417,6 +423,8 @@ async def update_user_profile(
                 cursor.execute(sql_query, values)
                 # Force commit to ensure changes are saved
                 conn.commit()
+                principal_cache.invalidate_user(user_id)
+                role_owners.invalidate()
                 print(f"Update query executed and committed")
                 # Verify rows affected
                 print(f"Rows affected: {cursor.rowcount}")
@@ -470,7 +478,7 @@ class PasswordChangeRequest(BaseModel):
     new_password: str
 
 @router.post("/users/{user_id}/change-password", response_model=dict)
-async def change_password(
+def change_password(
     user_id: str,
     password_data: PasswordChangeRequest,
     conn = Depends(get_db_connection)
@@ -516,7 +524,7 @@ class UserRoleUpdate(BaseModel):
     role: str
     
 @router.put("/users/{user_id}/role", response_model=UserBase)
-async def update_user_role(
+def update_user_role(
     user_id: str,
     update_data: UserRoleUpdate,
     request: Request,
@@ -556,6 +564,8 @@ async def update_user_role(
                 (update_data.role, user_id)
             )
             conn.commit()
+        principal_cache.invalidate_user(user_id)
+        role_owners.invalidate()
             
         # Get the ID of the user who made the change (from request state)
         acting_user_id = getattr(request.state, 'user', None)
@@ -611,6 +621,7 @@ async def update_user_role(
             
             conn.commit()
             print(f"User {user_id} added to forced logout list at {current_time}")
+        publish_forced_logout(user_id, current_time)
         
         # Get updated user
         with conn.cursor() as cursor:
@@ -637,7 +648,7 @@ async def update_user_role(
 
 # Add a new endpoint to check if a user is forced to logout
 @router.get("/users/{user_id}/check-forced-logout")
-async def check_forced_logout(
+def check_forced_logout(
     user_id: str,
     last_auth_time: Optional[str] = None,
     conn = Depends(get_db_connection)
@@ -704,7 +715,7 @@ async def check_forced_logout(
 
 # Deactivate user
 @router.put("/users/{user_id}/deactivate", response_model=UserBase)
-async def deactivate_user(
+def deactivate_user(
     user_id: str,
     request: Request,
     conn = Depends(get_db_connection)
@@ -744,6 +755,7 @@ async def deactivate_user(
                 (user_id,)
             )
             conn.commit()
+        principal_cache.invalidate_user(user_id)
         
         # Add user to the forced logout list
         with conn.cursor() as cursor:
@@ -774,6 +786,7 @@ async def deactivate_user(
             
             conn.commit()
             print(f"User {user_id} added to forced logout list at {current_time} due to deactivation")
+        publish_forced_logout(user_id, current_time)
         
         # Get updated user
         with conn.cursor() as cursor:
@@ -802,7 +815,7 @@ async def deactivate_user(
 
 # Activate user
 @router.put("/users/{user_id}/activate", response_model=UserBase)
-async def activate_user(
+def activate_user(
     user_id: str,
     conn = Depends(get_db_connection)
 ):
@@ -829,6 +842,7 @@ async def activate_user(
                 (user_id,)
             )
             conn.commit()
+            principal_cache.invalidate_user(user_id)
             
             # Remove any forced logout entries for this user since they'll need to log in again
             cursor.execute(
@@ -863,7 +877,7 @@ async def activate_user(
 
 # Delete user
 @router.delete("/users/{user_id}", response_model=dict)
-async def delete_user(
+def delete_user(
     user_id: str,
     conn = Depends(get_db_connection)
 ):
@@ -889,6 +903,10 @@ async def delete_user(
                 (user_id,)
             )
             conn.commit()
+        principal_cache.invalidate_user(user_id)
+        role_owners.invalidate()
+        if user["requires_approval"] and not user["is_approved"]:
+            publish_pending_accounts_changed()
         
         return {"message": f"User {user_id} has been deleted"}
         
@@ -900,7 +918,7 @@ async def delete_user(
         )
 
 @router.delete("/users/{user_id}/reject")
-async def reject_user(
+def reject_user(
     user_id: str,
     request: Request,
     conn = Depends(get_db_connection)
@@ -949,10 +967,13 @@ async def reject_user(
             )
             
         conn.commit()
+        principal_cache.invalidate_user(user_id)
+        role_owners.invalidate()
+        publish_pending_accounts_changed()
         
         # Send rejection notification email (after DB transaction is committed)
         try:
-            send_rejection_email(user_email, user_name, user_role)
+            send_rejection_email(conn, user_email, user_name, user_role)
         except Exception as e:
             # Log the error but don't fail the whole request if email sending fails
             print(f"Warning: Failed to send rejection email: {str(e)}")
@@ -966,21 +987,9 @@ async def reject_user(
             detail=f"Failed to reject user: {str(e)}"
         )
 
-def send_rejection_email(email, name, role):
-    """Helper function to send an account rejection notification email."""
-    # Using the same email configuration as in approval emails
-    smtp_server = "smtp.gmail.com"
-    smtp_port = "587"
-    smtp_username = "pierredosdos@gmail.com"
-    smtp_password = "bibb iylk bqkc grez"  # Using the same password as in the approval email function
-    
+def send_rejection_email(conn, email, name, role):
+    """Helper function to queue an account rejection notification email."""
     try:
-        # Create email message
-        message = MIMEMultipart("alternative")
-        message["Subject"] = "Your Account Application Status"
-        message["From"] = smtp_username
-        message["To"] = email
-        
         # Plain text version
         text = f"""
 Hello {name},
@@ -1023,27 +1032,15 @@ The UIC Lab Class Scheduler Team
 </html>
 """
         
-        # Attach parts
-        part1 = MIMEText(text, "plain")
-        part2 = MIMEText(html, "html")
-        message.attach(part1)
-        message.attach(part2)
-        
-        # Send email
-        with smtplib.SMTP(smtp_server, int(smtp_port)) as server:
-            server.starttls()
-            server.login(smtp_username, smtp_password)
-            server.sendmail(smtp_username, email, message.as_string())
-        
-        print(f"Account rejection email sent to {email}")
+        enqueue_email(conn, email, "Your Account Application Status", text, html)
     except Exception as e:
-        print(f"Error sending rejection email: {str(e)}")
+        print(f"Error queueing rejection email: {str(e)}")
         # Don't raise the exception here, just log it
         # This ensures the rejection process continues even if email sending fails
 
 # Special endpoint to directly fix a user
 @router.get("/fix-user/{user_id}")
-async def fix_user(
+def fix_user(
     user_id: str,
     conn = Depends(get_db_connection)
 ):
@@ -1075,6 +1072,8 @@ async def fix_user(
                 (user_id,)
             )
             conn.commit()
+        principal_cache.invalidate_user(user_id)
+        role_owners.invalidate()
         
         # Verify the update
         with conn.cursor() as cursor:
@@ -1104,7 +1103,7 @@ async def fix_user(
         return {"error": f"Failed to fix user: {str(e)}"}
 
 @router.get("/roles", response_model=dict)
-async def get_roles(conn = Depends(get_db_connection)):
+def get_roles(conn = Depends(get_db_connection)):
     try:
         with conn.cursor() as cursor:
             cursor.execute("SELECT role FROM role_permissions")
@@ -1123,7 +1122,7 @@ class StudentYearSectionUpdate(BaseModel):
     
 # New endpoint specifically for year_section updates
 @router.put("/users/{user_id}/year-section", response_model=UserBase)
-async def update_student_year_section(
+def update_student_year_section(
     user_id: str,
     update_data: StudentYearSectionUpdate,
     conn = Depends(get_db_connection)
@@ -1159,6 +1158,7 @@ async def update_student_year_section(
                 (update_data.year_section, user_id)
             )
             conn.commit()
+            principal_cache.invalidate_user(user_id)
             print(f"Update query executed and committed")
             print(f"Rows affected: {cursor.rowcount}")
         
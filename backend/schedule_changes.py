@@ -0,0 +1,204 @@
+"""
+Change capture for schedules, read by the Supabase sync (sync_schedules.py).
+
+Every schedule write in routes/schedules.py queues the ids it touched in
+schedule_sync_outbox, in the same transaction, and wakes ScheduleSyncWorker
+after committing. The worker waits for writes to settle (debounce), collapses
+all queued events into one set of ids (coalescing), pushes those rows - or
+deletes them when they no longer exist - and removes the events it consumed.
+Nothing runs while no schedule is written, and an edit reaches Supabase within
+about SCHEDULE_SYNC_DEBOUNCE_SECONDS.
+
+Deletes leave no row behind, so the delete routes also record a tombstone; the
+watermark-based catch-up sync (sync_schedules.sync_incremental) pushes those
+deletes together with changes found through schedules.updated_at, covering
+writes made outside the API.
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from sync_schedules import delete_synced_schedules, push_changed_schedules, read_schedules
+
+# How long writes must pause before a push, and the longest a busy stream of
+# writes may hold one back
+SCHEDULE_SYNC_DEBOUNCE_SECONDS = float(os.getenv("SCHEDULE_SYNC_DEBOUNCE_SECONDS", "0.3"))
+SCHEDULE_SYNC_MAX_DELAY_SECONDS = float(os.getenv("SCHEDULE_SYNC_MAX_DELAY_SECONDS", "2"))
+# Outbox events consumed per pass
+SCHEDULE_SYNC_BATCH_SIZE = int(os.getenv("SCHEDULE_SYNC_BATCH_SIZE", "1000"))
+# Retry delay after a failed push; events are kept until a push succeeds
+SCHEDULE_SYNC_RETRY_SECONDS = float(os.getenv("SCHEDULE_SYNC_RETRY_SECONDS", "30"))
+
+
+def record_schedule_changes(cursor, schedule_ids=None):
+    """Queue schedule_ids, or every schedule when None, for the sync worker"""
+    if schedule_ids is None:
+        cursor.execute("INSERT INTO schedule_sync_outbox (schedule_id) SELECT id FROM schedules")
+        return cursor.rowcount
+    if not schedule_ids:
+        return 0
+    cursor.executemany(
+        "INSERT INTO schedule_sync_outbox (schedule_id) VALUES (%s)",
+        [(schedule_id,) for schedule_id in schedule_ids]
+    )
+    return len(schedule_ids)
+
+
+def record_schedule_tombstones(cursor, schedule_ids=None):
+    """Record deletes of schedule_ids, or of every schedule when None; call before deleting"""
+    record_schedule_changes(cursor, schedule_ids)
+    if schedule_ids is None:
+        cursor.execute("INSERT INTO schedule_tombstones (schedule_id) SELECT id FROM schedules")
+        return cursor.rowcount
+    if not schedule_ids:
+        return 0
+    cursor.executemany(
+        "INSERT INTO schedule_tombstones (schedule_id) VALUES (%s)",
+        [(schedule_id,) for schedule_id in schedule_ids]
+    )
+    return len(schedule_ids)
+
+
+class ScheduleSyncWorker:
+    """Background thread pushing queued schedule changes to Supabase"""
+
+    def __init__(self):
+        self._pool = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+
+        # Counters exposed through stats()
+        self._passes = 0
+        self._events = 0
+        self._pushed = 0
+        self._deleted = 0
+        self._unchanged = 0
+        self._last_pass = None
+        self._last_error = None
+
+    def start(self, pool):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._pool = pool
+        self._stop.clear()
+        # Events left from before a restart are drained straight away
+        self._wakeup.set()
+        self._thread = threading.Thread(target=self._run, name="schedule-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wake(self):
+        """Called after a schedule write commits"""
+        self._wakeup.set()
+
+    def _settle(self):
+        """Wait until no wake() arrived for the debounce period, up to the max delay"""
+        deadline = time.monotonic() + SCHEDULE_SYNC_MAX_DELAY_SECONDS
+        while not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            self._wakeup.clear()
+            if not self._wakeup.wait(min(SCHEDULE_SYNC_DEBOUNCE_SECONDS, remaining)):
+                return
+
+    def _run(self):
+        retry_after = None
+        while not self._stop.is_set():
+            # Idle until a write (or a pending retry) needs us
+            self._wakeup.wait(retry_after)
+            if self._stop.is_set():
+                break
+            self._settle()
+            self._wakeup.clear()
+            try:
+                with self._pool.connection() as conn:
+                    drained = self.drain(conn)
+                retry_after = None if drained else SCHEDULE_SYNC_RETRY_SECONDS
+            except Exception as e:
+                with self._lock:
+                    self._last_error = str(e)
+                print(f"Schedule sync worker error: {e}")
+                retry_after = SCHEDULE_SYNC_RETRY_SECONDS
+
+    def drain(self, conn):
+        """Push everything queued; returns False when a push failed and events were kept"""
+        while not self._stop.is_set():
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT id, schedule_id FROM schedule_sync_outbox ORDER BY id LIMIT %s",
+                    (SCHEDULE_SYNC_BATCH_SIZE,)
+                )
+                events = cursor.fetchall()
+            conn.commit()
+            if not events:
+                return True
+            if not self.process_events(conn, events):
+                return False
+            # Only the events read: auto-increment ids are not committed in order, so
+            # a lower id committed after the SELECT must stay queued for the next batch
+            event_ids = [event['id'] for event in events]
+            placeholders = ", ".join(["%s"] * len(event_ids))
+            with conn.cursor() as cursor:
+                cursor.execute(f"DELETE FROM schedule_sync_outbox WHERE id IN ({placeholders})", event_ids)
+            conn.commit()
+        return True
+
+    def process_events(self, conn, events):
+        """Push the current state of every schedule named in events; returns True on success"""
+        started = time.perf_counter()
+        schedule_ids = sorted({event['schedule_id'] for event in events})
+        placeholders = ", ".join(["%s"] * len(schedule_ids))
+        rows = read_schedules(conn, f"SELECT * FROM schedules_with_names WHERE id IN ({placeholders})", schedule_ids)
+
+        # Ids that no longer exist were deleted, whatever their earlier events said
+        existing = {row['id'] for row in rows}
+        pushed, unchanged, push_failed = push_changed_schedules(conn, rows)
+        deleted, delete_failed = delete_synced_schedules(
+            conn, [schedule_id for schedule_id in schedule_ids if schedule_id not in existing]
+        )
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self._passes += 1
+            self._events += len(events)
+            self._pushed += pushed
+            self._deleted += deleted
+            self._unchanged += unchanged
+            self._last_pass = {
+                "finished_at": time.time(),
+                "duration_ms": round(elapsed * 1000, 1),
+                "events": len(events),
+                "schedules": len(schedule_ids),
+                "failed": push_failed + delete_failed
+            }
+            if not push_failed and not delete_failed:
+                self._last_error = None
+        return not push_failed and not delete_failed
+
+    def stats(self):
+        with self._lock:
+            return {
+                "debounce_seconds": SCHEDULE_SYNC_DEBOUNCE_SECONDS,
+                "max_delay_seconds": SCHEDULE_SYNC_MAX_DELAY_SECONDS,
+                "passes": self._passes,
+                "events": self._events,
+                "pushed": self._pushed,
+                "deleted": self._deleted,
+                "unchanged": self._unchanged,
+                "last_pass": self._last_pass,
+                "last_error": self._last_error
+            }
+
+
+schedule_sync_worker = ScheduleSyncWorker()
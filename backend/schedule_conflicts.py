@@ -0,0 +1,416 @@
+import bisect
+import heapq
+import re
+import threading
+from datetime import time as dt_time, timedelta
+
+TIME_PATTERN = re.compile(r'^\s*(\d{1,2}):(\d{2})(?::(\d{2}))?\s*([AaPp][Mm])?\s*$')
+
+# Columns needed to index a schedule and to describe it in a conflict message
+INDEX_COLUMNS_QUERY = """
+    SELECT s.id, s.semester_id, s.lab_room_id, s.day, s.second_day,
+           s.start_time, s.end_time, s.start_minute, s.end_minute,
+           s.course_code, s.section, s.status, s.updated_at, l.name as lab_room_name
+    FROM schedules s
+    JOIN lab_rooms l ON s.lab_room_id = l.id
+"""
+
+
+def time_to_minutes(value):
+    """
+    Convert a schedule time to minutes since midnight.
+    Accepts "9:00 AM", "09:00 PM", "13:30", "13:30:00", datetime.time and the
+    timedelta pymysql returns for TIME columns. Returns None if it cannot be parsed.
+    """
+    if value is None:
+        return None
+    if isinstance(value, timedelta):
+        return int(value.total_seconds()) // 60
+    if isinstance(value, dt_time):
+        return value.hour * 60 + value.minute
+    if isinstance(value, bytes):
+        value = value.decode('utf-8')
+
+    match = TIME_PATTERN.match(str(value))
+    if not match:
+        return None
+
+    hour = int(match.group(1))
+    minute = int(match.group(2))
+    period = match.group(4)
+
+    if period:
+        period = period.upper()
+        if hour < 1 or hour > 12:
+            return None
+        if period == 'PM' and hour < 12:
+            hour += 12
+        elif period == 'AM' and hour == 12:
+            hour = 0
+
+    if hour > 23 or minute > 59:
+        return None
+    return hour * 60 + minute
+
+
+WEEKDAY_CODES = {
+    'monday': 1, 'mon': 1,
+    'tuesday': 2, 'tue': 2, 'tues': 2,
+    'wednesday': 3, 'wed': 3,
+    'thursday': 4, 'thu': 4, 'thur': 4, 'thurs': 4,
+    'friday': 5, 'fri': 5,
+    'saturday': 6, 'sat': 6,
+    'sunday': 7, 'sun': 7,
+}
+
+
+WEEKDAY_NAMES = {
+    1: 'Monday', 2: 'Tuesday', 3: 'Wednesday', 4: 'Thursday',
+    5: 'Friday', 6: 'Saturday', 7: 'Sunday',
+}
+
+
+def weekday_name(key):
+    """Display name for a key returned by schedule_days()"""
+    return WEEKDAY_NAMES.get(key, key)
+
+
+def weekday_code(day):
+    """ISO weekday number (Monday = 1) for a day name or abbreviation, or None"""
+    if not day:
+        return None
+    return WEEKDAY_CODES.get(day.strip().lower())
+
+
+def schedule_days(day, second_day):
+    """
+    Distinct weekdays a schedule occupies, as weekday codes. Names that are not
+    recognised fall back to their lower-cased text, matching MySQL's case-insensitive comparison.
+    """
+    days = []
+    for value in (day, second_day):
+        if not value or not value.strip():
+            continue
+        key = weekday_code(value) or value.strip().lower()
+        if key not in days:
+            days.append(key)
+    return days
+
+
+class ScheduleInterval:
+    """One schedule as stored in the conflict index"""
+
+    __slots__ = (
+        'id', 'semester_id', 'lab_room_id', 'day', 'second_day', 'start_minute',
+        'end_minute', 'start_time', 'end_time', 'course_code', 'section', 'status',
+        'lab_room_name', 'updated_at'
+    )
+
+    def __init__(self, row):
+        self.id = row['id']
+        self.semester_id = row['semester_id']
+        self.lab_room_id = row['lab_room_id']
+        self.day = row['day']
+        self.second_day = row.get('second_day')
+        self.start_time = row['start_time']
+        self.end_time = row['end_time']
+        # Prefer the normalized minute columns; parse the display strings only for unmigrated rows
+        self.start_minute = row.get('start_minute')
+        if self.start_minute is None:
+            self.start_minute = time_to_minutes(row['start_time'])
+        self.end_minute = row.get('end_minute')
+        if self.end_minute is None:
+            self.end_minute = time_to_minutes(row['end_time'])
+        self.course_code = row.get('course_code')
+        self.section = row.get('section')
+        self.status = row.get('status')
+        self.lab_room_name = row.get('lab_room_name')
+        self.updated_at = row.get('updated_at')
+
+    def conflict_details(self):
+        return {
+            'id': self.id,
+            'course_code': self.course_code,
+            'section': self.section,
+            'day': self.day,
+            'second_day': self.second_day,
+            'lab_room_name': self.lab_room_name,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'status': self.status
+        }
+
+
+class IntervalBucket:
+    """
+    Intervals for one (semester, room, weekday), sorted by start minute.
+
+    Any interval overlapping [start, end) must start before end and after
+    start - max_length, so a lookup is a bisect plus a scan of that window.
+    """
+
+    def __init__(self):
+        self.keys = []       # (start_minute, schedule_id), kept sorted
+        self.intervals = {}  # schedule_id -> ScheduleInterval
+        self.max_length = 0
+
+    def add(self, interval):
+        bisect.insort(self.keys, (interval.start_minute, interval.id))
+        self.intervals[interval.id] = interval
+        self.max_length = max(self.max_length, interval.end_minute - interval.start_minute)
+
+    def remove(self, interval):
+        position = bisect.bisect_left(self.keys, (interval.start_minute, interval.id))
+        if position < len(self.keys) and self.keys[position] == (interval.start_minute, interval.id):
+            del self.keys[position]
+        self.intervals.pop(interval.id, None)
+        # max_length is left as an upper bound; it only widens the scan window
+
+    def overlapping(self, start_minute, end_minute, exclude_id=None):
+        """Yield intervals overlapping the half-open range [start_minute, end_minute)"""
+        low = bisect.bisect_right(self.keys, (start_minute - self.max_length, float('inf')))
+        high = bisect.bisect_left(self.keys, (end_minute, float('-inf')))
+        for position in range(low, high):
+            schedule_id = self.keys[position][1]
+            if schedule_id == exclude_id:
+                continue
+            interval = self.intervals[schedule_id]
+            if interval.end_minute > start_minute:
+                yield interval
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class ScheduleConflictEngine:
+    """
+    In-process index of schedules keyed by (semester_id, lab_room_id, weekday).
+
+    Semesters are loaded lazily from the database. Before answering, the engine
+    compares a cheap fingerprint of the semester (row count, max id, max updated_at)
+    with the one it was built from and reloads the semester if another process
+    changed it. Writes made through this process update the index incrementally.
+    """
+
+    def __init__(self):
+        self._buckets = {}      # (semester_id, lab_room_id, day) -> IntervalBucket
+        self._schedules = {}    # schedule_id -> ScheduleInterval
+        self._fingerprints = {} # semester_id -> fingerprint tuple
+        self._lock = threading.RLock()
+
+    # Index maintenance
+
+    def _add_locked(self, interval):
+        if interval.start_minute is None or interval.end_minute is None:
+            print(f"Warning: schedule {interval.id} has unparseable times "
+                  f"({interval.start_time} - {interval.end_time}); not indexed")
+            return
+        self._schedules[interval.id] = interval
+        for day in schedule_days(interval.day, interval.second_day):
+            key = (interval.semester_id, interval.lab_room_id, day)
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = IntervalBucket()
+            bucket.add(interval)
+
+    def _remove_locked(self, schedule_id):
+        interval = self._schedules.pop(schedule_id, None)
+        if interval is None:
+            return None
+        for day in schedule_days(interval.day, interval.second_day):
+            key = (interval.semester_id, interval.lab_room_id, day)
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.remove(interval)
+                if not bucket:
+                    del self._buckets[key]
+        return interval
+
+    def _drop_semester_locked(self, semester_id):
+        for schedule_id in [sid for sid, item in self._schedules.items() if item.semester_id == semester_id]:
+            self._remove_locked(schedule_id)
+        self._fingerprints.pop(semester_id, None)
+
+    def _read_fingerprint(self, conn, semester_id):
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT COUNT(*) as count, MAX(id) as max_id, MAX(updated_at) as max_updated_at
+                FROM schedules WHERE semester_id = %s
+                """,
+                (semester_id,)
+            )
+            row = cursor.fetchone()
+        return (row['count'], row['max_id'], row['max_updated_at'])
+
+    def load_semester(self, conn, semester_id):
+        """(Re)build the index for one semester from the database"""
+        fingerprint = self._read_fingerprint(conn, semester_id)
+        with conn.cursor() as cursor:
+            cursor.execute(
+                INDEX_COLUMNS_QUERY + " WHERE s.semester_id = %s ORDER BY s.lab_room_id, s.day_code, s.start_minute",
+                (semester_id,)
+            )
+            rows = cursor.fetchall()
+
+        with self._lock:
+            self._drop_semester_locked(semester_id)
+            for row in rows:
+                self._add_locked(ScheduleInterval(row))
+            self._fingerprints[semester_id] = fingerprint
+        return len(rows)
+
+    def ensure_semester(self, conn, semester_id):
+        """Load the semester if it is missing or was changed outside this process"""
+        fingerprint = self._read_fingerprint(conn, semester_id)
+        with self._lock:
+            if self._fingerprints.get(semester_id) == fingerprint:
+                return
+        self.load_semester(conn, semester_id)
+
+    def _sync_fingerprints(self, conn, removed, added):
+        """
+        Keep fingerprints in step with our own write so the next check does not
+        reload. The new fingerprint is adopted only if it is exactly the old one
+        plus this write; anything else means other writers got in between, and
+        the semester is dropped so the next ensure_semester reloads it.
+        """
+        semester_ids = {item.semester_id for item in (removed, added) if item is not None}
+        for semester_id in semester_ids:
+            fingerprint = self._fingerprints.get(semester_id)
+            if fingerprint is None:
+                continue
+            expected = expected_fingerprint(
+                fingerprint,
+                removed if removed is not None and removed.semester_id == semester_id else None,
+                added if added is not None and added.semester_id == semester_id else None
+            )
+            if expected is not None and self._read_fingerprint(conn, semester_id) == expected:
+                self._fingerprints[semester_id] = expected
+            else:
+                self._drop_semester_locked(semester_id)
+
+    def refresh_schedule(self, conn, schedule_id):
+        """Re-read one schedule after a local write and update the index in place"""
+        with conn.cursor() as cursor:
+            cursor.execute(INDEX_COLUMNS_QUERY + " WHERE s.id = %s", (schedule_id,))
+            row = cursor.fetchone()
+
+        with self._lock:
+            previous = self._remove_locked(schedule_id)
+            current = ScheduleInterval(row) if row is not None else None
+            if current is not None:
+                self._add_locked(current)
+            self._sync_fingerprints(conn, previous, current)
+
+    def remove_schedule(self, conn, schedule_id):
+        """Drop a deleted schedule from the index"""
+        with self._lock:
+            previous = self._remove_locked(schedule_id)
+            if previous is not None:
+                self._sync_fingerprints(conn, previous, None)
+
+    def add_interval(self, row):
+        """Index a schedule row directly, without touching the database"""
+        with self._lock:
+            self._remove_locked(row['id'])
+            self._add_locked(ScheduleInterval(row))
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+            self._schedules.clear()
+            self._fingerprints.clear()
+
+    # Queries
+
+    def find_conflicts(self, semester_id, lab_room_id, day, second_day, start_time, end_time, exclude_id=None):
+        """All indexed schedules that overlap the given slot on any of its days, ordered by id"""
+        start_minute = time_to_minutes(start_time)
+        end_minute = time_to_minutes(end_time)
+        if start_minute is None or end_minute is None:
+            raise ValueError(f"Invalid time range: {start_time} - {end_time}")
+
+        found = {}
+        with self._lock:
+            for weekday in schedule_days(day, second_day):
+                bucket = self._buckets.get((semester_id, lab_room_id, weekday))
+                if bucket is None:
+                    continue
+                for interval in bucket.overlapping(start_minute, end_minute, exclude_id):
+                    found[interval.id] = interval
+        return [found[schedule_id] for schedule_id in sorted(found)]
+
+    def semester_intervals(self, semester_id):
+        """Snapshot of every indexed schedule in a semester"""
+        with self._lock:
+            return [item for item in self._schedules.values() if item.semester_id == semester_id]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "semesters": len(self._fingerprints),
+                "schedules": len(self._schedules),
+                "buckets": len(self._buckets)
+            }
+
+
+def _later(first, second):
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return max(first, second)
+
+
+def expected_fingerprint(fingerprint, removed, added):
+    """
+    A semester's (count, max id, max updated_at) after removing and/or adding one
+    schedule, or None when it cannot be predicted (the removed row held a maximum).
+    removed and added are the same schedule before and after an update.
+    """
+    count, max_id, max_updated_at = fingerprint
+    if removed is not None and added is not None:
+        # Updated in place: only updated_at can move, and it never goes backwards
+        if removed.updated_at == max_updated_at and _later(added.updated_at, removed.updated_at) != added.updated_at:
+            return None
+        return (count, max_id, _later(max_updated_at, added.updated_at))
+    if removed is not None:
+        if removed.id == max_id or (removed.updated_at is not None and removed.updated_at == max_updated_at):
+            return None
+        return (count - 1, max_id, max_updated_at)
+    if added is not None:
+        return (count + 1, _later(max_id, added.id), _later(max_updated_at, added.updated_at))
+    return fingerprint
+
+
+def sweep_overlaps(slots):
+    """
+    Find every overlapping pair in a list of slots with a sweep line per (room, weekday).
+
+    Each slot is a (lab_room_id, day, second_day, start_minute, end_minute) tuple. Returns a
+    dict mapping (i, j) with i < j to the list of weekday keys on which slots i and j overlap.
+    Costs O(n log n) plus the number of overlapping pairs.
+    """
+    lanes = {}
+    for position, (lab_room_id, day, second_day, start_minute, end_minute) in enumerate(slots):
+        if start_minute is None or end_minute is None or end_minute <= start_minute:
+            continue
+        for weekday in schedule_days(day, second_day):
+            lanes.setdefault((lab_room_id, weekday), []).append((start_minute, end_minute, position))
+
+    pairs = {}
+    for (_, weekday), lane in lanes.items():
+        lane.sort()
+        active = []  # heap of (end_minute, position) for slots still open at the sweep point
+        for start_minute, end_minute, position in lane:
+            while active and active[0][0] <= start_minute:
+                heapq.heappop(active)
+            for _, other in active:
+                key = (other, position) if other < position else (position, other)
+                pairs.setdefault(key, []).append(weekday)
+            heapq.heappush(active, (end_minute, position))
+    return pairs
+
+
+conflict_engine = ScheduleConflictEngine()
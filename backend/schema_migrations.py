@@ -0,0 +1,451 @@
+"""
+Idempotent schema migrations applied at API startup.
+
+Each ensure_* function inspects information_schema and only issues DDL for
+what is missing, so running them against an up-to-date database is a no-op.
+Run this file directly to migrate without starting the API:
+
+    cd backend
+    python schema_migrations.py
+"""
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from schedule_conflicts import time_to_minutes, weekday_code
+
+# Database configuration (used when run as a script)
+DB_HOST = "localhost"
+DB_USER = "root"
+DB_PASSWORD = ""
+DB_NAME = "labclass_db"
+
+
+def column_exists(cursor, table, column):
+    cursor.execute(
+        """
+        SELECT COUNT(*) as count FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        """,
+        (table, column)
+    )
+    return cursor.fetchone()['count'] > 0
+
+
+def index_exists(cursor, table, index_name):
+    cursor.execute(
+        """
+        SELECT COUNT(*) as count FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        """,
+        (table, index_name)
+    )
+    return cursor.fetchone()['count'] > 0
+
+
+def table_exists(cursor, table):
+    cursor.execute(
+        """
+        SELECT COUNT(*) as count FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_name = %s
+        """,
+        (table,)
+    )
+    return cursor.fetchone()['count'] > 0
+
+
+def ensure_schedule_time_columns(conn):
+    """
+    Add integer minute and weekday code columns to schedules, backfill them from the
+    "HH:MM AM" strings, and index (semester_id, lab_room_id, day_code, start_minute).
+    The backfill runs once: idx_schedules_room_slot is created after it, so its
+    existence marks the backfill as done and rows whose times cannot be parsed
+    are not rescanned on every startup.
+    """
+    with conn.cursor() as cursor:
+        for column, definition in [
+            ("start_minute", "SMALLINT UNSIGNED NULL"),
+            ("end_minute", "SMALLINT UNSIGNED NULL"),
+            ("day_code", "TINYINT UNSIGNED NULL"),
+            ("second_day_code", "TINYINT UNSIGNED NULL"),
+        ]:
+            if not column_exists(cursor, "schedules", column):
+                cursor.execute(f"ALTER TABLE schedules ADD COLUMN {column} {definition}")
+                print(f"Added schedules.{column}")
+
+        if not index_exists(cursor, "schedules", "idx_schedules_room_slot"):
+            # Backfill rows written before the columns existed; every write path sets them since
+            cursor.execute(
+                """
+                SELECT id, day, second_day, start_time, end_time FROM schedules
+                WHERE start_minute IS NULL OR end_minute IS NULL OR day_code IS NULL
+                """
+            )
+            rows = cursor.fetchall()
+            updates = []
+            for row in rows:
+                updates.append((
+                    time_to_minutes(row['start_time']),
+                    time_to_minutes(row['end_time']),
+                    weekday_code(row['day']),
+                    weekday_code(row['second_day']),
+                    row['id']
+                ))
+            if updates:
+                cursor.executemany(
+                    """
+                    UPDATE schedules
+                    SET start_minute = %s, end_minute = %s, day_code = %s, second_day_code = %s
+                    WHERE id = %s
+                    """,
+                    updates
+                )
+                print(f"Backfilled minute/weekday columns for {len(updates)} schedules")
+            conn.commit()
+
+            cursor.execute(
+                "CREATE INDEX idx_schedules_room_slot ON schedules (semester_id, lab_room_id, day_code, start_minute)"
+            )
+            print("Created index idx_schedules_room_slot")
+        if not index_exists(cursor, "schedules", "idx_schedules_room_second_slot"):
+            cursor.execute(
+                "CREATE INDEX idx_schedules_room_second_slot ON schedules (semester_id, lab_room_id, second_day_code, start_minute)"
+            )
+            print("Created index idx_schedules_room_second_slot")
+
+    conn.commit()
+
+
+def ensure_email_outbox_table(conn):
+    """Create the email_outbox queue drained by email_outbox.EmailOutboxWorker"""
+    with conn.cursor() as cursor:
+        if not table_exists(cursor, "email_outbox"):
+            cursor.execute(
+                """
+                CREATE TABLE email_outbox (
+                    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                    recipient VARCHAR(255) NOT NULL,
+                    subject VARCHAR(255) NOT NULL,
+                    body_text MEDIUMTEXT NOT NULL,
+                    body_html MEDIUMTEXT NULL,
+                    status ENUM('pending', 'sending', 'sent', 'failed') NOT NULL DEFAULT 'pending',
+                    attempts INT NOT NULL DEFAULT 0,
+                    last_error TEXT NULL,
+                    claimed_by VARCHAR(64) NULL,
+                    claimed_at DATETIME NULL,
+                    next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    sent_at DATETIME NULL,
+                    INDEX idx_email_outbox_due (status, next_attempt_at)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+                """
+            )
+            print("Created table email_outbox")
+
+    conn.commit()
+
+
+def ensure_notification_read_state_table(conn):
+    """
+    Create notification_read_state, the per-user watermarks for global notifications
+    (see notification_store). Existing users start with both watermarks at the newest
+    global notification, so notifications fanned out before this table existed keep
+    being served only from their user_notifications rows.
+    """
+    with conn.cursor() as cursor:
+        if not table_exists(cursor, "notification_read_state"):
+            cursor.execute(
+                """
+                CREATE TABLE notification_read_state (
+                    user_id VARCHAR(36) PRIMARY KEY,
+                    global_read_up_to INT NOT NULL DEFAULT 0,
+                    global_read_at DATETIME NULL,
+                    global_cleared_up_to INT NOT NULL DEFAULT 0,
+                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+                """
+            )
+            cursor.execute(
+                """
+                INSERT INTO notification_read_state (user_id, global_read_up_to, global_cleared_up_to)
+                SELECT u.id, g.max_id, g.max_id
+                FROM users u
+                CROSS JOIN (SELECT COALESCE(MAX(id), 0) as max_id FROM notifications WHERE is_global = TRUE) g
+                """
+            )
+            print(f"Created table notification_read_state for {cursor.rowcount} users")
+
+        if not index_exists(cursor, "notifications", "idx_notifications_global"):
+            cursor.execute("CREATE INDEX idx_notifications_global ON notifications (is_global, id)")
+            print("Created index idx_notifications_global")
+
+    conn.commit()
+
+
+def ensure_notification_unread_count_column(conn):
+    """
+    Add the maintained unread counter to notification_read_state and seed it for
+    every user from their unread user_notifications rows.
+    """
+    with conn.cursor() as cursor:
+        if not column_exists(cursor, "notification_read_state", "unread_count"):
+            cursor.execute(
+                "ALTER TABLE notification_read_state ADD COLUMN unread_count INT NOT NULL DEFAULT 0"
+            )
+            cursor.execute(
+                """
+                INSERT INTO notification_read_state (user_id, unread_count)
+                SELECT u.id, COUNT(un.id)
+                FROM users u
+                LEFT JOIN user_notifications un ON un.user_id = u.id AND un.is_read = FALSE
+                GROUP BY u.id
+                ON DUPLICATE KEY UPDATE unread_count = VALUES(unread_count)
+                """
+            )
+            print("Added notification_read_state.unread_count and seeded it")
+
+    conn.commit()
+
+
+def ensure_notification_global_counter(conn):
+    """
+    Create notification_global_counter (a single row counting global notifications
+    posted) and notification_read_state.global_posted_seen, which together give
+    each user's unread globals without a scan (see notification_store). Existing
+    users start unseeded and are counted exactly once on their next unread count.
+    """
+    with conn.cursor() as cursor:
+        if not table_exists(cursor, "notification_global_counter"):
+            cursor.execute(
+                """
+                CREATE TABLE notification_global_counter (
+                    id TINYINT PRIMARY KEY,
+                    posted BIGINT NOT NULL DEFAULT 0
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+                """
+            )
+            print("Created table notification_global_counter")
+        cursor.execute("INSERT IGNORE INTO notification_global_counter (id, posted) VALUES (1, 0)")
+
+        if not column_exists(cursor, "notification_read_state", "global_posted_seen"):
+            cursor.execute("ALTER TABLE notification_read_state ADD COLUMN global_posted_seen BIGINT NULL")
+            print("Added notification_read_state.global_posted_seen")
+
+    conn.commit()
+
+
+def ensure_user_notifications_inbox_index(conn):
+    """
+    Index user_notifications (user_id, is_read, notification_id) for paged inbox
+    reads, unread counts and the per-notification exception lookups.
+    """
+    with conn.cursor() as cursor:
+        if not index_exists(cursor, "user_notifications", "idx_user_notifications_inbox"):
+            cursor.execute(
+                "CREATE INDEX idx_user_notifications_inbox ON user_notifications (user_id, is_read, notification_id)"
+            )
+            print("Created index idx_user_notifications_inbox")
+
+    conn.commit()
+
+
+def ensure_notification_archive_table(conn):
+    """Create notification_archive, where the retention job summarizes what it deletes"""
+    with conn.cursor() as cursor:
+        if not table_exists(cursor, "notification_archive"):
+            cursor.execute(
+                """
+                CREATE TABLE notification_archive (
+                    notification_id INT PRIMARY KEY,
+                    title VARCHAR(100) NOT NULL,
+                    message TEXT NOT NULL,
+                    type VARCHAR(20) NOT NULL,
+                    related_to VARCHAR(50) NULL,
+                    related_id INT NULL,
+                    is_global BOOLEAN NOT NULL DEFAULT FALSE,
+                    created_at DATETIME NOT NULL,
+                    created_by VARCHAR(36) NULL,
+                    recipients INT NOT NULL DEFAULT 0,
+                    read_recipients INT NOT NULL DEFAULT 0,
+                    archived_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    INDEX idx_notification_archive_created (created_at)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+                """
+            )
+            print("Created table notification_archive")
+
+    conn.commit()
+
+
+def ensure_notification_dedupe_table(conn):
+    """
+    Create notification_dedupe, one lockable row per de-duplicated notification
+    kind and scope (see routes/notifications.find_duplicate_notification). It
+    replaces the time-bucketed notifications.dedupe_key, which databases migrated
+    earlier keep but no longer write.
+    """
+    with conn.cursor() as cursor:
+        if not table_exists(cursor, "notification_dedupe"):
+            cursor.execute(
+                """
+                CREATE TABLE notification_dedupe (
+                    dedupe_key CHAR(64) PRIMARY KEY,
+                    notification_id INT NULL,
+                    created_at DATETIME NULL
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+                """
+            )
+            print("Created table notification_dedupe")
+
+    conn.commit()
+
+
+def ensure_schedule_sync_tables(conn):
+    """
+    Create schedule_tombstones and sync_watermarks for the incremental Supabase
+    sync, and index schedules.updated_at for its change scans.
+    """
+    with conn.cursor() as cursor:
+        if not table_exists(cursor, "schedule_tombstones"):
+            cursor.execute(
+                """
+                CREATE TABLE schedule_tombstones (
+                    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                    schedule_id INT NOT NULL,
+                    deleted_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+                """
+            )
+            print("Created table schedule_tombstones")
+
+        if not table_exists(cursor, "sync_watermarks"):
+            cursor.execute(
+                """
+                CREATE TABLE sync_watermarks (
+                    sync_name VARCHAR(64) PRIMARY KEY,
+                    last_updated_at DATETIME NULL,
+                    last_tombstone_id BIGINT NOT NULL DEFAULT 0,
+                    synced_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+                """
+            )
+            print("Created table sync_watermarks")
+
+        if not index_exists(cursor, "schedules", "idx_schedules_updated_at"):
+            cursor.execute("CREATE INDEX idx_schedules_updated_at ON schedules (updated_at, id)")
+            print("Created index idx_schedules_updated_at")
+
+    conn.commit()
+
+
+def ensure_schedule_sync_state_table(conn):
+    """Create schedule_sync_state, the content hash last pushed to Supabase per schedule"""
+    with conn.cursor() as cursor:
+        if not table_exists(cursor, "schedule_sync_state"):
+            cursor.execute(
+                """
+                CREATE TABLE schedule_sync_state (
+                    schedule_id INT PRIMARY KEY,
+                    content_hash CHAR(64) NOT NULL,
+                    pushed_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+                """
+            )
+            print("Created table schedule_sync_state")
+
+    conn.commit()
+
+
+def ensure_schedule_sync_outbox_table(conn):
+    """Create schedule_sync_outbox, the schedule ids written since the sync worker last ran"""
+    with conn.cursor() as cursor:
+        if not table_exists(cursor, "schedule_sync_outbox"):
+            cursor.execute(
+                """
+                CREATE TABLE schedule_sync_outbox (
+                    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                    schedule_id INT NOT NULL,
+                    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+                """
+            )
+            print("Created table schedule_sync_outbox")
+
+    conn.commit()
+
+
+def ensure_course_offerings_unique_key(conn):
+    """
+    Make (code, year_and_section, semester_id) unique on course_offerings so
+    imports can upsert. Duplicates left by the old import are not removed
+    here: if any exist the migration stops and names them, and
+    fix_course_offering_duplicates.py removes them once they are reviewed.
+    """
+    with conn.cursor() as cursor:
+        if not index_exists(cursor, "course_offerings", "uq_course_offerings_key"):
+            cursor.execute(
+                """
+                SELECT COUNT(*) as count FROM (
+                    SELECT 1 FROM course_offerings
+                    GROUP BY code, year_and_section, semester_id
+                    HAVING COUNT(*) > 1
+                ) duplicates
+                """
+            )
+            duplicate_keys = cursor.fetchone()['count']
+            if duplicate_keys:
+                raise RuntimeError(
+                    f"course_offerings has {duplicate_keys} duplicated (code, year_and_section, semester_id) "
+                    "keys, so uq_course_offerings_key cannot be created. Review them with "
+                    "'python fix_course_offering_duplicates.py', remove them with "
+                    "'python fix_course_offering_duplicates.py --apply', then restart the API"
+                )
+            cursor.execute(
+                "CREATE UNIQUE INDEX uq_course_offerings_key ON course_offerings (code, year_and_section, semester_id)"
+            )
+            print("Created index uq_course_offerings_key")
+
+    conn.commit()
+
+
+MIGRATIONS = [
+    ensure_schedule_time_columns,
+    ensure_email_outbox_table,
+    ensure_notification_read_state_table,
+    ensure_notification_unread_count_column,
+    ensure_notification_global_counter,
+    ensure_user_notifications_inbox_index,
+    ensure_notification_archive_table,
+    ensure_notification_dedupe_table,
+    ensure_schedule_sync_tables,
+    ensure_schedule_sync_state_table,
+    ensure_schedule_sync_outbox_table,
+    ensure_course_offerings_unique_key,
+]
+
+
+def apply_migrations(conn):
+    """Run every migration in order; each one commits its own work"""
+    for migration in MIGRATIONS:
+        try:
+            migration(conn)
+        except Exception as e:
+            conn.rollback()
+            print(f"Error applying migration {migration.__name__}: {e}")
+
+
+if __name__ == "__main__":
+    import pymysql
+
+    connection = pymysql.connect(
+        host=DB_HOST,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME,
+        cursorclass=pymysql.cursors.DictCursor
+    )
+    try:
+        apply_migrations(connection)
+        print("Migrations completed")
+    finally:
+        connection.close()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import backend modules the same way the routes do
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
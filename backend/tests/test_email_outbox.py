@@ -0,0 +1,288 @@
+"""
+EmailOutboxWorker against a real SMTP server (aiosmtpd on localhost).
+
+MySQL is not needed: FakeOutbox stands in for the email_outbox table and
+answers the handful of statements email_outbox.py issues, with a clock the
+tests move forward to make retries come due.
+
+    pip install -r test_requirements.txt
+    cd backend && python -m pytest tests/test_email_outbox.py
+"""
+import re
+import socket
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from aiosmtpd.controller import Controller
+
+import email_outbox
+from email_outbox import EmailOutboxWorker, enqueue_email
+
+
+class FakeOutbox:
+    """The email_outbox table, with NOW() read from self.now"""
+
+    def __init__(self):
+        self.rows = {}
+        self.next_id = 1
+        self.now = datetime(2025, 6, 1, 8, 0, 0)
+
+    def add(self, **values):
+        row = {
+            "id": self.next_id, "recipient": "", "subject": "", "body_text": "", "body_html": None,
+            "status": "pending", "attempts": 0, "last_error": None, "claimed_by": None,
+            "claimed_at": None, "next_attempt_at": self.now, "created_at": self.now, "sent_at": None
+        }
+        row.update(values)
+        self.rows[row["id"]] = row
+        self.next_id += 1
+        return row["id"]
+
+    def connection(self):
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, outbox):
+        self.outbox = outbox
+
+    def cursor(self):
+        return FakeCursor(self.outbox)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, outbox):
+        self.outbox = outbox
+        self.result = []
+        self.rowcount = 0
+        self.lastrowid = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def fetchall(self):
+        return self.result
+
+    def execute(self, query, params=()):
+        sql = re.sub(r"\s+", " ", query).strip()
+        outbox = self.outbox
+        now = outbox.now
+
+        if sql.startswith("INSERT INTO email_outbox"):
+            recipient, subject, body_text, body_html = params
+            self.lastrowid = outbox.add(recipient=recipient, subject=subject, body_text=body_text, body_html=body_html)
+            self.rowcount = 1
+        elif "SET status = 'sending'" in sql:
+            worker_id, claim_timeout, limit = params
+            stale = now - timedelta(seconds=claim_timeout)
+            due = [
+                row for row in sorted(outbox.rows.values(), key=lambda row: row["id"])
+                if (row["status"] == "pending" and row["next_attempt_at"] <= now)
+                or (row["status"] == "sending" and row["claimed_at"] < stale)
+            ][:limit]
+            for row in due:
+                row.update(status="sending", claimed_by=worker_id, claimed_at=now)
+            self.rowcount = len(due)
+        elif sql.startswith("SELECT id, recipient"):
+            self.result = [
+                dict(row, age_seconds=(now - row["created_at"]).total_seconds())
+                for row in sorted(outbox.rows.values(), key=lambda row: row["id"])
+                if row["status"] == "sending" and row["claimed_by"] == params[0]
+            ]
+        elif "SET status = 'sent'" in sql:
+            row = outbox.rows[params[0]]
+            row.update(status="sent", sent_at=now, attempts=row["attempts"] + 1, last_error=None, claimed_by=None)
+        elif "SET status = 'failed'" in sql:
+            attempts, error, outbox_id = params
+            outbox.rows[outbox_id].update(status="failed", attempts=attempts, last_error=error, claimed_by=None)
+        elif "SET status = 'pending'" in sql:
+            attempts, error, delay, outbox_id = params
+            outbox.rows[outbox_id].update(
+                status="pending", attempts=attempts, last_error=error, claimed_by=None,
+                next_attempt_at=now + timedelta(seconds=delay)
+            )
+        else:
+            raise AssertionError(f"Unexpected statement: {sql}")
+
+
+class FakePool:
+    def __init__(self, outbox):
+        self.outbox = outbox
+
+    @contextmanager
+    def connection(self):
+        yield self.outbox.connection()
+
+
+class RecordingHandler:
+    """Accepts mail, or answers RCPT / DATA with a scripted failure"""
+
+    def __init__(self):
+        self.messages = []
+        self.data_replies = []
+        self.rejected_recipients = set()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.rejected_recipients:
+            return "550 5.1.1 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.data_replies:
+            return self.data_replies.pop(0)
+        self.messages.append(envelope)
+        return "250 Message accepted for delivery"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    monkeypatch.setattr(email_outbox, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(email_outbox, "SMTP_PORT", controller.port)
+    monkeypatch.setattr(email_outbox, "SMTP_STARTTLS", False)
+    monkeypatch.setattr(email_outbox, "SMTP_AUTH", False)
+    monkeypatch.setattr(email_outbox, "SMTP_FROM", "scheduler@example.test")
+    try:
+        yield handler
+    finally:
+        controller.stop()
+
+
+@pytest.fixture
+def outbox():
+    return FakeOutbox()
+
+
+@pytest.fixture
+def worker(outbox):
+    worker = EmailOutboxWorker()
+    # process_batch is driven by the tests; the background thread is never started
+    worker._pool = FakePool(outbox)
+    yield worker
+    worker._close_smtp()
+
+
+def test_enqueued_mail_is_claimed_and_sent(smtp_server, outbox, worker):
+    first = enqueue_email(outbox.connection(), "dean@example.test", "Schedule approved", "Approved", "<p>Approved</p>")
+    second = enqueue_email(outbox.connection(), "chair@example.test", "Schedule pending", "Pending")
+    assert outbox.rows[first]["status"] == "pending"
+
+    assert worker.process_batch() == 2
+
+    assert [envelope.rcpt_tos for envelope in smtp_server.messages] == [["dean@example.test"], ["chair@example.test"]]
+    assert "Subject: Schedule approved" in smtp_server.messages[0].content.decode()
+    for outbox_id in (first, second):
+        assert outbox.rows[outbox_id]["status"] == "sent"
+        assert outbox.rows[outbox_id]["attempts"] == 1
+        assert outbox.rows[outbox_id]["claimed_by"] is None
+    # Both messages went over one SMTP session
+    assert worker.stats()["smtp_connections"] == 1
+    assert worker.process_batch() == 0
+
+
+def test_temporary_failure_is_retried_after_backoff(smtp_server, outbox, worker):
+    smtp_server.data_replies = ["451 4.3.0 Try again later", "451 4.3.0 Try again later"]
+    outbox_id = enqueue_email(outbox.connection(), "dean@example.test", "Reminder", "Body")
+
+    worker.process_batch()
+    row = outbox.rows[outbox_id]
+    assert row["status"] == "pending"
+    assert row["attempts"] == 1
+    assert "Try again later" in row["last_error"]
+    assert row["next_attempt_at"] == outbox.now + timedelta(seconds=email_outbox.retry_delay(1))
+
+    # Not due yet
+    assert worker.process_batch() == 0
+
+    outbox.now = row["next_attempt_at"]
+    worker.process_batch()
+    assert row["attempts"] == 2
+    # The backoff doubles
+    assert row["next_attempt_at"] == outbox.now + timedelta(seconds=email_outbox.retry_delay(2))
+    assert email_outbox.retry_delay(2) == 2 * email_outbox.retry_delay(1)
+
+    outbox.now = row["next_attempt_at"]
+    worker.process_batch()
+    assert row["status"] == "sent"
+    assert row["attempts"] == 3
+    assert len(smtp_server.messages) == 1
+    assert worker.stats()["retried"] == 2
+
+
+def test_rejected_recipient_fails_without_retry(smtp_server, outbox, worker):
+    smtp_server.rejected_recipients.add("nobody@example.test")
+    rejected = enqueue_email(outbox.connection(), "nobody@example.test", "Hello", "Body")
+    accepted = enqueue_email(outbox.connection(), "dean@example.test", "Hello", "Body")
+
+    worker.process_batch()
+
+    assert outbox.rows[rejected]["status"] == "failed"
+    assert outbox.rows[rejected]["attempts"] == 1
+    assert outbox.rows[accepted]["status"] == "sent"
+
+
+def test_retries_stop_at_max_attempts(smtp_server, outbox, worker, monkeypatch):
+    monkeypatch.setattr(email_outbox, "EMAIL_MAX_ATTEMPTS", 2)
+    smtp_server.data_replies = ["451 4.3.0 Try again later"] * 2
+    outbox_id = enqueue_email(outbox.connection(), "dean@example.test", "Hello", "Body")
+
+    worker.process_batch()
+    outbox.now = outbox.rows[outbox_id]["next_attempt_at"]
+    worker.process_batch()
+
+    assert outbox.rows[outbox_id]["status"] == "failed"
+    assert outbox.rows[outbox_id]["attempts"] == 2
+    assert smtp_server.messages == []
+
+
+def test_rows_left_claimed_by_a_crashed_worker_are_recovered(smtp_server, outbox, worker):
+    timeout = timedelta(seconds=email_outbox.EMAIL_CLAIM_TIMEOUT_SECONDS)
+    abandoned = outbox.add(
+        recipient="dean@example.test", subject="Abandoned", body_text="Body",
+        status="sending", claimed_by="crashed-worker", claimed_at=outbox.now - timeout - timedelta(seconds=1)
+    )
+    in_flight = outbox.add(
+        recipient="chair@example.test", subject="In flight", body_text="Body",
+        status="sending", claimed_by="busy-worker", claimed_at=outbox.now - timedelta(seconds=5)
+    )
+
+    assert worker.process_batch() == 1
+
+    assert outbox.rows[abandoned]["status"] == "sent"
+    # A claim younger than the timeout still belongs to its worker
+    assert outbox.rows[in_flight]["status"] == "sending"
+    assert outbox.rows[in_flight]["claimed_by"] == "busy-worker"
+    assert [envelope.rcpt_tos for envelope in smtp_server.messages] == [["dean@example.test"]]
+
+
+def test_nothing_is_sent_without_credentials(smtp_server, outbox, worker, monkeypatch):
+    monkeypatch.setattr(email_outbox, "SMTP_AUTH", True)
+    monkeypatch.setattr(email_outbox, "SMTP_USERNAME", "")
+    monkeypatch.setattr(email_outbox, "SMTP_PASSWORD", "")
+    outbox_id = enqueue_email(outbox.connection(), "dean@example.test", "Hello", "Body")
+
+    assert worker.process_batch() == 0
+
+    assert outbox.rows[outbox_id]["status"] == "pending"
+    assert outbox.rows[outbox_id]["attempts"] == 0
+    assert smtp_server.messages == []
+    assert worker.stats()["last_error"] == "SMTP credentials are not configured"
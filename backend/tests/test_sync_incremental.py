@@ -0,0 +1,250 @@
+"""
+sync_schedules.sync_incremental against the PostgREST mock (benchmarks/mock_postgrest.py).
+
+MySQL is not needed: FakeSyncDatabase stands in for schedules_with_names,
+schedule_tombstones, schedule_sync_state and sync_watermarks, answering the
+statements sync_schedules.py issues, and read_schedules is replaced by a reader
+over its schedules that converts rows the way the real one does.
+
+    cd backend && python -m pytest tests/test_sync_incremental.py
+"""
+import os
+import re
+import socket
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from mock_postgrest import serve
+import sync_schedules
+
+T0 = datetime(2025, 6, 1, 8, 0, 0)
+
+
+class FakeSyncDatabase:
+    def __init__(self, last_updated_at=T0, last_tombstone_id=0):
+        self.schedules = {}
+        self.tombstones = {}
+        self.sync_state = {}
+        self.watermark = {"last_updated_at": last_updated_at, "last_tombstone_id": last_tombstone_id}
+        self.next_tombstone_id = 1
+
+    def save_schedule(self, schedule_id, updated_at, **values):
+        row = {
+            "id": schedule_id, "semester": "1st Semester 2025-2026", "section": "BSIT-1A",
+            "course_code": f"IT{100 + schedule_id}", "course_name": f"Course {schedule_id}",
+            "day": "Monday", "second_day": None, "lab_room": "Lab 1", "instructor_name": "Instructor",
+            "start_time": "08:00:00", "end_time": "10:00:00", "schedule_types": '["Lab"]',
+            "status": "approved", "class_type": "regular", "created_by": "admin",
+            "created_at": T0, "updated_at": updated_at
+        }
+        row.update(values)
+        self.schedules[schedule_id] = row
+
+    def delete_schedule(self, schedule_id):
+        """What the schedules AFTER DELETE trigger does"""
+        del self.schedules[schedule_id]
+        self.tombstones[self.next_tombstone_id] = schedule_id
+        self.next_tombstone_id += 1
+
+    def read_schedules(self, connection, query, params=()):
+        sql = re.sub(r"\s+", " ", query).strip()
+        rows = sorted(self.schedules.values(), key=lambda row: (row["updated_at"], row["id"]))
+        if "WHERE updated_at >= %s" in sql:
+            since, limit = params
+            rows = [row for row in rows if row["updated_at"] >= since]
+        elif "WHERE (updated_at, id) > (%s, %s)" in sql:
+            updated_at, last_id, limit = params
+            updated_at = datetime.fromisoformat(updated_at)
+            rows = [row for row in rows if (row["updated_at"], row["id"]) > (updated_at, last_id)]
+        else:
+            raise AssertionError(f"Unexpected read: {sql}")
+        return [
+            dict(row, created_at=row["created_at"].isoformat(), updated_at=row["updated_at"].isoformat())
+            for row in rows[:limit]
+        ]
+
+    def connection(self):
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self, *args):
+        return FakeCursor(self.db)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.result = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+    def executemany(self, query, rows):
+        for params in rows:
+            self.execute(query, params)
+
+    def execute(self, query, params=()):
+        sql = re.sub(r"\s+", " ", query).strip()
+        db = self.db
+
+        if sql.startswith("SELECT last_updated_at, last_tombstone_id FROM sync_watermarks"):
+            self.result = [dict(db.watermark)]
+        elif sql.startswith("SELECT id, schedule_id FROM schedule_tombstones WHERE id > %s"):
+            self.result = [
+                {"id": tombstone_id, "schedule_id": schedule_id}
+                for tombstone_id, schedule_id in sorted(db.tombstones.items()) if tombstone_id > params[0]
+            ]
+        elif sql.startswith("SELECT schedule_id, content_hash FROM schedule_sync_state"):
+            self.result = [
+                {"schedule_id": schedule_id, "content_hash": db.sync_state[schedule_id]}
+                for schedule_id in params if schedule_id in db.sync_state
+            ]
+        elif sql.startswith("INSERT INTO schedule_sync_state"):
+            schedule_id, content_hash, pushed_at = params
+            db.sync_state[schedule_id] = content_hash
+        elif sql.startswith("DELETE FROM schedule_sync_state"):
+            for schedule_id in params:
+                db.sync_state.pop(schedule_id, None)
+        elif sql.startswith("INSERT INTO sync_watermarks"):
+            _, last_updated_at, last_tombstone_id = params
+            db.watermark = {"last_updated_at": last_updated_at, "last_tombstone_id": last_tombstone_id}
+        elif sql.startswith("DELETE FROM schedule_tombstones WHERE id <= %s"):
+            for tombstone_id in [tombstone_id for tombstone_id in db.tombstones if tombstone_id <= params[0]]:
+                del db.tombstones[tombstone_id]
+        else:
+            raise AssertionError(f"Unexpected statement: {sql}")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def supabase(monkeypatch):
+    server, state = serve(port=free_port())
+    monkeypatch.setattr(sync_schedules, "SUPABASE_URL", f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setattr(sync_schedules, "_supabase_session", None)
+    try:
+        yield state
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeSyncDatabase()
+    monkeypatch.setattr(sync_schedules, "get_mysql_connection", db.connection)
+    monkeypatch.setattr(sync_schedules, "read_schedules", db.read_schedules)
+    return db
+
+
+def remote_rows(supabase):
+    return {int(key): row for key, row in supabase.tables.get("schedules", {}).items()}
+
+
+def rows_posted(supabase):
+    return supabase.stats()["rows_written"].get("POST", 0)
+
+
+def test_inserted_schedule_is_pushed(supabase, db):
+    db.save_schedule(1, T0 + timedelta(seconds=10))
+
+    sync_schedules.sync_incremental()
+
+    assert remote_rows(supabase)[1]["course_name"] == "Course 1"
+    assert remote_rows(supabase)[1]["schedule_types"] == ["Lab"]
+    assert set(db.sync_state) == {1}
+    assert db.watermark["last_updated_at"] == T0 + timedelta(seconds=10)
+
+
+def test_updated_schedule_is_pushed_again(supabase, db):
+    db.save_schedule(1, T0 + timedelta(seconds=10))
+    sync_schedules.sync_incremental()
+
+    db.save_schedule(1, T0 + timedelta(seconds=60), course_name="Renamed course")
+    sync_schedules.sync_incremental()
+
+    assert remote_rows(supabase)[1]["course_name"] == "Renamed course"
+    assert rows_posted(supabase) == 2
+    assert db.watermark["last_updated_at"] == T0 + timedelta(seconds=60)
+
+
+def test_overlap_picks_up_late_commit_without_resending_unchanged_rows(supabase, db):
+    db.save_schedule(1, T0 + timedelta(seconds=10))
+    sync_schedules.sync_incremental()
+    assert rows_posted(supabase) == 1
+
+    # Committed after the last cycle but stamped before its watermark, inside the overlap
+    db.save_schedule(2, T0 + timedelta(seconds=10 - sync_schedules.SYNC_OVERLAP_SECONDS + 1))
+    sync_schedules.sync_incremental()
+
+    assert set(remote_rows(supabase)) == {1, 2}
+    # Schedule 1 was re-read too, but its hash matched and it was not sent again
+    assert rows_posted(supabase) == 2
+    assert db.watermark["last_updated_at"] == T0 + timedelta(seconds=10)
+
+
+def test_tombstone_deletes_remote_schedule(supabase, db):
+    db.save_schedule(1, T0 + timedelta(seconds=10))
+    db.save_schedule(2, T0 + timedelta(seconds=20))
+    sync_schedules.sync_incremental()
+
+    db.delete_schedule(2)
+    sync_schedules.sync_incremental()
+
+    assert set(remote_rows(supabase)) == {1}
+    assert set(db.sync_state) == {1}
+    # The watermark covers the tombstone, which is then dropped
+    assert db.watermark["last_tombstone_id"] == 1
+    assert db.tombstones == {}
+
+
+def test_failed_push_keeps_the_watermark(supabase, db, monkeypatch):
+    db.save_schedule(1, T0 + timedelta(seconds=10))
+    sync_schedules.sync_incremental()
+    synced = dict(db.watermark)
+
+    db.save_schedule(2, T0 + timedelta(seconds=30))
+    db.delete_schedule(1)
+    monkeypatch.setattr(sync_schedules, "SYNC_MAX_RETRIES", 0)
+    supabase.fail_rate = 1.0
+    sync_schedules.sync_incremental()
+
+    assert db.watermark == synced
+    assert set(remote_rows(supabase)) == {1}
+    assert set(db.sync_state) == {1}
+    assert db.tombstones == {1: 1}
+
+    # The next cycle retries everything the failed one missed
+    supabase.fail_rate = 0.0
+    sync_schedules.sync_incremental()
+
+    assert set(remote_rows(supabase)) == {2}
+    assert set(db.sync_state) == {2}
+    assert db.watermark == {"last_updated_at": T0 + timedelta(seconds=30), "last_tombstone_id": 1}
+    assert db.tombstones == {}
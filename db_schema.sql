@@ -79,7 +79,8 @@ CREATE TABLE IF NOT EXISTS course_offerings (
     year_and_section VARCHAR(50) NOT NULL,
     semester_id INT NOT NULL,
     created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (semester_id) REFERENCES semesters(id) ON DELETE CASCADE
+    FOREIGN KEY (semester_id) REFERENCES semesters(id) ON DELETE CASCADE,
+    UNIQUE KEY uq_course_offerings_key (code, year_and_section, semester_id) -- imports upsert on this
 );
 
 -- Lab rooms
@@ -130,6 +131,10 @@ CREATE TABLE IF NOT EXISTS schedules (
     status ENUM('draft', 'pending', 'approved') NOT NULL DEFAULT 'draft',
     class_type ENUM('lab', 'lec', 'lab/lec') NOT NULL,
     created_by VARCHAR(36),
+    start_minute SMALLINT UNSIGNED NULL, -- start_time as minutes since midnight
+    end_minute SMALLINT UNSIGNED NULL, -- end_time as minutes since midnight
+    day_code TINYINT UNSIGNED NULL, -- ISO weekday of day (Monday = 1)
+    second_day_code TINYINT UNSIGNED NULL, -- ISO weekday of second_day
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (semester_id) REFERENCES semesters(id),
@@ -140,6 +145,40 @@ CREATE TABLE IF NOT EXISTS schedules (
 -- Create index for faster filtering
 CREATE INDEX idx_schedules_semester ON schedules(semester_id);
 CREATE INDEX idx_schedules_lab_room ON schedules(lab_room_id);
+-- Range scans for conflict checks and weekday/time ordering
+CREATE INDEX idx_schedules_room_slot ON schedules(semester_id, lab_room_id, day_code, start_minute);
+CREATE INDEX idx_schedules_room_second_slot ON schedules(semester_id, lab_room_id, second_day_code, start_minute);
+-- Change scans for the incremental Supabase sync
+CREATE INDEX idx_schedules_updated_at ON schedules(updated_at, id);
+
+-- Deleted schedule ids not yet pushed to Supabase (see schedule_changes.py)
+CREATE TABLE IF NOT EXISTS schedule_tombstones (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    schedule_id INT NOT NULL,
+    deleted_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Progress of incremental syncs: changes up to these marks have been pushed
+CREATE TABLE IF NOT EXISTS sync_watermarks (
+    sync_name VARCHAR(64) PRIMARY KEY,
+    last_updated_at DATETIME NULL, -- newest schedules.updated_at pushed
+    last_tombstone_id BIGINT NOT NULL DEFAULT 0, -- newest schedule_tombstones.id pushed
+    synced_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- What was last pushed to Supabase per schedule, so unchanged rows are skipped
+CREATE TABLE IF NOT EXISTS schedule_sync_state (
+    schedule_id INT PRIMARY KEY,
+    content_hash CHAR(64) NOT NULL, -- sha256 of the row as sent (sync_schedules.schedule_content_hash)
+    pushed_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Schedule ids written by the API and not yet pushed by the sync worker (see schedule_changes.py)
+CREATE TABLE IF NOT EXISTS schedule_sync_outbox (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    schedule_id INT NOT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
 
 -- Password reset tokens table
 CREATE TABLE IF NOT EXISTS password_reset_tokens (
@@ -170,6 +209,14 @@ CREATE TABLE IF NOT EXISTS notifications (
     FOREIGN KEY (created_by) REFERENCES users(id) ON DELETE SET NULL
 );
 
+-- Last notification per de-duplicated (kind, scope); the row is locked while
+-- deciding whether to post again, so concurrent requests cannot both post
+CREATE TABLE IF NOT EXISTS notification_dedupe (
+    dedupe_key CHAR(64) PRIMARY KEY, -- sha256 of kind and scope
+    notification_id INT NULL,
+    created_at DATETIME NULL
+);
+
 -- Junction table to track user-notification relationships
 CREATE TABLE IF NOT EXISTS user_notifications (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -181,11 +228,51 @@ CREATE TABLE IF NOT EXISTS user_notifications (
     FOREIGN KEY (notification_id) REFERENCES notifications(id) ON DELETE CASCADE
 );
 
+-- Per-user read/cleared watermarks for global notifications, which are stored
+-- once instead of being copied into user_notifications for every user
+CREATE TABLE IF NOT EXISTS notification_read_state (
+    user_id VARCHAR(36) PRIMARY KEY,
+    global_read_up_to INT NOT NULL DEFAULT 0, -- global notifications with id <= this are read
+    global_read_at DATETIME NULL,
+    global_cleared_up_to INT NOT NULL DEFAULT 0, -- global notifications with id <= this are hidden
+    unread_count INT NOT NULL DEFAULT 0, -- unread user_notifications rows, maintained on write
+    global_posted_seen BIGINT NULL, -- notification_global_counter.posted already accounted for; NULL = recount
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Number of global notifications ever posted (one row, id = 1); a user's unread
+-- globals are posted - notification_read_state.global_posted_seen
+CREATE TABLE IF NOT EXISTS notification_global_counter (
+    id TINYINT PRIMARY KEY,
+    posted BIGINT NOT NULL DEFAULT 0
+);
+INSERT IGNORE INTO notification_global_counter (id, posted) VALUES (1, 0);
+
+-- Summaries of notifications removed by the retention job (notification_retention.py):
+-- one row per notification with recipient counts instead of one row per recipient
+CREATE TABLE IF NOT EXISTS notification_archive (
+    notification_id INT PRIMARY KEY,
+    title VARCHAR(100) NOT NULL,
+    message TEXT NOT NULL,
+    type VARCHAR(20) NOT NULL,
+    related_to VARCHAR(50) NULL,
+    related_id INT NULL,
+    is_global BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at DATETIME NOT NULL,
+    created_by VARCHAR(36) NULL,
+    recipients INT NOT NULL DEFAULT 0, -- recipients whose rows were archived
+    read_recipients INT NOT NULL DEFAULT 0, -- of those, how many had read it
+    archived_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_notification_archive_created (created_at)
+);
+
 -- Create indexes for faster querying
 CREATE INDEX idx_notifications_created_at ON notifications(created_at);
 CREATE INDEX idx_notifications_related ON notifications(related_to, related_id);
+CREATE INDEX idx_notifications_global ON notifications(is_global, id);
 CREATE INDEX idx_user_notifications_user ON user_notifications(user_id);
 CREATE INDEX idx_user_notifications_read ON user_notifications(is_read);
+CREATE INDEX idx_user_notifications_inbox ON user_notifications(user_id, is_read, notification_id);
 
 -- Add table for tracking forced logouts
 CREATE TABLE IF NOT EXISTS forced_logouts (
@@ -193,4 +280,23 @@ CREATE TABLE IF NOT EXISTS forced_logouts (
     user_id VARCHAR(50) NOT NULL,
     timestamp DATETIME NOT NULL,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
\ No newline at end of file
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Outbound email queue; request handlers insert, a background worker delivers
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    recipient VARCHAR(255) NOT NULL,
+    subject VARCHAR(255) NOT NULL,
+    body_text MEDIUMTEXT NOT NULL,
+    body_html MEDIUMTEXT NULL,
+    status ENUM('pending', 'sending', 'sent', 'failed') NOT NULL DEFAULT 'pending',
+    attempts INT NOT NULL DEFAULT 0,
+    last_error TEXT NULL,
+    claimed_by VARCHAR(64) NULL, -- worker currently delivering the row
+    claimed_at DATETIME NULL,
+    next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    sent_at DATETIME NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE INDEX idx_email_outbox_due ON email_outbox(status, next_attempt_at);
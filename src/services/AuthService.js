@@ -1,5 +1,6 @@
 import axios from 'axios';
 import router from '../router';
+import EventService from './EventService';
 
 const API_URL = 'http://localhost:8000/api';
 
@@ -49,6 +50,9 @@ class AuthService {
     sessionStorage.removeItem('user');
     localStorage.removeItem('token');
     localStorage.removeItem('user');
+
+    // Close the server push stream opened with the old token
+    EventService.disconnect();
     
     // Redirect to login page
     router.push('/login');
@@ -0,0 +1,125 @@
+const API_URL = 'http://localhost:8000/api';
+
+// While the stream is down, subscribers are sent 'resync' this often so they
+// refetch counts and re-check forced logout by polling
+const FALLBACK_POLL_MS = 60000;
+// and a new stream is tried this often, with whatever token is stored by then
+const RECONNECT_MS = 30000;
+
+// Single shared connection to the server-sent event stream at /api/events.
+// Components subscribe to event types instead of polling on setInterval.
+class EventService {
+  constructor() {
+    this.source = null;
+    this.handlers = {};
+    this.pollTimer = null;
+    this.reconnectTimer = null;
+  }
+
+  // Open the stream if it is not open yet. EventSource cannot send headers,
+  // so the token goes in the query string. The server only accepts signed
+  // tokens; fallback-token sessions get no stream and are polled instead.
+  connect() {
+    if (this.source && this.source.readyState !== EventSource.CLOSED) {
+      return;
+    }
+
+    const token = sessionStorage.getItem('token') || localStorage.getItem('token');
+    if (!token) {
+      return;
+    }
+    if (token.startsWith('user_fallback_token_')) {
+      this.startFallbackPolling();
+      return;
+    }
+
+    const params = new URLSearchParams({ token });
+    this.source = new EventSource(`${API_URL}/events?${params.toString()}`);
+
+    // 'connected' also fires after every automatic reconnect, and 'resync' when the
+    // server dropped events for us; both mean cached counts may be stale
+    ['connected', 'resync', 'notification', 'pending_accounts', 'forced_logout'].forEach((type) => {
+      this.source.addEventListener(type, (event) => {
+        let data = {};
+        try {
+          data = JSON.parse(event.data);
+        } catch (error) {
+          console.error(`EventService: Invalid ${type} event payload:`, error);
+        }
+        this.dispatch(type, data);
+      });
+    });
+
+    this.source.addEventListener('connected', () => this.stopFallbackPolling());
+
+    this.source.onerror = () => {
+      // The browser reconnects on its own unless the stream was rejected, e.g. once
+      // the token in the URL has expired. Then poll, and retry with the stored token.
+      if (this.source && this.source.readyState === EventSource.CLOSED) {
+        console.warn('EventService: Event stream closed by the server; polling until it reconnects');
+        this.source = null;
+        this.startFallbackPolling();
+        this.scheduleReconnect();
+      }
+    };
+  }
+
+  disconnect() {
+    this.stopFallbackPolling();
+    clearTimeout(this.reconnectTimer);
+    this.reconnectTimer = null;
+    if (this.source) {
+      this.source.close();
+      this.source = null;
+    }
+  }
+
+  scheduleReconnect() {
+    clearTimeout(this.reconnectTimer);
+    this.reconnectTimer = setTimeout(() => {
+      this.reconnectTimer = null;
+      this.connect();
+    }, RECONNECT_MS);
+  }
+
+  startFallbackPolling() {
+    if (this.pollTimer) {
+      return;
+    }
+    this.pollTimer = setInterval(() => this.dispatch('resync', { polled: true }), FALLBACK_POLL_MS);
+  }
+
+  stopFallbackPolling() {
+    clearInterval(this.pollTimer);
+    this.pollTimer = null;
+  }
+
+  // Register handler for an event type and return a function that removes it.
+  // Handlers for 'connected' and 'resync' should refetch whatever they display.
+  subscribe(type, handler) {
+    if (!this.handlers[type]) {
+      this.handlers[type] = new Set();
+    }
+    this.handlers[type].add(handler);
+    this.connect();
+
+    return () => {
+      this.handlers[type].delete(handler);
+    };
+  }
+
+  dispatch(type, data) {
+    const handlers = this.handlers[type];
+    if (handlers) {
+      handlers.forEach((handler) => handler(data));
+    }
+  }
+
+  // Subscribe handler to several event types at once; returns one unsubscribe function
+  subscribeAll(types, handler) {
+    const unsubscribers = types.map((type) => this.subscribe(type, handler));
+    return () => unsubscribers.forEach((unsubscribe) => unsubscribe());
+  }
+}
+
+export default new EventService();
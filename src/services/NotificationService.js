@@ -3,8 +3,17 @@ import axios from 'axios';
 const API_URL = 'http://localhost:8000/api';
 
 class NotificationService {
-  // Get all notifications for the current user
-  async getNotifications(filterType = 'all', sortBy = 'newest') {
+  // List endpoints return one page; X-Next-Cursor is set when more may follow
+  toPage(response) {
+    return {
+      notifications: response.data,
+      nextCursor: response.headers['x-next-cursor'] || null
+    };
+  }
+
+  // Get one page of notifications for the current user. Pass the nextCursor of the
+  // previous page as `after` to load the page following it.
+  async getNotifications(filterType = 'all', sortBy = 'newest', after = null) {
     const token = sessionStorage.getItem('token') || localStorage.getItem('token');
     const userStr = sessionStorage.getItem('user') || localStorage.getItem('user');
     
@@ -19,7 +28,7 @@ class NotificationService {
       
       if (!userId) {
         console.error('No user ID found in storage');
-        return [];
+        return { notifications: [], nextCursor: null };
       }
       
       console.log(`NotificationService: Fetching notifications with params: filter_type=${filterType}, sort_by=${sortBy}, user_id=${userId}`);
@@ -28,6 +37,7 @@ class NotificationService {
         params: { 
           filter_type: filterType, 
           sort_by: sortBy,
+          after,
           user_id: userId  // Explicitly include user_id as query parameter
         },
         headers: {
@@ -37,19 +47,19 @@ class NotificationService {
       });
       
       console.log('NotificationService: Received response from server:', response.data);
-      return response.data;
+      return this.toPage(response);
     } catch (error) {
       console.error('Error fetching notifications:', error);
       if (error.response) {
         console.error('Server response:', error.response.data);
         console.error('Status code:', error.response.status);
       }
-      return [];
+      return { notifications: [], nextCursor: null };
     }
   }
   
-  // Get notifications specifically for Dean
-  async getDeanNotifications(filterType = 'all', sortBy = 'newest') {
+  // Get a page of notifications specifically for Dean
+  async getDeanNotifications(filterType = 'all', sortBy = 'newest', after = null) {
     const token = sessionStorage.getItem('token') || localStorage.getItem('token');
     
     try {
@@ -59,7 +69,8 @@ class NotificationService {
       const response = await axios.get(`${API_URL}/dean-notifications`, {
         params: { 
           filter_type: filterType, 
-          sort_by: sortBy
+          sort_by: sortBy,
+          after
         },
         headers: {
           'Authorization': `Bearer ${token}`
@@ -67,7 +78,7 @@ class NotificationService {
       });
       
       console.log(`Dean notification service: Received ${response.data.length} notifications from database endpoint`);
-      return response.data;
+      return this.toPage(response);
     } catch (error) {
       console.error('Dean notification service: Error fetching notifications from database:', error);
       if (error.response) {
@@ -78,7 +89,7 @@ class NotificationService {
           console.error('No Dean user found in the database. Please ensure a user with role "Dean" exists.');
         }
       }
-      return [];
+      return { notifications: [], nextCursor: null };
     }
   }
 
@@ -281,8 +292,8 @@ class NotificationService {
     }
   }
 
-  // Get notifications specifically for Academic Coordinator
-  async getAcadCoorNotifications(filterType = 'all', sortBy = 'newest') {
+  // Get a page of notifications specifically for Academic Coordinator
+  async getAcadCoorNotifications(filterType = 'all', sortBy = 'newest', after = null) {
     const token = sessionStorage.getItem('token') || localStorage.getItem('token');
     
     try {
@@ -292,7 +303,8 @@ class NotificationService {
       const response = await axios.get(`${API_URL}/acad-coor-notifications`, {
         params: { 
           filter_type: filterType, 
-          sort_by: sortBy
+          sort_by: sortBy,
+          after
         },
         headers: {
           'Authorization': `Bearer ${token}`
@@ -300,7 +312,7 @@ class NotificationService {
       });
       
       console.log(`Academic Coordinator notification service: Received ${response.data.length} notifications from database endpoint`);
-      return response.data;
+      return this.toPage(response);
     } catch (error) {
       console.error('Academic Coordinator notification service: Error fetching notifications from database:', error);
       if (error.response) {
@@ -311,7 +323,7 @@ class NotificationService {
           console.error('No Academic Coordinator user found in the database. Please ensure a user with role "Academic Coordinator" exists.');
         }
       }
-      return [];
+      return { notifications: [], nextCursor: null };
     }
   }
 